@@ -1,5 +1,5 @@
-from website.app import app, HOST, PORT, DEBUG
+from website.serve import main
+from website.app import app  # noqa: F401 - for `uvicorn app:app`
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run("website.app:app", host=HOST, port=PORT, reload=False)
\ No newline at end of file
+    main()
@@ -0,0 +1 @@
+"""Benchmarks for the site (see benchmarks/run.py)."""
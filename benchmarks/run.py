@@ -0,0 +1,273 @@
+'''Benchmark and load-test suite for the site's routes
+
+Drives the ASGI app either in-process (httpx ASGITransport) or through a
+local uvicorn server, and reports throughput, p50/p95/p99 latency and peak
+RSS per scenario. Results are written as JSON so runs can be compared:
+
+    python -m benchmarks.run --mode inprocess --out before.json
+    python -m benchmarks.run --mode uvicorn --out after.json --compare before.json
+
+--compare exits non-zero if any scenario's p95 latency grew, or its
+throughput dropped, by more than --threshold (default 15%).
+'''
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from base64 import b64encode
+from datetime import UTC, datetime
+from pathlib import Path
+
+# The benchmark always runs against a throwaway database and a known
+# session secret; both must be set before website.* is imported.
+os.environ.setdefault("DB_PATH", os.path.join(tempfile.mkdtemp(prefix="site-bench-"), "site.db"))
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+# No background mailer retrying SMTP against localhost during measurement
+os.environ.setdefault("OUTBOX_WORKERS", "0")
+# Every benchmark request comes from one address; lift the per-IP signup
+# limit and the in-flight cap so the subscribe scenario measures real
+# signups rather than 429s
+os.environ.setdefault("SUBSCRIBE_BURST", "1000000000")
+os.environ.setdefault("SUBSCRIBE_RATE_PER_MIN", "1000000000")
+os.environ.setdefault("SUBSCRIBE_MAX_CONCURRENCY", "1000000")
+
+import httpx
+from itsdangerous import TimestampSigner
+
+SEED_LEVELS = (1_000, 10_000, 100_000)
+
+
+def session_cookie(secret: str, user: str = "prabhanshu11") -> str:
+    """A signed Starlette session cookie for the admin user"""
+    data = b64encode(json.dumps({"user": user}).encode())
+    return TimestampSigner(secret).sign(data).decode()
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(latencies, wall, errors, rss_kb):
+    ordered = sorted(latencies)
+
+    def ms(seconds):
+        return round(seconds * 1000, 3)
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / wall, 1) if wall else 0.0,
+        "p50_ms": ms(percentile(ordered, 50)),
+        "p95_ms": ms(percentile(ordered, 95)),
+        "p99_ms": ms(percentile(ordered, 99)),
+        "peak_rss_kb": rss_kb,
+    }
+
+
+async def load(client, make_request, total, concurrency, expect=(200,)):
+    """Runs `total` requests with at most `concurrency` in flight"""
+    latencies, errors = [], 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                response = await make_request(client, i)
+                if response.status_code not in expect:
+                    errors += 1
+            except Exception:  # noqa: BLE001
+                # Transport errors, and in-process mode also app exceptions
+                # (e.g. a database error) that reach the ASGI transport
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - start, errors
+
+
+def get(path, **kw):
+    return lambda client, i: client.get(path, **kw)
+
+
+def subscribe(run_id):
+    return lambda client, i: client.post(
+        "/newsletter/subscribe", data={"email": f"bench-{run_id}-{i}@example.com"}
+    )
+
+
+def seed(target):
+    """Tops the subscriber table up to `target` rows"""
+    from website import db
+    missing = target - db.get_count()
+    if missing > 0:
+        stamp = time.time_ns()
+        for start in range(0, missing, 10_000):
+            batch = range(start, min(start + 10_000, missing))
+            db.import_subscribers([f"seed-{stamp}-{i}@example.com" for i in batch])
+
+
+class InProcess:
+    name = "inprocess"
+
+    def __enter__(self):
+        from website.app import app
+        self.app = app
+        return self
+
+    def client(self, **kw):
+        return httpx.AsyncClient(transport=httpx.ASGITransport(self.app), base_url="http://bench", **kw)
+
+    def peak_rss_kb(self):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    def __exit__(self, *exc):
+        pass
+
+
+class Uvicorn:
+    name = "uvicorn"
+
+    def __enter__(self):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            self.port = s.getsockname()[1]
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "website.app:app", "--host", "127.0.0.1",
+             "--port", str(self.port), "--log-level", "warning"],
+            env=os.environ.copy(),
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                if httpx.get(f"http://127.0.0.1:{self.port}/health").status_code == 200:
+                    return self
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        self.proc.kill()
+        raise RuntimeError("uvicorn did not become healthy within 30s")
+
+    def client(self, **kw):
+        limits = httpx.Limits(max_connections=200, max_keepalive_connections=200)
+        return httpx.AsyncClient(base_url=f"http://127.0.0.1:{self.port}", limits=limits, **kw)
+
+    def peak_rss_kb(self):
+        # VmHWM is the server process's high-water resident set size
+        for line in Path(f"/proc/{self.proc.pid}/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+        return None
+
+    def __exit__(self, *exc):
+        self.proc.terminate()
+        self.proc.wait(timeout=10)
+
+
+async def run_suite(target, args):
+    results = {}
+    cookies = {"session_": session_cookie(os.environ["SECRET_KEY"])}
+
+    async def bench(name, make_request, total=None, concurrency=None, **kw):
+        async with target.client(cookies=cookies) as client:
+            await load(client, make_request, min(20, args.requests), 4, **kw)  # warm up
+            latencies, wall, errors = await load(
+                client, make_request, total or args.requests, concurrency or args.concurrency, **kw
+            )
+        results[name] = summarize(latencies, wall, errors, target.peak_rss_kb())
+        print(f"{name:<28} {json.dumps(results[name])}", flush=True)
+
+    await bench("home", get("/"))
+    await bench("about", get("/about"))
+    await bench("health", get("/health"))
+    await bench("not_found", get("/no-such-page"), expect=(404,))
+    await bench("subscribe", subscribe(time.time_ns()))
+    for level in args.seeds:
+        await asyncio.to_thread(seed, level)
+        await bench(f"newsletter_{level}", get("/myzone/newsletter"), total=args.page_requests)
+        await bench(f"newsletter_stream_{level}", get("/myzone/newsletter?stream=true"),
+                    total=args.stream_requests, concurrency=min(args.concurrency, 4))
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Returns a list of human-readable regressions against a baseline run"""
+    regressions = []
+    for name, now in results.items():
+        before = baseline.get("results", {}).get(name)
+        if not before:
+            continue
+        if before["p95_ms"] and now["p95_ms"] > before["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {before['p95_ms']}ms -> {now['p95_ms']}ms")
+        if before["throughput_rps"] and now["throughput_rps"] < before["throughput_rps"] * (1 - threshold):
+            regressions.append(f"{name}: throughput {before['throughput_rps']} -> {now['throughput_rps']} rps")
+    return regressions
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--page-requests", type=int, default=500, help="Requests per seeded admin scenario")
+    parser.add_argument("--stream-requests", type=int, default=5, help="Requests per streamed table scenario")
+    parser.add_argument("--seeds", type=lambda v: [int(x) for x in v.split(",")],
+                        default=list(SEED_LEVELS), help="Comma-separated subscriber counts")
+    parser.add_argument("--out", help="Write results JSON here (default: benchmarks/results/<time>.json)")
+    parser.add_argument("--compare", help="Baseline results JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.15)
+    args = parser.parse_args(argv)
+
+    target = InProcess() if args.mode == "inprocess" else Uvicorn()
+    with target:
+        results = asyncio.run(run_suite(target, args))
+
+    report = {
+        "meta": {
+            "mode": args.mode,
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "timestamp": datetime.now(UTC).isoformat(timespec="seconds"),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "results": results,
+    }
+    out = Path(args.out or f"benchmarks/results/{datetime.now():%Y%m%d-%H%M%S}-{args.mode}.json")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {out}")
+
+    if args.compare:
+        regressions = compare(results, json.loads(Path(args.compare).read_text()), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
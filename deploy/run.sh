@@ -23,25 +23,38 @@ echo "🛑 Stopping existing container..."
 docker stop personal-website || true
 docker rm personal-website || true
 
-# Run new container
+# Run new container. The port is published on loopback only: nginx is the
+# sole way in, so the app can trust the X-Real-IP header nginx sets.
 echo "▶️  Running new container..."
 docker run -d \
   --name personal-website \
   --restart always \
-  -p 8000:8000 \
+  -p 127.0.0.1:8000:8000 \
   -v newsletter_data:/app/data \
+  -v /var/www/prabhanshu.space/public:/app/public \
   --env-file .env \
   -e HOST=0.0.0.0 \
   -e PORT=8000 \
+  -e WORKERS="${WORKERS:-auto}" \
+  -e TRUST_PROXY_HEADERS=true \
   personal-website
 
-# Wait a moment for service to start
-sleep 5
-
-# Check if app is responding
+# Poll until the app answers (startup is lazy, so this is usually immediate)
 echo "🔍 Testing application response..."
-if curl -f http://localhost:8000/health > /dev/null 2>&1; then
+healthy=false
+for _ in $(seq 1 60); do
+    if curl -fs http://localhost:8000/health > /dev/null 2>&1; then
+        healthy=true
+        break
+    fi
+    sleep 0.5
+done
+
+if [ "$healthy" = true ]; then
     echo "✅ Application is healthy!"
+    # nginx serves the public pages from these files, not from the app
+    echo "📄 Exporting static pages..."
+    docker exec personal-website python -m website.cli export-site /app/public
 else
     echo "❌ Application health check failed!"
     # Print logs for debugging
@@ -38,7 +38,7 @@ sudo apt update && sudo apt upgrade -y
 echo "📦 Installing required software..."
 sudo apt install -y \
     python3 python3-venv python3-pip \
-    nginx certbot python3-certbot-nginx \
+    nginx libnginx-mod-http-brotli-static certbot python3-certbot-nginx \
     build-essential curl git ca-certificates gnupg \
     acl  # For setfacl if needed
 
@@ -0,0 +1,67 @@
+"""Shared test setup."""
+
+import os
+import socket
+import tempfile
+import threading
+from email import message_from_string, policy
+
+import pytest
+
+# Point the app at a throwaway database before website.db is imported, so the
+# suite never touches data/site.db.
+os.environ.setdefault("DB_PATH", os.path.join(tempfile.mkdtemp(prefix="site-test-"), "site.db"))
+# Every test request comes from the same client address; keep the signup
+# rate limit out of the way unless a test tightens it.
+os.environ.setdefault("SUBSCRIBE_BURST", "100000")
+
+from fasthtml.core import Client
+
+from website import mailer
+from website.app import app
+
+# FastHTML doesn't attach a test client to the app, so give the tests an
+# in-process one that talks to the ASGI app directly.
+app.client = Client(app)
+
+
+class Inbox:
+    """
+    aiosmtpd handler keeping every message it receives as (recipients, body).
+    Addresses in `refuse` are rejected at RCPT time, like an unknown mailbox.
+    """
+
+    def __init__(self):
+        self.messages = []
+        self.refuse = set()
+        self.received = threading.Condition()
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.refuse:
+            return "550 5.1.1 No such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        message = message_from_string(envelope.content.decode(), policy=policy.default)
+        with self.received:
+            self.messages.append((envelope.rcpt_tos, message.get_content()))
+            self.received.notify_all()
+        return "250 OK"
+
+
+@pytest.fixture
+def smtp_server(monkeypatch):
+    """A local SMTP sink that website.mailer sends to for the test's duration"""
+    from aiosmtpd.controller import Controller
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    inbox = Inbox()
+    controller = Controller(inbox, hostname="127.0.0.1", port=port)
+    controller.start()
+    monkeypatch.setattr(mailer, "SMTP_HOST", "127.0.0.1")
+    monkeypatch.setattr(mailer, "SMTP_PORT", port)
+    yield inbox
+    controller.stop()
@@ -0,0 +1,46 @@
+"""A local stand-in for GitHub's OAuth and user endpoints.
+
+Run it next to the site to exercise the login flow offline:
+
+    uvicorn tests.github_stub:app --port 9100
+    GITHUB_OAUTH_URL=http://127.0.0.1:9100/login/oauth \\
+    GITHUB_API_URL=http://127.0.0.1:9100 \\
+    GITHUB_CLIENT_ID=stub python -m website.app
+
+Every code is accepted; /user reports STUB_GITHUB_LOGIN (default
+prabhanshu11).
+"""
+
+import os
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, RedirectResponse
+from starlette.routing import Route
+
+STUB_LOGIN = os.getenv("STUB_GITHUB_LOGIN", "prabhanshu11")
+STUB_TOKEN = "stub-access-token"
+
+
+async def authorize(request):
+    redirect_uri = request.query_params.get("redirect_uri", "http://127.0.0.1:8000/auth/callback")
+    return RedirectResponse(f"{redirect_uri}?code=stub-code")
+
+
+async def access_token(request):
+    form = await request.form()
+    if not form.get("code"):
+        return JSONResponse({"error": "bad_verification_code"})
+    return JSONResponse({"access_token": STUB_TOKEN, "token_type": "bearer", "scope": "read:user"})
+
+
+async def user(request):
+    if request.headers.get("authorization") != f"Bearer {STUB_TOKEN}":
+        return JSONResponse({"message": "Bad credentials"}, status_code=401)
+    return JSONResponse({"login": STUB_LOGIN, "id": 1})
+
+
+app = Starlette(routes=[
+    Route("/login/oauth/authorize", authorize),
+    Route("/login/oauth/access_token", access_token, methods=["POST"]),
+    Route("/user", user),
+])
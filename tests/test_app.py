@@ -35,4 +35,24 @@ def test_404_page():
     client = app.client
     response = client.get("/nonexistent-page")
     assert response.status_code == 404
-    assert b"404" in response.content
\ No newline at end of file
+    assert b"404" in response.content
+
+def test_background_warm_failures_are_logged(monkeypatch, caplog):
+    import asyncio
+
+    from website import app as site
+
+    def warm_page_cache():
+        raise RuntimeError("warm-up exploded")
+
+    monkeypatch.setattr(site, "warm_page_cache", warm_page_cache)
+    monkeypatch.setattr(site, "load_known_emails", lambda: None)
+
+    async def startup():
+        site.warm_in_background()
+        await asyncio.sleep(0.2)
+
+    with caplog.at_level("ERROR", logger="website.app"):
+        asyncio.run(startup())
+    assert "warm_page_cache failed" in caplog.text
+    assert "warm-up exploded" in caplog.text
@@ -0,0 +1,43 @@
+"""Tests for the hashed static asset pipeline."""
+
+import base64
+import hashlib
+import re
+
+from website.app import HTMX, STYLESHEET, app
+from website.assets import IMMUTABLE, Asset
+
+
+def test_asset_url_tracks_content():
+    a = Asset("site.css", "body { color: red }")
+    b = Asset("site.css", "body { color: blue }")
+    assert a.url.startswith("/static/site.") and a.url.endswith(".css")
+    assert a.url != b.url
+    expected = base64.b64encode(hashlib.sha384(a.content).digest()).decode()
+    assert a.integrity == f"sha384-{expected}"
+
+
+def test_pages_link_assets_instead_of_inlining():
+    html = app.client.get("/").text
+    assert f'href="{STYLESHEET.url}"' in html
+    assert f'src="{HTMX.url}" integrity="{HTMX.integrity}"' in html
+    assert "<style>" not in html
+    assert "unpkg.com" not in html
+
+
+def test_asset_served_immutable_and_precompressed():
+    response = app.client.get(HTMX.url, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == IMMUTABLE
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["content-type"].startswith("text/javascript")
+    assert response.content == HTMX.content  # the client decodes gzip
+
+    again = app.client.get(HTMX.url, headers={"Accept-Encoding": "gzip",
+                                              "If-None-Match": response.headers["etag"]})
+    assert again.status_code == 304
+
+
+def test_unknown_asset_is_404():
+    name = re.sub(r"\.\w+\.css$", ".000000000000.css", STYLESHEET.url)
+    assert app.client.get(name).status_code == 404
@@ -0,0 +1,47 @@
+"""Tests for the GitHub OAuth callback against the local stub server."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from tests import github_stub
+from website import auth
+from website.app import app
+
+
+@pytest.fixture
+def stub_github(monkeypatch):
+    monkeypatch.setattr(auth, "GITHUB_OAUTH_URL", "http://github.stub/login/oauth")
+    monkeypatch.setattr(auth, "GITHUB_API_URL", "http://github.stub")
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(github_stub.app))
+    monkeypatch.setattr(auth, "_client", client)
+    yield
+    # Used from the TestClient's loop; a sync fixture can't `async with` it
+    asyncio.run(client.aclose())
+    monkeypatch.setattr(auth, "_client", None)
+
+
+def test_callback_logs_in_allowed_user(stub_github):
+    response = app.client.get("/auth/callback", params={"code": "abc"})
+    assert response.status_code == 303
+    assert response.headers["location"] == "/myzone"
+    assert app.client.get("/myzone").status_code == 200
+    app.client.get("/logout")
+
+
+def test_callback_rejects_other_users(stub_github, monkeypatch):
+    monkeypatch.setattr(github_stub, "STUB_LOGIN", "someone-else")
+    response = app.client.get("/auth/callback", params={"code": "abc"})
+    assert "is not allowed" in response.text
+
+
+def test_client_is_shared_and_has_timeouts():
+    client = auth.get_client()
+    try:
+        assert auth.get_client() is client
+        assert client.timeout.connect == auth.GITHUB_CONNECT_TIMEOUT
+        assert client.timeout.read == auth.GITHUB_READ_TIMEOUT
+    finally:
+        asyncio.run(auth.close_client())
+    assert client.is_closed
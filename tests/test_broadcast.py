@@ -0,0 +1,224 @@
+import smtplib
+import threading
+import time
+from collections import Counter
+from typing import ClassVar
+
+import pytest
+
+from website import app as site
+from website import auth, db, mailer
+from website.broadcast import Broadcaster, RatePacer
+
+
+@pytest.fixture
+def logged_in(monkeypatch):
+    monkeypatch.setattr(auth, "check_auth", lambda session: True)
+
+
+def active_emails():
+    return {row[0] for row in db.get_db().execute("SELECT email FROM subscribers WHERE status = 'active'")}
+
+
+def received(inbox):
+    return Counter(rcpt for rcpts, _ in inbox.messages for rcpt in rcpts)
+
+
+def wait_for(inbox, count, timeout=5):
+    with inbox.received:
+        assert inbox.received.wait_for(lambda: len(inbox.messages) >= count, timeout)
+
+
+def test_broadcast_reaches_every_active_subscriber_once(smtp_server):
+    db.import_subscribers([f"reader{i}@example.com" for i in range(30)])
+    db.add_subscriber("not-confirmed@example.com")
+    id = db.create_broadcast("Issue #1", "Hello, readers! Ünïcode too.")
+
+    broadcaster = Broadcaster(mailer.connect, concurrency=3, heartbeat=0.05)
+    assert broadcaster.start(id)
+    broadcaster.join(id, 10)
+
+    b = db.get_broadcast(id)
+    assert b['status'] == "done"
+    assert b['sent'] == b['recipients'] == len(active_emails())
+    assert b['failed'] == 0
+    counts = received(smtp_server)
+    assert set(counts) == active_emails()
+    assert set(counts.values()) == {1}
+    assert "not-confirmed@example.com" not in counts
+    assert "Hello, readers! Ünïcode too." in smtp_server.messages[0][1]
+    # A finished broadcast can't be started again
+    assert not broadcaster.start(id)
+
+
+def test_stopped_broadcast_resumes_where_it_left_off(smtp_server):
+    db.import_subscribers([f"resume{i}@example.com" for i in range(40)])
+    id = db.create_broadcast("Issue #2", "Part two")
+
+    first = Broadcaster(mailer.connect, concurrency=2, rate=200, heartbeat=0.05)
+    first.start(id)
+    wait_for(smtp_server, 10)
+    first.stop()
+
+    b = db.get_broadcast(id)
+    assert b['status'] == "sending"
+    assert 10 <= b['sent'] < b['recipients']
+    assert len(smtp_server.messages) == b['sent']
+
+    # Shutdown released the claim, so the next process start picks it up
+    second = Broadcaster(mailer.connect, concurrency=2, heartbeat=0.05)
+    assert second.resume_interrupted() == [id]
+    second.join(id, 10)
+
+    b = db.get_broadcast(id)
+    assert b['status'] == "done"
+    counts = received(smtp_server)
+    assert set(counts) == active_emails()
+    assert set(counts.values()) == {1}
+
+
+def test_live_run_cannot_be_claimed_twice():
+    db.import_subscribers(["claim@example.com"])
+    id = db.create_broadcast("Issue #3", "Body")
+    assert db.claim_broadcast(id) is not None
+    # The heartbeat is fresh: another process must keep its hands off
+    assert db.claim_broadcast(id) is None
+    assert id not in db.get_interrupted_broadcasts()
+    # ...until it goes stale, as when the sending process was killed
+    assert db.claim_broadcast(id, stale_after=-1) is not None
+    db.pause_broadcast(id)
+
+
+def test_refused_recipient_is_recorded_as_failed(smtp_server):
+    db.import_subscribers(["gone@example.com"])
+    smtp_server.refuse.add("gone@example.com")
+    id = db.create_broadcast("Issue #4", "Body")
+
+    broadcaster = Broadcaster(mailer.connect, concurrency=2, heartbeat=0.05)
+    broadcaster.start(id)
+    broadcaster.join(id, 10)
+
+    b = db.get_broadcast(id)
+    assert b['status'] == "done"
+    assert b['failed'] == 1
+    assert b['sent'] == b['recipients'] - 1
+    [failure] = db.get_broadcast_failures(id)
+    assert failure['email'] == "gone@example.com"
+    assert "550" in failure['error']
+
+
+class FlakySMTP:
+    """Drops the session after every `lifetime` messages, like a relay with a per-connection cap"""
+
+    sent: ClassVar[list] = []
+
+    def __init__(self, lifetime=5):
+        self.left = lifetime
+
+    def sendmail(self, sender, rcpts, data):
+        if self.left == 0:
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        self.left -= 1
+        FlakySMTP.sent.extend(rcpts)
+
+    def quit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_dropped_sessions_are_reopened():
+    db.import_subscribers([f"flaky{i}@example.com" for i in range(12)])
+    id = db.create_broadcast("Issue #5", "Body")
+    connections = []
+
+    def connect():
+        connections.append(FlakySMTP())
+        return connections[-1]
+
+    FlakySMTP.sent.clear()
+    broadcaster = Broadcaster(connect, concurrency=1, heartbeat=0.05)
+    broadcaster.start(id)
+    broadcaster.join(id, 10)
+
+    b = db.get_broadcast(id)
+    assert b['status'] == "done" and b['failed'] == 0
+    assert sorted(FlakySMTP.sent) == sorted(active_emails())
+    assert len(connections) == -(-b['recipients'] // 5)
+
+
+def test_unreachable_relay_interrupts_without_failing_anyone():
+    db.import_subscribers(["patient@example.com"])
+    id = db.create_broadcast("Issue #6", "Body")
+
+    def connect():
+        raise ConnectionRefusedError("relay down")
+
+    broadcaster = Broadcaster(connect, concurrency=2, heartbeat=0.05)
+    broadcaster.start(id)
+    broadcaster.join(id, 10)
+
+    b = db.get_broadcast(id)
+    assert b['status'] == "sending"
+    assert b['sent'] == b['failed'] == 0
+    assert site.broadcast_state(b) == "interrupted"
+    db.pause_broadcast(id)
+
+
+def test_rate_pacer_spaces_messages():
+    pacer = RatePacer(200)
+    stop = threading.Event()
+    started = time.monotonic()
+    for _ in range(11):
+        assert pacer.wait(stop)
+    assert time.monotonic() - started >= 0.045
+    stop.set()
+    assert not pacer.wait(stop)
+
+
+def test_broadcast_pages_require_login():
+    response = site.app.client.get("/myzone/broadcasts", follow_redirects=False)
+    assert response.status_code == 303
+    assert site.app.client.post("/myzone/broadcasts", data={"subject": "x", "body": "y"}).status_code == 403
+    assert site.app.client.post("/myzone/broadcasts/1/pause").status_code == 403
+
+
+def test_dashboard_sends_pauses_and_resumes(logged_in, smtp_server, monkeypatch):
+    db.import_subscribers([f"dash{i}@example.com" for i in range(20)])
+    broadcaster = Broadcaster(mailer.connect, concurrency=2, rate=100, heartbeat=0.05)
+    monkeypatch.setattr(site, "broadcaster", broadcaster)
+
+    response = site.app.client.post("/myzone/broadcasts", data={"subject": "Issue #7", "body": "Hi"},
+                                    follow_redirects=False)
+    assert response.status_code == 303
+    id = int(response.headers["location"].rsplit("/", 1)[1])
+
+    # While sending, the panel keeps polling itself
+    panel = site.app.client.get(f"/myzone/broadcasts/{id}/progress").text
+    assert 'hx-trigger="every 1s"' in panel
+    assert "Pause" in panel
+
+    site.app.client.post(f"/myzone/broadcasts/{id}/pause")
+    broadcaster.join(id, 10)
+    b = db.get_broadcast(id)
+    assert b['status'] == "paused"
+    assert b['sent'] < b['recipients']
+    panel = site.app.client.get(f"/myzone/broadcasts/{id}/progress").text
+    assert "hx-trigger" not in panel
+    assert "Resume" in panel
+
+    broadcaster.rate = 0  # finish quickly
+    site.app.client.post(f"/myzone/broadcasts/{id}/start")
+    broadcaster.join(id, 10)
+    page = site.app.client.get(f"/myzone/broadcasts/{id}").text
+    assert "Status: done" in page
+    assert "hx-trigger" not in page
+    assert set(received(smtp_server).values()) == {1}
+
+    listing = site.app.client.get("/myzone/broadcasts").text
+    assert "Issue #7" in listing
+
+
+def test_unknown_broadcast_is_404(logged_in):
+    assert site.app.client.get("/myzone/broadcasts/999999").status_code == 404
@@ -0,0 +1,71 @@
+"""Tests for the pre-rendered page cache."""
+
+import gzip
+
+from website.app import app, page_cache
+from website.cache import RenderCache, RenderedPage, accepted_encodings, etag_matches
+
+
+def test_accepted_encodings_respects_q_values():
+    assert accepted_encodings("gzip, br;q=0, deflate;q=0.5") == {"gzip", "deflate"}
+    assert accepted_encodings("") == set()
+
+
+def test_home_served_from_cache_with_etag():
+    client = app.client
+    first = client.get("/", headers={"Accept-Encoding": "identity"})
+    assert first.status_code == 200
+    assert "home" in page_cache
+    assert first.headers["etag"] == page_cache.get("home").etag
+    assert b"Prabhanshu" in first.content
+
+    second = client.get("/", headers={"Accept-Encoding": "identity"})
+    assert second.content == first.content
+
+
+def test_gzip_variant_negotiated():
+    response = app.client.get("/about", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    # httpx transparently decodes the body
+    assert b"About Me" in response.content
+
+
+def test_if_none_match_returns_304():
+    client = app.client
+    etag = client.get("/about", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+    response = client.get("/about", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_404_is_cached_with_status():
+    response = app.client.get("/does-not-exist", headers={"If-None-Match": "*"})
+    assert response.status_code == 404
+    assert b"404" in response.content
+
+
+def test_build_is_reproducible():
+    a = RenderedPage.build("<p>hi</p>")
+    b = RenderedPage.build("<p>hi</p>")
+    assert a.etag == b.etag and a.gzip == b.gzip
+    assert gzip.decompress(a.gzip) == b"<p>hi</p>"
+
+
+def test_render_cache_evicts_least_recently_used():
+    cache = RenderCache(maxsize=2)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"
+    cache.put("c", "C")
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("A", "C")
+
+
+def test_etag_matches_compares_weakly():
+    assert etag_matches('W/"v1"', ['W/"v1"'])
+    assert etag_matches('"v0", "v1"', ['W/"v1"'])
+    assert etag_matches("*", ['W/"v1"'])
+    assert not etag_matches('"v0"', ['W/"v1"'])
+    assert not etag_matches("", ['W/"v1"'])
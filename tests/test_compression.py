@@ -0,0 +1,105 @@
+"""Tests for the response compression middleware."""
+
+import gzip
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from website.compression import CompressionMiddleware
+from website.metrics import Registry
+
+# Both codecs come from the "speedups" extra
+brotli = pytest.importorskip("brotli")
+zstandard = pytest.importorskip("zstandard")
+
+PAGE = b"<tr><td style='padding: 0.5rem; border-bottom: 1px solid #ddd;'>row</td></tr>" * 200
+
+
+async def page(request):
+    return Response(PAGE, media_type="text/html")
+
+async def small(request):
+    return Response(b"<p>tiny</p>", media_type="text/html")
+
+async def image(request):
+    return Response(b"\x89PNG" + bytes(4096), media_type="image/png")
+
+async def encoded(request):
+    return Response(gzip.compress(PAGE), media_type="text/html", headers={"Content-Encoding": "gzip"})
+
+async def stream(request):
+    async def rows():
+        for _ in range(5):
+            yield PAGE[:2000]
+    return StreamingResponse(rows(), media_type="text/html")
+
+
+@pytest.fixture
+def registry():
+    registry = Registry()
+    for name, kind in (("http_compression_input_bytes_total", "counter"),
+                       ("http_compression_output_bytes_total", "counter"),
+                       ("http_compression_cpu_seconds", "histogram")):
+        registry.describe(name, kind, name, ("encoding",))
+    return registry
+
+
+@pytest.fixture
+def client(registry):
+    routes = [Route(f"/{fn.__name__}", fn) for fn in (page, small, image, encoded, stream)]
+    app = CompressionMiddleware(Starlette(routes=routes), minimum_size=512, registry=registry)
+    return TestClient(app)
+
+
+def raw_get(client, path, accept):
+    # Ask for raw bytes so we can check the encoding ourselves
+    with client.stream("GET", path, headers={"Accept-Encoding": accept}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+@pytest.mark.parametrize("coding, decode", [
+    ("gzip", gzip.decompress),
+    ("br", brotli.decompress),
+    ("zstd", lambda b: zstandard.ZstdDecompressor().decompressobj().decompress(b)),
+])
+def test_negotiates_each_coding(client, coding, decode):
+    response, body = raw_get(client, "/page", coding)
+    assert response.headers["content-encoding"] == coding
+    assert "accept-encoding" in response.headers["vary"].lower()
+    assert decode(body) == PAGE
+    assert len(body) < len(PAGE) / 5
+
+
+def test_prefers_zstd_then_brotli(client):
+    assert raw_get(client, "/page", "gzip, br, zstd")[0].headers["content-encoding"] == "zstd"
+    assert raw_get(client, "/page", "gzip, br")[0].headers["content-encoding"] == "br"
+    assert "content-encoding" not in raw_get(client, "/page", "identity")[0].headers
+
+
+@pytest.mark.parametrize("path", ["/small", "/image"])
+def test_skips_small_and_incompressible_bodies(client, path):
+    response, _ = raw_get(client, path, "gzip")
+    assert "content-encoding" not in response.headers
+
+
+def test_leaves_encoded_responses_alone(client):
+    response, body = raw_get(client, "/encoded", "br")
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(body) == PAGE
+
+
+def test_streams_incrementally(client):
+    response, body = raw_get(client, "/stream", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert gzip.decompress(body) == PAGE[:2000] * 5
+
+
+def test_records_ratio_and_cpu(client, registry):
+    raw_get(client, "/page", "br")
+    text = registry.render()
+    assert f'http_compression_input_bytes_total{{encoding="br"}} {len(PAGE)}' in text
+    assert 'http_compression_cpu_seconds_count{encoding="br"} 1' in text
@@ -0,0 +1,227 @@
+"""Tests for the subscriber data layer."""
+
+import gc
+import threading
+import time
+
+import apsw
+import pytest
+from fastlite import database
+
+from website import db
+
+
+def test_add_subscriber_upsert():
+    user_id, created = db.add_subscriber("upsert@example.com")
+    assert created
+    again_id, created_again = db.add_subscriber("upsert@example.com")
+    assert (again_id, created_again) == (user_id, False)
+
+
+def test_concurrent_writers_wait_for_the_lock():
+    errors = []
+
+    def work(t):
+        try:
+            for i in range(50):
+                db.add_subscriber(f"writer{t}-{i}@example.com")
+        except apsw.Error as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(t,)) for t in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def test_connect_while_another_connection_writes(tmp_path):
+    path = str(tmp_path / "busy.db")
+    writer = db.connect(path)
+    writer.execute("CREATE TABLE t (x)")
+    writing = threading.Event()
+
+    def write():
+        with db.write_transaction(writer):
+            writer.execute("INSERT INTO t VALUES (1)")
+            writing.set()
+            time.sleep(0.3)
+
+    thread = threading.Thread(target=write)
+    thread.start()
+    writing.wait()
+    # Opening waits out the writer instead of failing with "database is locked"
+    conn = db.connect(path)
+    thread.join()
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == db.PRAGMAS["busy_timeout"]
+    assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 1
+
+
+def test_exited_threads_close_their_connection():
+    opened = []
+    before = len(db._connections)
+
+    def work():
+        opened.append(db.get_db())
+        db.get_count()
+
+    for _ in range(3):
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+    gc.collect()
+    for conn in opened:
+        with pytest.raises(apsw.ConnectionClosedError):
+            conn.execute("SELECT 1")
+    assert len(db._connections) == before
+
+
+def test_close_all_reaches_other_threads():
+    ready, closed, done = threading.Event(), threading.Event(), threading.Event()
+    seen = []
+
+    def work():
+        seen.append(db.get_db())
+        ready.set()
+        closed.wait()
+        seen.append(db.get_db())
+        db.get_count()
+        done.set()
+
+    thread = threading.Thread(target=work)
+    thread.start()
+    ready.wait()
+    db.close_all()
+    closed.set()
+    done.wait()
+    thread.join()
+    assert seen[0] is not seen[1]
+    assert db.get_count() >= 0
+
+
+def test_migration_indexes_legacy_database(tmp_path):
+    legacy = database(tmp_path / "legacy.db")
+    legacy.execute(
+        "CREATE TABLE subscribers (id INTEGER PRIMARY KEY, email TEXT, created_at TEXT, status TEXT)"
+    )
+    for email in ("a@example.com", "b@example.com", "a@example.com"):
+        legacy.execute(
+            "INSERT INTO subscribers (email, created_at, status) VALUES (?, '2025-01-01T00:00:00', 'active')",
+            (email,),
+        )
+
+    db.migrate(legacy)
+
+    assert legacy.execute("PRAGMA user_version").fetchone()[0] == len(db.MIGRATIONS)
+    rows = legacy.q("SELECT id, email, created_at, typeof(created_at) AS type FROM subscribers ORDER BY id")
+    assert [r["email"] for r in rows] == ["a@example.com", "b@example.com"]
+    # ISO text became integer epoch seconds
+    assert {(r["created_at"], r["type"]) for r in rows} == {(1735689600, "integer")}
+    indexes = {r["name"] for r in legacy.q("PRAGMA index_list(subscribers)")}
+    assert {"idx_subscribers_email", "idx_subscribers_created_at"} <= indexes
+    # Running again is a no-op
+    db.migrate(legacy)
+
+
+def test_each_thread_gets_its_own_tuned_connection():
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(2) as pool:
+        conns = set(pool.map(lambda _: id(db.get_db()), range(2)))
+    assert id(db.get_db()) not in conns
+
+    conn = db.get_db()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == db.PRAGMAS["busy_timeout"]
+
+
+def test_init_db_creates_schema_on_a_fresh_path(tmp_path):
+    path = str(tmp_path / "nested" / "fresh.db")
+    db.init_db(path)
+    db.init_db(path)  # idempotent
+
+    fresh = database(path)
+    assert "subscribers" in fresh.t
+    assert fresh.execute("PRAGMA user_version").fetchone()[0] == len(db.MIGRATIONS)
+
+
+def test_forked_child_opens_its_own_connection():
+    import os
+
+    parent = db.get_db()
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        # Child: inherited handles are forgotten and a fresh one works
+        ok = not db._connections and db.get_db() is not parent and db.get_count() >= 0
+        os.write(write_fd, b"1" if ok else b"0")
+        os._exit(0)
+    os.close(write_fd)
+    os.waitpid(pid, 0)
+    assert os.read(read_fd, 1) == b"1"
+    os.close(read_fd)
+    assert db.get_db() is parent
+
+
+def test_daily_rollup_tracks_writes():
+    before = db.get_status_totals()
+    ids = [db.add_subscriber(f"rollup{i}@example.com")[0] for i in range(3)]
+    assert db.get_status_totals()["pending"] == before.get("pending", 0) + 3
+
+    db.delete_subscriber(ids[0])
+    db.confirm_subscriber(ids[1], "rollup1@example.com")
+    totals = db.get_status_totals()
+    assert totals["pending"] == before.get("pending", 0) + 1
+    assert totals["active"] == before.get("active", 0) + 1
+    assert sum(totals.values()) == db.get_count()
+
+    today = db.get_daily_growth()[-1]
+    assert today[1] >= 3 and today[2] >= 1
+
+
+def test_change_token_tracks_writes_from_any_connection():
+    import threading
+
+    before = db.change_token()
+    assert db.change_token() == before  # unchanged data, cached token
+    id, _ = db.add_subscriber("token@example.com")
+    after_insert = db.change_token()
+    assert after_insert.version > before.version
+
+    # A write on another thread's connection is seen through data_version
+    thread = threading.Thread(target=db.delete_subscriber, args=(id,))
+    thread.start()
+    thread.join()
+    assert db.change_token().version > after_insert.version
+
+
+def test_cancelled_call_counts_as_pending_until_it_finishes(monkeypatch):
+    import asyncio
+
+    monkeypatch.setattr(db, "DB_MAX_PENDING", 1)
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait()
+
+    async def scenario():
+        waiter = asyncio.create_task(db.run(slow))
+        await asyncio.to_thread(started.wait)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        try:
+            # The call is still running, so the limit still applies
+            with pytest.raises(db.DatabaseBusy):
+                await db.run(db.get_count)
+        finally:
+            release.set()
+        while db._pending:
+            await asyncio.sleep(0.01)
+        assert await db.run(db.get_count) >= 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,44 @@
+"""Tests for email normalization, validation and the known-email set."""
+
+from website import db
+from website.app import app
+from website.emails import KnownEmails, is_valid_email, normalize_email
+
+
+def test_normalize_and_validate():
+    assert normalize_email("  Someone@Example.COM ") == "someone@example.com"
+    assert is_valid_email("a.b-c@example.co.uk")
+    assert not is_valid_email("no-at-sign.example.com")
+    assert not is_valid_email("a@b.c\nextra")
+
+
+def test_known_emails_is_empty_until_loaded():
+    known = KnownEmails()
+    known.add("x@example.com")
+    assert "x@example.com" not in known
+    known.load(["y@example.com"])
+    assert "X@Example.com" in known and "y@example.com" in known
+    known.discard("x@example.com")
+    assert "x@example.com" not in known
+
+
+def test_known_set_tracks_confirmations_and_deletes():
+    db.load_known_emails()
+    user_id, _ = db.add_subscriber("Known@Example.com")
+    assert "known@example.com" not in db.known_emails  # pending
+    db.confirm_subscriber(user_id, "known@example.com")
+    assert "known@example.com" in db.known_emails
+    db.delete_subscriber(user_id)
+    assert "known@example.com" not in db.known_emails
+
+
+def test_repeat_signup_answered_without_db(monkeypatch):
+    db.load_known_emails()
+    db.import_subscribers(["repeat@example.com"])
+
+    def fail(*args, **kwargs):
+        raise AssertionError("database should not be hit")
+
+    monkeypatch.setattr(db, "add_subscriber_async", fail)
+    response = app.client.post("/newsletter/subscribe", data={"email": " REPEAT@example.com"})
+    assert "Already Subscribed" in response.text
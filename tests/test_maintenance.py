@@ -0,0 +1,131 @@
+import fcntl
+import os
+import threading
+
+import apsw
+import pytest
+
+from website import app as site
+from website import auth, cli, db, maintenance
+
+
+@pytest.fixture
+def logged_in(monkeypatch):
+    monkeypatch.setattr(auth, "check_auth", lambda session: True)
+
+
+def snapshot_count(path):
+    conn = apsw.Connection(path, flags=apsw.SQLITE_OPEN_READONLY)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM subscribers").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_backup_is_a_complete_self_contained_copy(tmp_path):
+    db.import_subscribers([f"backup{i}@example.com" for i in range(500)])
+    result = maintenance.backup(str(tmp_path), keep=5, pages_per_step=4)
+
+    assert os.path.basename(result.path).startswith("site-")
+    assert result.steps > 1  # copied in chunks
+    assert result.bytes == os.path.getsize(result.path)
+    assert snapshot_count(result.path) == db.get_count()
+    with open(result.path, "rb") as f:
+        assert f.read(20)[18:20] == b"\x01\x01"  # rollback journal, no -wal needed
+    assert not list(tmp_path.glob("*.partial"))
+
+
+def test_backup_finishes_under_constant_writes(tmp_path):
+    db.import_subscribers([f"busy{i}@example.com" for i in range(300)])
+    stop = threading.Event()
+
+    def write():
+        i = 0
+        while not stop.is_set():
+            db.add_subscriber(f"busy-writer{i}@example.com")
+            i += 1
+            stop.wait(0.001)
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    try:
+        result = maintenance.backup(str(tmp_path), pages_per_step=1, max_restarts=2)
+    finally:
+        stop.set()
+        writer.join()
+    assert result.restarts <= 2
+    assert snapshot_count(result.path) > 300
+
+
+def test_old_snapshots_are_pruned(tmp_path):
+    paths = [maintenance.backup(str(tmp_path), keep=2).path for _ in range(4)]
+    assert maintenance.list_backups(str(tmp_path)) == paths[-2:]
+
+
+def test_one_backup_at_a_time(tmp_path):
+    with open(tmp_path / ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        with pytest.raises(maintenance.BackupInProgress):
+            maintenance.backup(str(tmp_path))
+    assert maintenance.backup(str(tmp_path)).path
+
+
+def test_checkpointer_policy():
+    checkpointer = maintenance.WalCheckpointer(interval=60, max_bytes=1 << 40)
+    start = checkpointer._last
+    assert checkpointer.run_once(now=start + 1) is None
+    result = checkpointer.run_once(now=start + 61)
+    assert result.mode == "PASSIVE"
+    assert checkpointer.run_once(now=start + 62) is None
+
+    # Past the size limit it truncates right away
+    db.import_subscribers([f"wal{i}@example.com" for i in range(500)])
+    assert maintenance.wal_size() > 0
+    checkpointer.max_bytes = 0
+    result = checkpointer.run_once(now=start + 63)
+    assert result.mode == "TRUNCATE"
+    if not result.busy:
+        assert maintenance.wal_size() == 0
+
+
+def test_checkpointer_thread_starts_and_stops():
+    checkpointer = maintenance.WalCheckpointer(interval=0, check_every=0.01)
+    checkpointer.start()
+    checkpointer.stop()
+    assert checkpointer._thread is None
+
+
+def test_backup_endpoint(logged_in):
+    response = site.app.client.post("/myzone/maintenance/backup")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["seconds"] >= 0
+    assert os.path.exists(body["path"])
+
+    response = site.app.client.post("/myzone/maintenance/backup", headers={"HX-Request": "true"})
+    assert "Saved site-" in response.text
+
+
+def test_backup_endpoint_requires_login():
+    assert site.app.client.post("/myzone/maintenance/backup").status_code == 403
+
+
+def test_cli_backup_and_checkpoint(tmp_path, capsys):
+    cli.main(["backup", "--dir", str(tmp_path), "--keep", "1"])
+    assert "MB" in capsys.readouterr().out
+    assert len(maintenance.list_backups(str(tmp_path))) == 1
+
+    cli.main(["checkpoint", "--mode", "truncate"])
+    assert capsys.readouterr().out.startswith("TRUNCATE:")
+
+
+def test_only_one_checkpointer_per_database():
+    first, second = maintenance.WalCheckpointer(), maintenance.WalCheckpointer()
+    assert first.acquire()
+    assert first.acquire()  # still ours
+    assert not second.acquire()  # e.g. another worker process
+    first.start()
+    first.stop()  # gives the lock up
+    assert second.acquire()
+    second.start()
+    second.stop()
@@ -0,0 +1,85 @@
+"""Tests for request/DB metrics and the /metrics endpoint."""
+
+import json
+import time
+
+from website import db
+from website.app import app
+from website.metrics import Registry, SharedMetrics
+
+
+def test_metrics_endpoint_reports_routes_and_db_calls():
+    app.client.get("/about")
+    app.client.get("/no-such-page")
+    db.get_count()
+    response = app.client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert 'http_requests_total{method="GET",route="/about",status="2xx"}' in text
+    assert 'http_requests_total{method="GET",route="unmatched",status="4xx"}' in text
+    assert 'http_request_duration_seconds_bucket{route="/about",le="+Inf"}' in text
+    assert 'db_call_duration_seconds_count{call="get_count"}' in text
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry(buckets=(0.1, 1.0))
+    registry.describe("t", "histogram", "test", ("call",))
+    for value in (0.05, 0.5, 5.0):
+        registry.observe("t", ("x",), value)
+    text = registry.render()
+    assert 't_bucket{call="x",le="0.1"} 1' in text
+    assert 't_bucket{call="x",le="1.0"} 2' in text
+    assert 't_bucket{call="x",le="+Inf"} 3' in text
+    assert 't_count{call="x"} 3' in text
+
+
+def test_observe_overhead_is_a_few_microseconds():
+    registry = Registry()
+    n = 20000
+    start = time.perf_counter()
+    for _ in range(n):
+        registry.inc("requests", ("GET", "/bench", "2xx"))
+        registry.observe("latency", ("/bench",), 0.003)
+    assert (time.perf_counter() - start) / n < 20e-6
+
+
+def test_shared_metrics_sum_every_worker(tmp_path):
+    workers = []
+    for requests in (2, 3):
+        registry = Registry(buckets=(0.1,))
+        registry.describe("requests", "counter", "test", ("route",))
+        registry.describe("latency", "histogram", "test", ("route",))
+        for _ in range(requests):
+            registry.inc("requests", ("/",))
+            registry.observe("latency", ("/",), 0.05)
+        shared = SharedMetrics(str(tmp_path), registry, interval=60)
+        shared.start()
+        workers.append(shared)
+
+    workers[1].stop()  # an exited worker's totals still count
+    text = workers[0].render()
+    workers[0].stop()
+    assert 'requests{route="/"} 5' in text
+    assert 'latency_bucket{route="/",le="0.1"} 5' in text
+    assert 'latency_count{route="/"} 5' in text
+
+    SharedMetrics.reset(str(tmp_path))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_metrics_endpoint_reports_shared_totals(tmp_path, monkeypatch):
+    from website import app as site
+
+    other = Registry()
+    other.inc("http_requests_total", ("GET", "/elsewhere", "2xx"), 7)
+    (tmp_path / "other.json").write_text(json.dumps(other.snapshot()))
+    shared = SharedMetrics(str(tmp_path))
+    shared.start()
+    monkeypatch.setattr(site, "shared_metrics", shared)
+    try:
+        text = app.client.get("/metrics").text
+    finally:
+        shared.stop()
+    assert 'http_requests_total{method="GET",route="/elsewhere",status="2xx"} 7' in text
+    assert 'db_call_duration_seconds_count{call="get_count"}' in text
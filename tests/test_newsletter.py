@@ -0,0 +1,230 @@
+"""Tests for the newsletter admin pages."""
+
+import pytest
+
+from website import app as site
+from website import auth, db
+from website.app import app
+
+
+@pytest.fixture
+def logged_in(monkeypatch):
+    monkeypatch.setattr(auth, "check_auth", lambda session: True)
+
+
+@pytest.fixture
+def small_pages(monkeypatch):
+    monkeypatch.setattr(site, "NEWSLETTER_PAGE_SIZE", 2)
+
+
+def test_newsletter_requires_login():
+    response = app.client.get("/myzone/newsletter")
+    assert response.status_code == 303
+
+
+def test_keyset_pages_cover_every_subscriber_once():
+    for i in range(5):
+        db.add_subscriber(f"page{i}@example.com")
+    seen, after = [], None
+    while page := db.get_subscribers_page(after, limit=2):
+        seen += [row["id"] for row in page]
+        after = (page[-1]["created_at"], page[-1]["id"])
+    assert len(seen) == len(set(seen)) == db.get_count()
+
+
+def test_first_page_has_load_more_sentinel(logged_in, small_pages):
+    response = app.client.get("/myzone/newsletter")
+    assert response.status_code == 200
+    assert response.text.count('name="ids"') == 2
+    assert 'hx-trigger="revealed"' in response.text
+
+
+def test_rows_fragment_continues_from_cursor(logged_in, small_pages):
+    first = db.get_subscribers_page(limit=2)
+    last = first[-1]
+    response = app.client.get(
+        "/myzone/newsletter/rows",
+        params={"after_ts": last["created_at"], "after_id": last["id"]},
+        headers={"HX-Request": "true"},
+    )
+    assert response.status_code == 200
+    assert "<html" not in response.text
+    for row in first:
+        assert f"/myzone/newsletter/delete/{row['id']}\"" not in response.text
+
+
+def test_streamed_page_contains_all_rows(logged_in, small_pages):
+    response = app.client.get("/myzone/newsletter", params={"stream": "true"})
+    assert response.status_code == 200
+    assert response.text.count('name="ids"') == db.get_count()
+    assert response.text.rstrip().endswith("</html>")
+
+
+def test_subscribe_then_duplicate():
+    response = app.client.post("/newsletter/subscribe", data={"email": "async@example.com"})
+    assert "Almost there!" in response.text
+    # Still unconfirmed: the same answer, pointing at the inbox again
+    response = app.client.post("/newsletter/subscribe", data={"email": "async@example.com"})
+    assert "Almost there!" in response.text
+    user_id = db.get_db().execute("SELECT id FROM subscribers WHERE email = 'async@example.com'").fetchone()[0]
+    db.confirm_subscriber(user_id, "async@example.com")
+    response = app.client.post("/newsletter/subscribe", data={"email": "async@example.com"})
+    assert "Already Subscribed" in response.text
+
+
+def test_db_queue_limit_sheds_load(monkeypatch):
+    monkeypatch.setattr(db, "DB_MAX_PENDING", 0)
+    response = app.client.post("/newsletter/subscribe", data={"email": "shed@example.com"})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+
+def test_htmx_single_delete_returns_row_swap_fragment(logged_in):
+    user_id, _ = db.add_subscriber("htmx-delete@example.com")
+    response = app.client.post(f"/myzone/newsletter/delete/{user_id}", headers={"HX-Request": "true"})
+    assert response.status_code == 200
+    assert "<html" not in response.text
+    assert 'hx-swap-oob="true"' in response.text
+    assert user_id not in {row["id"] for row in db.get_all_subscribers()}
+
+
+def test_bulk_delete_in_one_request(logged_in):
+    ids = [db.add_subscriber(f"bulk{i}@example.com")[0] for i in range(3)]
+    before = db.get_count()
+    response = app.client.post(
+        "/myzone/newsletter/delete", data={"ids": [str(i) for i in ids[:2]]}, headers={"HX-Request": "true"}
+    )
+    assert "Deleted 2." in response.text
+    assert db.get_count() == before - 2
+    remaining = {row["id"] for row in db.get_all_subscribers()}
+    assert ids[2] in remaining and not remaining & set(ids[:2])
+
+
+def test_bulk_delete_without_htmx_redirects(logged_in):
+    user_id, _ = db.add_subscriber("bulk-plain@example.com")
+    response = app.client.post("/myzone/newsletter/delete", data={"ids": str(user_id)})
+    assert response.status_code == 303
+
+
+def test_admin_table_is_compressed(logged_in):
+    db.add_subscriber("compressed@example.com")
+    response = app.client.get("/myzone/newsletter", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "compressed@example.com" in response.text  # decoded by the client
+
+
+def test_table_renders_in_requested_timezone(logged_in):
+    db.add_subscriber("tz@example.com")
+    response = app.client.get("/myzone/newsletter", params={"tz": "America/New_York"})
+    assert "Joined At (America/New_York)" in response.text
+    assert " EST</td>" in response.text or " EDT</td>" in response.text
+
+    response = app.client.get("/myzone/newsletter", params={"tz": "Nowhere/Special"})
+    assert "Joined At (UTC)" in response.text
+
+
+def test_growth_series_fills_gaps_and_carries_history():
+    daily = [(5, 10, 0), (98, 2, 1), (100, 3, 0)]
+    series = site.growth_series(daily, today=100, span=3)
+    assert series == [(98, 11, 2), (99, 11, 0), (100, 14, 3)]
+
+
+def test_dashboard_shows_totals_and_chart(logged_in):
+    db.add_subscriber("dashboard@example.com")
+    response = app.client.get("/myzone")
+    assert response.status_code == 200
+    assert f">{db.get_count()}</div>" in response.text
+    assert "<svg" in response.text and "<polyline" in response.text
+
+
+def test_search_finds_substrings_and_domains():
+    db.add_subscriber("findme.alpha@searchable.test")
+    db.add_subscriber("other.beta@searchable.test")
+    assert [r["email"] for r in db.search_subscribers("dme.alp")] == ["findme.alpha@searchable.test"]
+    assert len(db.search_subscribers("@searchable.test")) == 2
+    assert db.search_subscribers("fi") == []  # too short for trigrams
+    assert db.search_subscribers('"alpha" OR x') == []  # operators are literal
+
+
+def test_search_index_follows_deletes():
+    user_id, _ = db.add_subscriber("gone.soon@searchable.test")
+    db.delete_subscriber(user_id)
+    assert db.search_subscribers("gone.soon") == []
+
+
+def test_search_fragment_is_limited(logged_in, monkeypatch):
+    monkeypatch.setattr(site, "NEWSLETTER_SEARCH_LIMIT", 2)
+    for i in range(3):
+        db.add_subscriber(f"limit{i}@many.test")
+    response = app.client.get("/myzone/newsletter/search", params={"q": "@many.test"},
+                              headers={"HX-Request": "true"})
+    assert response.status_code == 200
+    assert "<html" not in response.text
+    assert response.text.count('name="ids"') == 2
+    assert "refine the search" in response.text
+
+
+def test_admin_pages_revalidate_with_304(logged_in):
+    for path in ("/myzone", "/myzone/newsletter"):
+        response = app.client.get(path)
+        assert response.headers["cache-control"] == "private, no-cache"
+        etag = response.headers["etag"]
+
+        response = app.client.get(path, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+
+def test_304_skips_queries_and_rendering(logged_in, monkeypatch):
+    etag = app.client.get("/myzone/newsletter").headers["etag"]
+
+    async def fail(*args, **kwargs):
+        raise AssertionError("queried for an unchanged page")
+    monkeypatch.setattr(db, "get_count_async", fail)
+    monkeypatch.setattr(db, "get_subscribers_page_async", fail)
+
+    assert app.client.get("/myzone/newsletter", headers={"If-None-Match": etag}).status_code == 304
+    # Without a validator, the rendered copy for this data version is reused
+    assert app.client.get("/myzone/newsletter").status_code == 200
+
+
+def test_writes_change_the_etag(logged_in):
+    response = app.client.get("/myzone/newsletter")
+    etag = response.headers["etag"]
+
+    db.add_subscriber("etag-bump@example.com")
+    response = app.client.get("/myzone/newsletter", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert "etag-bump@example.com" in response.text
+
+
+
+def test_admin_pages_ignore_if_modified_since(logged_in):
+    # The page also depends on the deploy, the date and the parameters, so
+    # only the ETag can say a copy is current
+    response = app.client.get("/myzone/newsletter")
+    assert "last-modified" not in response.headers
+    far_future = "Fri, 01 Jan 2100 00:00:00 GMT"
+    response = app.client.get("/myzone/newsletter", params={"tz": "Asia/Kolkata"},
+                              headers={"If-Modified-Since": far_future})
+    assert response.status_code == 200
+
+
+def test_etag_varies_with_parameters(logged_in):
+    utc = app.client.get("/myzone/newsletter").headers["etag"]
+    ist = app.client.get("/myzone/newsletter", params={"tz": "Asia/Kolkata"}).headers["etag"]
+    assert utc != ist
+    assert app.client.get("/myzone/newsletter", params={"tz": "Asia/Kolkata"},
+                          headers={"If-None-Match": utc}).status_code == 200
+
+
+def test_delete_then_redirect_renders_fresh_page(logged_in):
+    user_id, _ = db.add_subscriber("etag-delete@example.com")
+    etag = app.client.get("/myzone/newsletter").headers["etag"]
+    response = app.client.post(f"/myzone/newsletter/delete/{user_id}")
+    assert response.status_code == 303
+    response = app.client.get(response.headers["location"], headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert "etag-delete@example.com" not in response.text
@@ -0,0 +1,171 @@
+import re
+import time
+
+from website import app as site
+from website import db, mailer
+from website.outbox import OutboxWorker, backoff
+
+
+def outbox_row(subscriber_id):
+    row = db.get_db().execute(
+        "SELECT status, attempts, next_attempt_at, last_error, id FROM outbox WHERE subscriber_id = ?",
+        (subscriber_id,),
+    ).fetchone()
+    return dict(zip(("status", "attempts", "next_attempt_at", "last_error", "id"), row))
+
+
+def drain():
+    """Sends whatever earlier tests left in the outbox nowhere"""
+    while OutboxWorker(lambda message: None).process_one():
+        pass
+
+
+def test_signup_is_pending_until_confirmed(smtp_server):
+    drain()
+    email = "optin@example.com"
+    response = site.app.client.post("/newsletter/subscribe", data={"email": email})
+    assert "Almost there!" in response.text
+    assert db.get_status(email) == "pending"
+
+    worker = OutboxWorker(lambda message: mailer.deliver(message, site.SECRET_KEY), concurrency=1, poll_interval=0.05)
+    worker.start()
+    try:
+        deadline = time.monotonic() + 5
+        while not any(email in rcpts for rcpts, _ in smtp_server.messages) and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        worker.stop()
+
+    body = next(content for rcpts, content in smtp_server.messages if email in rcpts)
+    token = re.search(r"/newsletter/confirm\?token=(\S+)", body).group(1)
+
+    response = site.app.client.get(f"/newsletter/confirm?token={token}")
+    assert "Thanks for confirming" in response.text
+    assert db.get_status(email) == "active"
+
+    # Opening the link twice is harmless
+    response = site.app.client.get(f"/newsletter/confirm?token={token}")
+    assert "Already confirmed" in response.text
+
+
+def test_confirm_rejects_bad_tokens():
+    id, _ = db.add_subscriber("forged@example.com")
+    forged = mailer.confirm_token("some-other-secret", id, "forged@example.com")
+    for token in (forged, "garbage", ""):
+        response = site.app.client.get(f"/newsletter/confirm?token={token}")
+        assert response.status_code == 400
+    assert db.get_status("forged@example.com") == "pending"
+
+
+def test_confirm_token_is_bound_to_the_email():
+    id, _ = db.add_subscriber("bound@example.com")
+    token = mailer.confirm_token(site.SECRET_KEY, id, "someone-else@example.com")
+    site.app.client.get(f"/newsletter/confirm?token={token}")
+    assert db.get_status("bound@example.com") == "pending"
+
+
+def test_expired_token():
+    token = mailer.confirm_token(site.SECRET_KEY, 1, "old@example.com")
+    assert mailer.read_confirm_token(site.SECRET_KEY, token, max_age=-1) is None
+    assert mailer.read_confirm_token(site.SECRET_KEY, token) == (1, "old@example.com")
+
+
+def confirmations(subscriber_id):
+    return db.get_db().execute(
+        "SELECT COUNT(*) FROM outbox WHERE subscriber_id = ? AND kind = 'confirm'", (subscriber_id,)
+    ).fetchone()[0]
+
+
+def test_resubscribing_after_an_expired_link_sends_a_fresh_one(monkeypatch):
+    drain()
+    email = "expired-link@example.com"
+    site.app.client.post("/newsletter/subscribe", data={"email": email})
+    id = db.get_db().execute("SELECT id FROM subscribers WHERE email = ?", (email,)).fetchone()[0]
+    drain()  # the first link went out
+
+    issued = time.time() - mailer.CONFIRM_TOKEN_MAX_AGE - 60
+    with monkeypatch.context() as m:
+        m.setattr(time, "time", lambda: issued)
+        token = mailer.confirm_token(site.SECRET_KEY, id, email)
+    response = site.app.client.get(f"/newsletter/confirm?token={token}")
+    assert "subscribe again" in response.text
+
+    # Within the resend interval the earlier link stands
+    response = site.app.client.post("/newsletter/subscribe", data={"email": email})
+    assert "Almost there!" in response.text
+    assert confirmations(id) == 1
+
+    monkeypatch.setattr(site, "CONFIRM_RESEND_SECONDS", 0)
+    response = site.app.client.post("/newsletter/subscribe", data={"email": email})
+    assert "Almost there!" in response.text
+    assert confirmations(id) == 2
+    # Sending it again right away doesn't queue a third while one is waiting
+    site.app.client.post("/newsletter/subscribe", data={"email": email})
+    assert confirmations(id) == 2
+
+
+def test_request_confirmation_ignores_confirmed_addresses():
+    id, _ = db.add_subscriber("confirmed-resend@example.com")
+    db.confirm_subscriber(id, "confirmed-resend@example.com")
+    assert not db.request_confirmation("confirmed-resend@example.com", 0)
+    assert not db.request_confirmation("never-signed-up@example.com", 0)
+    assert confirmations(id) == 1
+
+
+def test_importing_a_pending_address_leaves_it_confirmable():
+    db.load_known_emails()
+    email = "pending-then-imported@example.com"
+    site.app.client.post("/newsletter/subscribe", data={"email": email})
+    assert db.import_subscribers([email]) == 0  # already there, still pending
+
+    assert email not in db.known_emails
+    response = site.app.client.post("/newsletter/subscribe", data={"email": email})
+    assert "Almost there!" in response.text
+    assert db.get_status(email) == "pending"
+
+
+def test_imports_skip_confirmation():
+    db.import_subscribers(["imported-optin@example.com"])
+    assert db.get_status("imported-optin@example.com") == "active"
+    count = db.get_db().execute(
+        "SELECT COUNT(*) FROM outbox WHERE recipient = 'imported-optin@example.com'"
+    ).fetchone()[0]
+    assert count == 0
+
+
+def test_backoff():
+    assert [backoff(n, 30, 3600) for n in range(1, 5)] == [30, 60, 120, 240]
+    assert backoff(20, 30, 3600) == 3600
+
+
+def test_failed_delivery_is_retried_then_given_up():
+    drain()
+    id, _ = db.add_subscriber("bounce@example.com")
+
+    def fail(message):
+        raise ConnectionRefusedError("smtp down")
+
+    worker = OutboxWorker(fail, max_attempts=2, backoff_base=60)
+    assert worker.process_one()
+    row = outbox_row(id)
+    assert row["status"] == "queued"
+    assert row["attempts"] == 1
+    assert "smtp down" in row["last_error"]
+    assert row["next_attempt_at"] > time.time() + 30
+    # Not due yet
+    assert not worker.process_one()
+
+    with db.get_db().conn:
+        db.get_db().execute("UPDATE outbox SET next_attempt_at = 0 WHERE id = ?", (row["id"],))
+    assert worker.process_one()
+    row = outbox_row(id)
+    assert row["status"] == "failed"
+    assert row["attempts"] == 2
+
+
+def test_claimed_message_is_not_handed_out_twice():
+    drain()
+    db.add_subscriber("lease@example.com")
+    first = db.claim_outbox(10, lease=300)
+    assert [m["recipient"] for m in first] == ["lease@example.com"]
+    assert db.claim_outbox(10, lease=300) == []
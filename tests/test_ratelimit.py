@@ -0,0 +1,76 @@
+"""Tests for signup rate limiting and admission control."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from website import app as site
+from website.app import app
+from website.ratelimit import ConcurrencyLimiter, TokenBucketLimiter, client_ip
+
+
+def test_token_bucket_refills_over_time():
+    limiter = TokenBucketLimiter(rate=1.0, burst=2)
+    assert limiter.allow("a", now=0)[0]
+    assert limiter.allow("a", now=0)[0]
+    assert limiter.allow("a", now=0) == (False, 1)
+    assert limiter.allow("b", now=0)[0]  # other clients unaffected
+    assert limiter.allow("a", now=1.0)[0]
+
+
+def test_token_bucket_lru_is_bounded():
+    limiter = TokenBucketLimiter(rate=1.0, burst=1, max_clients=3)
+    for key in "abcde":
+        limiter.allow(key, now=0)
+    assert len(limiter) == 3
+
+
+def test_concurrency_limiter_refuses_when_full():
+    slots = ConcurrencyLimiter(1)
+    assert slots.try_acquire()
+    assert not slots.try_acquire()
+    slots.release()
+    assert slots.try_acquire()
+
+
+def test_client_ip_prefers_proxy_headers():
+    req = SimpleNamespace(headers={"x-forwarded-for": "6.6.6.6, 1.2.3.4"}, client=SimpleNamespace(host="127.0.0.1"))
+    assert client_ip(req, trust_proxy_headers=True) == "1.2.3.4"
+    req.headers["x-real-ip"] = "5.6.7.8"
+    assert client_ip(req, trust_proxy_headers=True) == "5.6.7.8"
+    assert client_ip(req) == "127.0.0.1"
+
+
+@pytest.fixture
+def strict_limits(monkeypatch):
+    monkeypatch.setattr(site, "subscribe_limiter", TokenBucketLimiter(rate=0.001, burst=1))
+
+
+def test_spoofed_proxy_headers_dont_reset_the_limit(strict_limits):
+    assert not site.TRUST_PROXY_HEADERS  # the default
+    first = app.client.post("/newsletter/subscribe", data={"email": "spoof1@example.com"},
+                            headers={"X-Real-IP": "198.51.100.1"})
+    assert first.status_code == 200
+    second = app.client.post("/newsletter/subscribe", data={"email": "spoof2@example.com"},
+                             headers={"X-Real-IP": "198.51.100.2"})
+    assert second.status_code == 429
+
+
+def test_subscribe_is_rate_limited_per_ip(strict_limits, monkeypatch):
+    monkeypatch.setattr(site, "TRUST_PROXY_HEADERS", True)  # as behind nginx
+    headers = {"X-Real-IP": "203.0.113.7"}
+    first = app.client.post("/newsletter/subscribe", data={"email": "rl1@example.com"}, headers=headers)
+    assert first.status_code == 200
+    second = app.client.post("/newsletter/subscribe", data={"email": "rl2@example.com"}, headers=headers)
+    assert second.status_code == 429
+    assert int(second.headers["retry-after"]) > 0
+    assert "Slow down" in second.text
+    other = app.client.post("/newsletter/subscribe", data={"email": "rl3@example.com"},
+                            headers={"X-Real-IP": "203.0.113.8"})
+    assert other.status_code == 200
+
+
+def test_subscribe_sheds_load_when_saturated(monkeypatch):
+    monkeypatch.setattr(site, "subscribe_slots", ConcurrencyLimiter(0))
+    response = app.client.post("/newsletter/subscribe", data={"email": "busy@example.com"})
+    assert response.status_code == 429
@@ -0,0 +1,91 @@
+import gzip
+import re
+from pathlib import Path
+
+import pytest
+
+from website import app as site
+from website import cli, sitegen
+
+DEPLOY = Path(__file__).parent.parent / "deploy"
+NGINX_CONF = DEPLOY / "nginx" / "personal-website.conf"
+# Served by the app through their own nginx locations
+APP_ONLY = ("/static/", "/health", "/metrics")
+
+
+def test_export_matches_what_the_app_serves(tmp_path):
+    written = sitegen.export_site(tmp_path)
+
+    assert all(path.is_relative_to(tmp_path) for path in written)
+    for url, filename in (("/", "index.html"), ("/about", "about.html")):
+        body = site.app.client.get(url).content
+        assert (tmp_path / filename).read_bytes() == body
+        assert gzip.decompress((tmp_path / f"{filename}.gz").read_bytes()) == body
+    assert b"404" in (tmp_path / "404.html").read_bytes()
+
+
+def test_export_includes_brotli_variants(tmp_path):
+    brotli = pytest.importorskip("brotli")  # the "speedups" extra
+    sitegen.export_site(tmp_path)
+
+    for filename in sitegen.PAGES.values():
+        body = (tmp_path / filename).read_bytes()
+        assert brotli.decompress((tmp_path / f"{filename}.br").read_bytes()) == body
+
+
+def test_export_includes_hashed_assets(tmp_path):
+    sitegen.export_site(tmp_path)
+
+    for asset in site.assets:
+        path = tmp_path / "static" / asset.filename
+        assert path.read_bytes() == site.app.client.get(asset.url).content
+        assert (tmp_path / "static" / f"{asset.filename}.gz").exists()
+
+
+def test_export_is_idempotent_and_leaves_no_temp_files(tmp_path):
+    sitegen.export_site(tmp_path)
+    def files():
+        return {p: p.read_bytes() for p in tmp_path.rglob("*") if p.is_file()}
+
+    before = files()
+    sitegen.export_site(tmp_path)
+
+    assert files() == before
+    assert not [p for p in tmp_path.rglob(".*.tmp")]
+
+
+def test_cli_export_site(tmp_path, capsys):
+    cli.main(["export-site", str(tmp_path / "public")])
+
+    assert "wrote" in capsys.readouterr().out
+    assert (tmp_path / "public" / "index.html").exists()
+
+
+def test_every_dynamic_route_is_proxied_by_nginx():
+    # Anything nginx doesn't proxy is looked up on disk, so a new route
+    # missing from the dynamic location would 404 in production
+    pattern = re.search(r"location ~ (\S+) \{", NGINX_CONF.read_text()).group(1)
+    exported = {"/", "/about"}
+    for route in site.app.routes:
+        path = route.path
+        if path in exported or path.startswith(APP_ONLY):
+            continue
+        assert re.match(pattern, path), f"{path} isn't proxied by nginx"
+
+
+def test_nginx_locations_keep_the_security_headers():
+    # A location with its own add_header drops the server-level ones
+    conf = NGINX_CONF.read_text()
+    server_headers = set(re.findall(r"^    add_header (\S+)", conf, re.MULTILINE))
+    for block in re.findall(r"location [^{]+\{[^}]*\}", conf):
+        headers = set(re.findall(r"add_header (\S+)", block))
+        if headers:
+            assert server_headers <= headers, block
+
+
+def test_every_deploy_path_exports_into_the_nginx_root():
+    root = re.search(r"^    root (\S+);", NGINX_CONF.read_text(), re.MULTILINE)[1]
+    unit = (DEPLOY / "systemd" / "personal-website.service").read_text()
+    assert re.search(rf"^ExecStartPost=.* website\.cli export-site {root}$", unit, re.MULTILINE)
+    run_sh = (DEPLOY / "run.sh").read_text()
+    assert f"{root}:/app/public" in run_sh and "export-site /app/public" in run_sh
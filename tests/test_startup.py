@@ -0,0 +1,34 @@
+"""Cold-start tests: importing the app must be cheap and side-effect free."""
+
+import os
+import subprocess
+import sys
+
+from website.cli import measure_import, parse_importtime
+
+# Wall time for a fresh interpreter to import website.app. Most of it is
+# python-fasthtml itself; the budget catches regressions like eager DB
+# work or heavy new imports on the startup path.
+COLD_START_BUDGET_MS = float(os.getenv("COLD_START_BUDGET_MS", "2000"))
+
+
+def test_parse_importtime():
+    rows = parse_importtime(
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   website.metrics\n"
+        "import time:      6000 |      90000 | website.app\n"
+    )
+    assert rows == [("website.metrics", 120, 120, 1), ("website.app", 6000, 90000, 0)]
+
+
+def test_import_does_not_touch_the_database(tmp_path):
+    db_path = tmp_path / "data" / "site.db"
+    subprocess.run([sys.executable, "-c", "import website.app"], check=True,
+                   env=dict(os.environ, DB_PATH=str(db_path)))
+    assert not db_path.parent.exists()
+
+
+def test_cold_start_within_budget():
+    elapsed, rows = measure_import("website.app")
+    assert any(name == "website.app" for name, *_ in rows)
+    assert elapsed * 1000 < COLD_START_BUDGET_MS, f"cold start took {elapsed * 1000:.0f} ms"
@@ -0,0 +1,26 @@
+"""Tests for epoch timestamp formatting."""
+
+from datetime import datetime
+
+import pytest
+
+from website.timestamps import TimestampFormatter, get_zone, isoformat_utc
+
+
+@pytest.mark.parametrize("tz", ["UTC", "Asia/Kolkata", "Europe/Berlin", "Australia/Lord_Howe"])
+def test_matches_datetime_across_transitions(tz):
+    zone = get_zone(tz)
+    # A year of timestamps at an odd stride, so DST switches are crossed
+    stamps = list(range(1_700_000_000, 1_700_000_000 + 366 * 86400, 3607))
+    expected = [datetime.fromtimestamp(ts, zone).strftime("%Y-%m-%d %H:%M:%S %Z") for ts in stamps]
+    assert TimestampFormatter(zone).format_all(stamps) == expected
+
+
+def test_zone_lookup():
+    assert get_zone("IST") is get_zone("Asia/Kolkata")
+    assert get_zone("Not/AZone") is None
+    assert get_zone("../../etc/passwd") is None
+
+
+def test_isoformat_utc():
+    assert isoformat_utc(1735689600) == "2025-01-01T00:00:00Z"
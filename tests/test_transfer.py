@@ -0,0 +1,73 @@
+"""Tests for subscriber export and bulk import."""
+
+import csv
+import io
+import json
+
+import pytest
+
+from website import auth, db, transfer
+from website.app import app
+
+
+@pytest.fixture
+def logged_in(monkeypatch):
+    monkeypatch.setattr(auth, "check_auth", lambda session: True)
+
+
+def test_import_counts_inserted_skipped_and_invalid():
+    db.add_subscriber("import-existing@example.com")
+    lines = io.StringIO(
+        "email,name\n"
+        "import-new1@example.com,A\n"
+        "import-existing@example.com,B\n"
+        "not-an-email,C\n"
+        "import-new2@example.com,D\n"
+        "import-new1@example.com,E\n"
+    )
+    result = transfer.import_file(lines, "csv", batch_size=2)
+    assert (result.inserted, result.skipped, result.invalid) == (2, 2, 1)
+
+
+def test_read_emails_formats():
+    assert list(transfer.read_emails(["a@x.io,1\n", "b@x.io,2\n"], "csv")) == ["a@x.io", "b@x.io"]
+    assert list(transfer.read_emails(['{"email": "c@x.io"}\n', "\n"], "ndjson")) == ["c@x.io"]
+    assert transfer.detect_format("list.JSONL") == "ndjson"
+
+
+def test_export_streams_csv_and_ndjson(logged_in):
+    db.add_subscriber("export@example.com")
+    response = app.client.get("/myzone/newsletter/export", params={"format": "csv"})
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == db.get_count()
+    assert "export@example.com" in {r["email"] for r in rows}
+
+    response = app.client.get("/myzone/newsletter/export", params={"format": "ndjson"})
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert len(records) == db.get_count()
+
+
+def test_import_endpoint(logged_in):
+    files = {"file": ("list.txt", b"upload1@example.com\nupload2@example.com\nbad\n", "text/plain")}
+    response = app.client.post("/myzone/newsletter/import", files=files)
+    assert response.status_code == 200
+    assert "Imported 2, skipped 0 existing, 1 invalid." in response.text
+
+
+def test_export_requires_login():
+    assert app.client.get("/myzone/newsletter/export").status_code == 403
+
+
+def test_cli_import_uses_the_configured_batch_size(tmp_path, monkeypatch):
+    from website import cli
+
+    sizes = []
+    monkeypatch.setattr(transfer, "IMPORT_BATCH_SIZE", 7)
+    monkeypatch.setattr(transfer, "import_file", lambda f, fmt, batch_size: sizes.append(batch_size)
+                        or transfer.ImportResult(0, 0, 0))
+    path = tmp_path / "list.txt"
+    path.write_text("cli-batch@example.com\n")
+    cli.main(["import", str(path)])
+    cli.main(["import", str(path), "--batch-size", "3"])
+    assert sizes == [7, 3]
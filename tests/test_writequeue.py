@@ -0,0 +1,72 @@
+"""Tests for the group-commit write queue."""
+
+import threading
+
+import pytest
+
+from website import db
+from website.writequeue import WriteQueue
+
+
+def test_concurrent_submits_share_a_commit():
+    batches = []
+
+    def commit(items):
+        batches.append(list(items))
+        return [item.upper() for item in items]
+
+    queue = WriteQueue(commit, flush_interval=0.05, max_batch=10)
+    results = {}
+
+    def submit(i):
+        results[i] = queue.submit(f"item{i}").result()
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    queue.close()
+
+    assert results == {i: f"ITEM{i}" for i in range(8)}
+    assert len(batches) < 8
+    assert max(len(b) for b in batches) <= 10
+
+
+def test_close_flushes_pending_and_rejects_new_items():
+    queue = WriteQueue(lambda items: items, flush_interval=10)
+    future = queue.submit("pending")
+    queue.close()
+    assert future.result(timeout=1) == "pending"
+    with pytest.raises(RuntimeError):
+        queue.submit("late")
+
+
+def test_commit_errors_reach_every_submitter():
+    def commit(items):
+        raise ValueError("boom")
+
+    queue = WriteQueue(commit, flush_interval=0.01)
+    future = queue.submit("x")
+    with pytest.raises(ValueError):
+        future.result(timeout=1)
+    queue.close()
+
+
+def test_add_subscribers_batch_matches_single_upsert():
+    existing_id, _ = db.add_subscriber("batch-existing@example.com")
+    results = db.add_subscribers(
+        ["batch-new@example.com", "batch-existing@example.com", "batch-new@example.com"]
+    )
+    new_id = results[0][0]
+    assert results == [(new_id, True), (existing_id, False), (new_id, False)]
+
+
+def test_subscribe_route_uses_queue(monkeypatch):
+    from website import app as site
+
+    queue = WriteQueue(db.add_subscribers, flush_interval=0.001)
+    monkeypatch.setattr(site, "signup_queue", queue)
+    response = site.app.client.post("/newsletter/subscribe", data={"email": "queued@example.com"})
+    queue.close()
+    assert "Almost there!" in response.text
@@ -3,16 +3,72 @@
 import os
 from fasthtml.common import *
 from website import auth, db
-import re
-from datetime import datetime, timedelta
+from website.broadcast import Broadcaster
+from website.assets import STATIC_DIR, AssetRegistry
+from website.cache import PageCache, RenderCache, etag_matches
+from website.compression import CompressionMiddleware
+from website.emails import is_valid_email, normalize_email
+from website.metrics import MetricsMiddleware, REGISTRY, SharedMetrics
+from website import maintenance, mailer, transfer
+from website.outbox import OutboxWorker
+from website.ratelimit import ConcurrencyLimiter, TokenBucketLimiter, client_ip
+from website import timestamps
+from website.timestamps import TimestampFormatter, get_zone
+from fasthtml import svg
+from website.writequeue import WriteQueue
+import asyncio
+import hashlib
+import logging
+from functools import partial
+from pathlib import Path
+from urllib.parse import urlencode
+
+log = logging.getLogger(__name__)
 
 # Configuration from environment variables
 HOST = os.getenv("HOST", "0.0.0.0")
-PORT = int(os.getenv("PORT", 8000))
+PORT = int(os.getenv("PORT", "8000"))
 DEBUG = os.getenv("DEBUG", "False").lower() == "true"
+# Server processes started by `python -m website.serve`; "auto" = one per core
+WORKERS = (os.cpu_count() or 1) if os.getenv("WORKERS") == "auto" else int(os.getenv("WORKERS", "1"))
+NEWSLETTER_PAGE_SIZE = int(os.getenv("NEWSLETTER_PAGE_SIZE", "100"))
+NEWSLETTER_SEARCH_LIMIT = int(os.getenv("NEWSLETTER_SEARCH_LIMIT", "50"))
+# Group-commit newsletter signups: batch writes arriving within
+# SIGNUP_FLUSH_MS of each other (up to SIGNUP_MAX_BATCH) into one transaction
+SIGNUP_QUEUE = os.getenv("SIGNUP_QUEUE", "False").lower() == "true"
+SIGNUP_FLUSH_MS = float(os.getenv("SIGNUP_FLUSH_MS", "5"))
+SIGNUP_MAX_BATCH = int(os.getenv("SIGNUP_MAX_BATCH", "100"))
+# Abuse protection for the public subscribe endpoint: a token bucket per
+# client IP (SUBSCRIBE_RATE_PER_MIN refill, SUBSCRIBE_BURST capacity, at most
+# SUBSCRIBE_MAX_CLIENTS tracked) and a cap on signups being processed at once.
+# Both live in process memory, so they apply per worker: with WORKERS=N a
+# client gets up to N times the rate and burst (see README, Multiple Workers)
+SUBSCRIBE_RATE_PER_MIN = float(os.getenv("SUBSCRIBE_RATE_PER_MIN", "10"))
+SUBSCRIBE_BURST = int(os.getenv("SUBSCRIBE_BURST", "5"))
+SUBSCRIBE_MAX_CLIENTS = int(os.getenv("SUBSCRIBE_MAX_CLIENTS", "10000"))
+SUBSCRIBE_MAX_CONCURRENCY = int(os.getenv("SUBSCRIBE_MAX_CONCURRENCY", "16"))
+# Take the client address from X-Real-IP/X-Forwarded-For. Only safe when the
+# app is reachable solely through our nginx, which sets them; otherwise
+# anyone could claim a fresh address per request and dodge the limit.
+TRUST_PROXY_HEADERS = os.getenv("TRUST_PROXY_HEADERS", "False").lower() == "true"
+# Responses smaller than this many bytes are sent uncompressed
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "512"))
+SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-key-change-in-prod")
+# Confirmation emails go out from a background pool reading the outbox
+# table; OUTBOX_WORKERS=0 disables sending in this process
+OUTBOX_WORKERS = int(os.getenv("OUTBOX_WORKERS", "2"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "5"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "6"))
+# Signing up again while still pending sends a fresh confirmation link, at
+# most once per CONFIRM_RESEND_SECONDS
+CONFIRM_RESEND_SECONDS = int(os.getenv("CONFIRM_RESEND_SECONDS", "600"))
+# Newsletter issues: parallel SMTP sessions, and a cap on messages per
+# second across all of them (0 = as fast as the relay accepts)
+BROADCAST_CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", "4"))
+BROADCAST_RATE_PER_SEC = float(os.getenv("BROADCAST_RATE_PER_SEC", "10"))
 
-# Shared styles for the application
-GLOBAL_STYLES = Style('''
+# Shared styles for the application, served as a hashed stylesheet
+GLOBAL_STYLES = '''
     /* Minimal CSS Reset */
     * { 
         box-sizing: border-box;
@@ -117,12 +173,12 @@ GLOBAL_STYLES = Style('''
             padding: 1.5rem;
         }
     }
-''')
+'''
 
 # Script for Mobile Zoom Reflow
 # This forces the body width to match the visual viewport width when zooming,
 # causing text to reflow (wrap) within the zoomed view.
-ZOOM_REFLOW_SCRIPT = Script('''
+ZOOM_REFLOW_SCRIPT = '''
     if (window.visualViewport) {
         window.visualViewport.addEventListener('resize', () => {
             // Only apply on mobile/touch devices where zooming is common
@@ -131,22 +187,138 @@ ZOOM_REFLOW_SCRIPT = Script('''
             }
         });
     }
-''')
+'''
+
+# Stylesheet and scripts are served from /static under content-hashed
+# names, so pages stay small and repeat visits only fetch the HTML
+assets = AssetRegistry()
+STYLESHEET = assets.add("site.css", GLOBAL_STYLES)
+ZOOM_SCRIPT = assets.add("zoom-reflow.js", ZOOM_REFLOW_SCRIPT)
+# Vendored so pages don't depend on a third-party CDN at view time
+HTMX = assets.add_file(STATIC_DIR / "htmx-2.0.4.min.js", "htmx.min.js")
+
+def asset_tags():
+    return (
+        Link(rel="stylesheet", href=STYLESHEET.url, integrity=STYLESHEET.integrity),
+        Script(src=ZOOM_SCRIPT.url, integrity=ZOOM_SCRIPT.integrity, defer=True),
+        Script(src=HTMX.url, integrity=HTMX.integrity),
+    )
+
+# Public pages are pure functions of the code, so each one is rendered once
+# and served from memory as precompressed bytes
+page_cache = PageCache()
+
+def warm_page_cache():
+    page_cache.warm()
+
+def load_known_emails():
+    # Each worker process would hold its own copy, and a delete handled by
+    # one worker can't evict the address from the others. With several
+    # workers the set stays unloaded and every signup asks the database.
+    if WORKERS == 1:
+        db.load_known_emails()
+
+def warm_in_background():
+    # Runs after startup hands off, so the server accepts connections right
+    # away. Until these finish, pages render on first request and signups
+    # ask the database, which is exactly the cold behaviour anyway.
+    loop = asyncio.get_running_loop()
+    for warm in (warm_page_cache, load_known_emails):
+        loop.run_in_executor(None, warm).add_done_callback(partial(_log_warm_failure, warm.__name__))
+
+def _log_warm_failure(name, future):
+    # Nobody awaits these futures, so an error would otherwise vanish
+    if not future.cancelled() and future.exception() is not None:
+        log.error("%s failed", name, exc_info=future.exception())
+
+subscribe_limiter = TokenBucketLimiter(SUBSCRIBE_RATE_PER_MIN / 60, SUBSCRIBE_BURST, SUBSCRIBE_MAX_CLIENTS)
+subscribe_slots = ConcurrencyLimiter(SUBSCRIBE_MAX_CONCURRENCY)
+
+signup_queue = (
+    WriteQueue(db.add_subscribers, flush_interval=SIGNUP_FLUSH_MS / 1000, max_batch=SIGNUP_MAX_BATCH)
+    if SIGNUP_QUEUE else None
+)
+
+def flush_signup_queue():
+    if signup_queue:
+        signup_queue.close()
+
+outbox_worker = OutboxWorker(
+    partial(mailer.deliver, secret=SECRET_KEY),
+    concurrency=OUTBOX_WORKERS,
+    poll_interval=OUTBOX_POLL_SECONDS,
+    max_attempts=OUTBOX_MAX_ATTEMPTS,
+)
+
+def start_outbox():
+    if OUTBOX_WORKERS > 0:
+        outbox_worker.start()
+
+def stop_outbox():
+    outbox_worker.stop()
+
+broadcaster = Broadcaster(mailer.connect, concurrency=BROADCAST_CONCURRENCY, rate=BROADCAST_RATE_PER_SEC)
+
+def resume_broadcasts():
+    # Picks up issues a previous process was sending when it stopped. With
+    # several workers each tries, and the claim lets exactly one through.
+    if OUTBOX_WORKERS > 0:
+        asyncio.get_running_loop().run_in_executor(None, broadcaster.resume_interrupted)
+
+def stop_broadcasts():
+    broadcaster.stop()
+
+checkpointer = maintenance.WalCheckpointer()
+
+def start_checkpointer():
+    if maintenance.WAL_CHECKPOINT_SECONDS > 0:
+        checkpointer.start()
+
+def stop_checkpointer():
+    checkpointer.stop()
+
+# Set by the multi-worker launcher: every worker writes its metrics there and
+# /metrics reports their sum. Read at startup, after the launcher has set it.
+shared_metrics = None
+
+def start_shared_metrics():
+    global shared_metrics
+    if directory := os.getenv("METRICS_DIR"):
+        shared_metrics = SharedMetrics(directory)
+        shared_metrics.start()
+
+def stop_shared_metrics():
+    if shared_metrics is not None:
+        shared_metrics.stop()
+
+def close_db():
+    db.shutdown_executor()
+    db.close_all()
 
 # Initialize FastHTML app
 app = FastHTML(
-    secret_key=os.getenv("SECRET_KEY", "dev-secret-key-change-in-prod"),
+    on_startup=[warm_in_background, auth.get_client, start_outbox, resume_broadcasts, start_checkpointer,
+                start_shared_metrics],
+    on_shutdown=[flush_signup_queue, stop_outbox, stop_broadcasts, stop_checkpointer, close_db,
+                 auth.close_client, stop_shared_metrics],
+    secret_key=SECRET_KEY,
+    # FastHTML's defaults pull htmx and friends from a CDN; ours are local
+    default_hdrs=False,
     hdrs=(
         Meta(name="viewport", content="width=device-width, initial-scale=1.0, user-scalable=yes, maximum-scale=5.0"),
         Meta(name="description", content="Personal website of Prabhanshu - Software Developer and Python Enthusiast"),
         Meta(name="author", content="Prabhanshu"),
         Meta(charset="utf-8"),
-        GLOBAL_STYLES,
-        ZOOM_REFLOW_SCRIPT,
-        Script(src="https://unpkg.com/htmx.org@1.9.10")
+        *asset_tags(),
     ),
 )
 
+# Compress dynamic responses (the cached pages and assets come precompressed)
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+# Per-route request counts and latency histograms, served on /metrics.
+# Added last so it's outermost and its timings include compression.
+app.add_middleware(MetricsMiddleware)
+
 
 # Helper function to create consistent layout
 def create_layout(title: str, *content):
@@ -155,7 +327,8 @@ def create_layout(title: str, *content):
         Head(
              Title(f"{title} - Prabhanshu"),
              Meta(name="viewport", content="width=device-width, initial-scale=1"),
-             GLOBAL_STYLES
+             # Full Html pages skip the app-level hdrs, so link the assets here too
+             *asset_tags(),
          ),
          Body(
              Div(
@@ -167,8 +340,7 @@ def create_layout(title: str, *content):
      )
 
 
-@app.get("/")
-def home():
+def home_page():
     return create_layout(
         "Home",
         Div(
@@ -221,6 +393,8 @@ def home():
                 action="/newsletter/subscribe",
                 method="post",
                 id="newsletter-form",
+                # htmx ignores error responses by default; show the 429 notice
+                hx_on__before_swap="if (event.detail.xhr.status === 429) { event.detail.shouldSwap = true; event.detail.isError = false; }",
                 style="max-width: 400px;"
             ),
             cls="section fade-in"
@@ -231,31 +405,29 @@ def home():
         )
     )
 
-def parse_and_format_ts(iso_ts, tz="UTC"):
-    """
-    Parses ISO timestamp and returns formatted string in requested timezone.
-    Assumes ISO string in UTC.
-    """
-    try:
-        dt = datetime.fromisoformat(iso_ts)
-        
-        if tz == "IST":
-             # Manually add 5h 30m for IST
-            from datetime import timedelta
-            dt = dt + timedelta(hours=5, minutes=30)
-            return dt.strftime("%Y-%m-%d %H:%M:%S IST")
-        else:
-            return dt.strftime("%Y-%m-%d %H:%M:%S UTC")
-    except:
-        return iso_ts
+@app.get("/")
+def home(req):
+    return page_cache.get("home").response(req)
 
-def is_valid_email(email):
-    # Basic regex for email validation
-    pattern = r'^[\w\.-]+@[\w\.-]+\.\w+$'
-    return re.match(pattern, email) is not None
+def too_many_requests(retry_after: int):
+    """Cheap 429 fragment for shed signups"""
+    return HTMLResponse(
+        to_xml(Div(
+            H3("⏳ Slow down", style="color: #b36b00; margin-bottom: 1rem;"),
+            P(f"Too many requests right now. Please try again in {retry_after} seconds."),
+            style="text-align: center; padding: 1rem; border: 1px solid #b36b00; border-radius: 8px; background-color: #fff8ec;"
+        )),
+        status_code=429,
+        headers={"Retry-After": str(retry_after)}
+    )
 
 @app.post("/newsletter/subscribe")
-def subscribe(email: str):
+async def subscribe(req, email: str):
+    allowed, retry_after = subscribe_limiter.allow(client_ip(req, TRUST_PROXY_HEADERS))
+    if not allowed:
+        return too_many_requests(retry_after)
+
+    email = normalize_email(email)
     if not is_valid_email(email):
         return Div(
             P("❌ Invalid email address.", style="color: red; margin-bottom: 0.5rem;"),
@@ -275,22 +447,71 @@ def subscribe(email: str):
             )
         )
         
-    user_id, created = db.add_subscriber(email)
+    if email in db.known_emails:
+        # Repeat submission of a confirmed address: answer from memory
+        # without touching SQLite
+        created = pending = False
+    else:
+        # Shed load instead of queueing once enough signups are in flight
+        if not subscribe_slots.try_acquire():
+            return too_many_requests(1)
+        try:
+            if signup_queue:
+                user_id, created = await asyncio.wrap_future(signup_queue.submit(email))
+            else:
+                user_id, created = await db.add_subscriber_async(email)
+            # Signed up before but never confirmed (link lost, expired or
+            # undeliverable): queue a fresh one
+            pending = not created and await db.request_confirmation_async(email, CONFIRM_RESEND_SECONDS)
+        finally:
+            subscribe_slots.release()
     
-    if created:
+    if created or pending:
+        # The confirmation email was queued with the row; send it now
+        # rather than at the next poll
+        outbox_worker.notify()
         return Div(
-            H3("🎉 Subscribed!", style="color: green; margin-bottom: 1rem;"),
-            P("Thank you for joining. I'll keep you posted!"),
+            H3("📬 Almost there!", style="color: green; margin-bottom: 1rem;"),
+            P("Check your inbox and open the confirmation link to finish subscribing."),
             style="text-align: center; padding: 1rem; border: 1px solid green; border-radius: 8px; background-color: #f0fff4;"
         )
     else:
         return Div(
             H3("✅ Already Subscribed", style="color: #0066cc; margin-bottom: 1rem;"),
-            P("You're already on the list!"),
+            P("You're already on the list! If you haven't confirmed yet, look for the link in your inbox."),
             style="text-align: center; padding: 1rem; border: 1px solid #0066cc; border-radius: 8px; background-color: #f0f7ff;"
         )
 
 
+@app.get("/newsletter/confirm")
+async def confirm_subscription(token: str = ""):
+    """Target of the link in the confirmation email"""
+    claims = mailer.read_confirm_token(SECRET_KEY, token)
+    if claims is None:
+        return HTMLResponse(to_xml(create_layout(
+            "Link expired",
+            H1("This link is invalid or has expired"),
+            P("Please subscribe again from the ", A("home page", href="/"), " to get a fresh link."),
+        )), status_code=400)
+
+    subscriber_id, email = claims
+    if await db.confirm_subscriber_async(subscriber_id, email):
+        heading, message = "🎉 Subscribed!", "Thanks for confirming. I'll keep you posted!"
+    else:
+        # Already confirmed (or since removed); either way nothing to do
+        heading, message = "✅ Already confirmed", "This address doesn't need confirming."
+    return create_layout("Newsletter", H1(heading), P(message), P(A("← Back to Home", href="/")))
+
+
+@app.get("/static/{filename}")
+def static_asset(req, filename: str):
+    """Content-hashed assets: immutable, precompressed, ETag-validated"""
+    asset = assets.find(filename)
+    if asset is None:
+        return page_cache.get("404").response(req)
+    return asset.page.response(req)
+
+
 @app.get("/health")
 def health_check():
     """Health check endpoint for monitoring"""
@@ -301,8 +522,7 @@ def health_check():
     }
 
 
-@app.get("/about")
-def about():
+def about_page():
     """Detailed about page"""
     return create_layout(
         "About",
@@ -343,17 +563,128 @@ def about():
     )
 
 
+@app.get("/metrics")
+def metrics():
+    """Prometheus scrape endpoint"""
+    text = shared_metrics.render() if shared_metrics is not None else REGISTRY.render()
+    return Response(text, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/about")
+def about(req):
+    return page_cache.get("about").response(req)
+
+
 # Authentication Routes
 app.get("/login")(auth.login_page)
 app.get("/auth/github/login")(auth.github_login)
 app.get("/auth/callback")(auth.github_callback)
 app.get("/logout")(auth.logout)
 
+GROWTH_CHART_DAYS = 90
+
+def growth_series(daily, today, span=GROWTH_CHART_DAYS):
+    """
+    Running subscriber total and signups for each of the last `span` days,
+    from the rollup's (day, signups, deletions) rows.
+    """
+    start = today - span + 1
+    total = 0
+    by_day = {}
+    for day, signups, deletions in daily:
+        if day < start:
+            total += signups - deletions
+        else:
+            by_day[day] = (signups, deletions)
+    series = []
+    for day in range(start, today + 1):
+        signups, deletions = by_day.get(day, (0, 0))
+        total += signups - deletions
+        series.append((day, total, signups))
+    return series
+
+def growth_chart(series, width=600, height=160):
+    """Inline SVG: daily signups as bars, running total as a line"""
+    peak_total = max((t for _, t, _ in series), default=0) or 1
+    peak_signups = max((s for _, _, s in series), default=0) or 1
+    step = width / len(series)
+    bars = [
+        svg.Rect(round(max(step - 1, 1), 1), round(s / peak_signups * height / 3, 1),
+                 x=round(i * step, 1), y=round(height - s / peak_signups * height / 3, 1), fill="#cde")
+        for i, (_, _, s) in enumerate(series) if s
+    ]
+    points = " ".join(f"{round((i + 0.5) * step, 1)},{round(height - t / peak_total * (height - 4) - 2, 1)}"
+                      for i, (_, t, _) in enumerate(series))
+    return svg.Svg(
+        *bars,
+        svg.Polyline(points=points, fill="none", stroke="#0066cc", stroke_width=2),
+        viewBox=f"0 0 {width} {height}", width="100%", height=height, preserveAspectRatio="none",
+        role="img", aria_label=f"Subscribers over the last {len(series)} days",
+        style="background: white; border: 1px solid #eee;"
+    )
+
+def stat(label, value):
+    return Div(
+        Div(str(value), style="font-size: 1.5em; font-weight: bold;"),
+        Div(label, style="font-size: 0.8em; color: #555;"),
+        style="display: inline-block; margin-right: 2rem; margin-bottom: 1rem;"
+    )
+
+# Admin pages that show subscriber data are revalidated against the data's
+# change token (db.change_token) rather than re-queried on every refresh,
+# and their rendered HTML is kept in a small cache keyed on the same token.
+# RENDER_VERSION is part of every validator, so a deploy that changes the
+# markup or an asset doesn't leave browsers holding old pages as current.
+ADMIN_RENDER_CACHE_SIZE = int(os.getenv("ADMIN_RENDER_CACHE_SIZE", "32"))
+RENDER_VERSION = hashlib.sha256(
+    Path(__file__).read_bytes() + "".join(a.url for a in (STYLESHEET, ZOOM_SCRIPT, HTMX)).encode()
+).hexdigest()[:12]
+admin_render_cache = RenderCache(ADMIN_RENDER_CACHE_SIZE)
+
+async def admin_validators(req, *variant) -> tuple[dict, bool]:
+    """
+    ETag header for an admin page rendered from the current data with
+    parameters `variant`, and whether the client's copy is still current.
+    Costs one PRAGMA, not a query, when nothing changed. There is no
+    Last-Modified: the page also depends on the deploy, the date and the
+    parameters, which a one-second data timestamp can't capture.
+    """
+    token = await db.change_token_async()
+    key = ":".join(str(part) for part in (RENDER_VERSION, token.version, *variant))
+    # Weak: the compressed and identity bodies are the same page
+    etag = f'W/"{hashlib.sha256(key.encode()).hexdigest()[:20]}"'
+    headers = {
+        "ETag": etag,
+        # Behind a login: browsers may keep it, shared caches may not
+        "Cache-Control": "private, no-cache",
+        "Vary": "Cookie",
+    }
+    return headers, etag_matches(req.headers.get("if-none-match", ""), [etag])
+
+async def cached_render(key: str, render) -> str:
+    """The page for `key`, rendering it with `await render()` on a miss"""
+    html = admin_render_cache.get(key)
+    if html is None:
+        html = to_xml(await render())
+        admin_render_cache.put(key, html)
+    return html
+
 @app.get("/myzone")
-def my_zone(session):
+async def my_zone(req, session):
     if not auth.check_auth(session):
         return RedirectResponse("/login", status_code=303)
-    
+
+    # The chart ends today, so the page also changes at midnight UTC
+    today = timestamps.now() // 86400
+    headers, fresh = await admin_validators(req, "myzone", today)
+    if fresh:
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(await cached_render(headers["ETag"], partial(dashboard_page, today)), headers=headers)
+
+async def dashboard_page(today):
+    totals = await db.get_status_totals_async()
+    series = growth_series(await db.get_daily_growth_async(), today)
+
     return create_layout(
         "My Zone",
         Header(
@@ -368,13 +699,32 @@ def my_zone(session):
             # Application Stats / Links
             Div(
                 A("📧 Newsletter Subscribers", href="/myzone/newsletter", cls="btn", style="background: #eef; color: #333; border: 1px solid #ccd; padding: 0.5rem 1rem; text-decoration: none; border-radius: 4px; display: inline-block; margin-bottom: 1rem;"),
+                A("📨 Send a Newsletter", href="/myzone/broadcasts", cls="btn", style="background: #eef; color: #333; border: 1px solid #ccd; padding: 0.5rem 1rem; text-decoration: none; border-radius: 4px; display: inline-block; margin-bottom: 1rem; margin-left: 0.5rem;"),
                 style="margin-bottom: 2rem;"
             ),
             
-            # Placeholder for future dashboard widgets
+            # Subscriber totals and growth, all read from the daily rollup
             Div(
-                P("More features coming soon..."),
+                H3("Newsletter"),
+                stat("Subscribers", sum(totals.values())),
+                *[stat(status.capitalize(), count) for status, count in sorted(totals.items())],
+                stat("Signups, last 7 days", sum(s for _, _, s in series[-7:])),
+                stat(f"Signups, last {GROWTH_CHART_DAYS} days", sum(s for _, _, s in series)),
+                growth_chart(series),
+                P(f"Running total (line) and daily signups (bars), last {GROWTH_CHART_DAYS} days, UTC.",
+                  style="font-size: 0.8em; color: #555;"),
                 style="padding: 2rem; background: #f9f9f9; border-radius: 8px;"
+            ),
+
+            Div(
+                H3("Database"),
+                Button("Back up now", cls="btn", style="font-size: 0.8em;",
+                       hx_post="/myzone/maintenance/backup", hx_target="#backup-result",
+                       hx_disabled_elt="this"),
+                Span(id="backup-result", style="font-size: 0.8em; margin-left: 0.5rem;"),
+                P(f"Snapshots go to {maintenance.BACKUP_DIR}; the newest {maintenance.BACKUP_KEEP} are kept.",
+                  style="font-size: 0.8em; color: #555;"),
+                style="margin-top: 2rem;"
             )
         ),
         Footer(
@@ -382,47 +732,104 @@ def my_zone(session):
         )
     )
 
-@app.get("/myzone/newsletter")
-def newsletter_list(session, tz: str = "UTC"):
-    if not auth.check_auth(session):
-        return RedirectResponse("/login", status_code=303)
-        
-    subs = db.get_all_subscribers()
-    
-    # Determine next toggle state
-    next_tz = "IST" if tz == "UTC" else "UTC"
-    toggle_label = f"Switch to {next_tz}"
-    
-    rows = []
-    for s in subs:
-        ts_str = parse_and_format_ts(s['created_at'], tz)
-        rows.append(
-            Tr(
-                Td(s['id'], style="padding: 0.5rem; border-bottom: 1px solid #eee;"),
-                Td(s['email'], style="padding: 0.5rem; border-bottom: 1px solid #eee;"),
-                Td(ts_str, style="padding: 0.5rem; border-bottom: 1px solid #eee;"),
-                Td(s['status'], style="padding: 0.5rem; border-bottom: 1px solid #eee;"),
-                Td(
-                    Form(
-                        Button("Delete", 
-                               type="submit",
-                               cls="btn", 
-                               style="background: #fee; color: red; border: 1px solid #faa; font-size: 0.8em; padding: 0.2rem 0.5rem; cursor: pointer;"
-                        ),
-                        method="post",
-                        action=f"/myzone/newsletter/delete/{s['id']}",
-                        style="display: inline;"
-                    ),
-                    style="padding: 0.5rem; border-bottom: 1px solid #eee;"
-                )
-            )
+CELL_STYLE = "padding: 0.5rem; border-bottom: 1px solid #eee;"
+HEADER_CELL_STYLE = "text-align: left; padding: 0.5rem; border-bottom: 2px solid #ccc;"
+TOOL_BTN_STYLE = "font-size: 0.8em; margin-bottom: 1rem; display: inline-block; text-decoration: none; border: 1px solid #ccc; padding: 0.2rem 0.5rem; border-radius: 4px; background: #f0f0f0; color: black;"
+
+def timestamp_formatter(tz: str) -> tuple[str, TimestampFormatter]:
+    """The requested IANA zone (UTC if unknown) and a formatter for this request"""
+    zone = get_zone(tz)
+    if zone is None:
+        tz, zone = "UTC", get_zone("UTC")
+    return tz, TimestampFormatter(zone)
+
+def subscriber_row(s, joined):
+    return Tr(
+        Td(Input(type="checkbox", name="ids", value=s['id'], form="bulk-delete"), style=CELL_STYLE),
+        Td(s['id'], style=CELL_STYLE),
+        Td(s['email'], style=CELL_STYLE),
+        Td(joined, style=CELL_STYLE),
+        Td(s['status'], style=CELL_STYLE),
+        Td(
+            Form(
+                Button("Delete", 
+                       type="submit",
+                       cls="btn", 
+                       style="background: #fee; color: red; border: 1px solid #faa; font-size: 0.8em; padding: 0.2rem 0.5rem; cursor: pointer;"
+                ),
+                method="post",
+                action=f"/myzone/newsletter/delete/{s['id']}",
+                # With htmx, swap out just this row instead of reloading the table
+                hx_post=f"/myzone/newsletter/delete/{s['id']}",
+                hx_target="closest tr",
+                hx_swap="outerHTML",
+                style="display: inline;"
+            ),
+            style=CELL_STYLE
         )
-        
+    )
+
+def load_more_row(last, tz):
+    """
+    Sentinel row that fetches the next page when scrolled into view (or
+    clicked), replacing itself with the new rows and the next sentinel.
+    Without JS the link opens the next page in full.
+    """
+    cursor = urlencode({"tz": tz, "after_ts": last['created_at'], "after_id": last['id']})
+    return Tr(
+        Td(
+            A("Load more",
+              href=f"/myzone/newsletter?{cursor}",
+              hx_get=f"/myzone/newsletter/rows?{cursor}",
+              hx_target="closest tr",
+              hx_swap="outerHTML",
+              cls="btn"),
+            colspan=6,
+            style="padding: 0.5rem; text-align: center;"
+        ),
+        hx_get=f"/myzone/newsletter/rows?{cursor}",
+        hx_trigger="revealed",
+        hx_swap="outerHTML",
+        id="load-more"
+    )
+
+def subscriber_rows(page, tz, fmt, limit):
+    joined = fmt.format_all([s['created_at'] for s in page])
+    rows = [subscriber_row(s, j) for s, j in zip(page, joined)]
+    if len(page) == limit:
+        rows.append(load_more_row(page[-1], tz))
+    return rows
+
+def search_rows(results, query, fmt, limit):
+    """Matching rows for a search, with a note row when there's nothing to show or more to narrow"""
+    joined = fmt.format_all([s['created_at'] for s in results])
+    rows = [subscriber_row(s, j) for s, j in zip(results, joined)]
+    if len(query.strip().lstrip("@")) < db.SEARCH_MIN_LENGTH:
+        note = f"Type at least {db.SEARCH_MIN_LENGTH} characters to search."
+    elif not results:
+        note = f"No subscribers match “{query}”."
+    elif len(results) == limit:
+        note = f"Showing the newest {limit} matches; refine the search to see others."
+    else:
+        return rows
+    return rows + [Tr(Td(note, colspan=6, style="padding: 0.5rem; text-align: center; color: #555;"))]
+
+def _after(after_ts, after_id):
+    return (after_ts, after_id) if after_id else None
+
+def total_line(total, oob=False):
+    return P(f"Total: {total}", cls="subtitle", id="subscriber-total", hx_swap_oob="true" if oob else None)
+
+def newsletter_page(tz, rows, total, q=""):
+    # Quick toggle between UTC and IST; any other zone via the tz box
+    next_tz = "Asia/Kolkata" if tz == "UTC" else "UTC"
+    toggle_label = f"Switch to {next_tz}"
+
     return create_layout(
         "Newsletter Subscribers",
         Header(
             H1("Newsletter Subscribers"),
-            P(f"Total: {len(subs)}", cls="subtitle"),
+            total_line(total),
              Div(
                 A("← Back to Dashboard", href="/myzone", cls="btn", style="font-size: 0.9em;"),
                 style="margin-top: 1rem;"
@@ -433,68 +840,407 @@ def newsletter_list(session, tz: str = "UTC"):
                 A(toggle_label, 
                   href=f"/myzone/newsletter?tz={next_tz}",
                   cls="btn",
-                  style="font-size: 0.8em; margin-bottom: 1rem; display: inline-block; text-decoration: none; border: 1px solid #ccc; padding: 0.2rem 0.5rem; border-radius: 4px; background: #f0f0f0; color: black;"
+                  style=TOOL_BTN_STYLE
+                ),
+                A("Show all", 
+                  href=f"/myzone/newsletter?tz={tz}&stream=true",
+                  cls="btn",
+                  style=TOOL_BTN_STYLE
+                ),
+                A("Export CSV", href="/myzone/newsletter/export?format=csv", cls="btn", style=TOOL_BTN_STYLE),
+                A("Export NDJSON", href="/myzone/newsletter/export?format=ndjson", cls="btn", style=TOOL_BTN_STYLE),
+                Form(
+                    Input(type="search", name="q", value=q, placeholder="Search email or @domain",
+                          aria_label="Search subscribers", autocomplete="off",
+                          style="font-size: 0.8em; width: 16em;",
+                          # Search as you type: wait for a pause, drop stale responses
+                          hx_get="/myzone/newsletter/search",
+                          hx_trigger="input changed delay:300ms, search",
+                          hx_target="#subscriber-rows",
+                          hx_swap="innerHTML",
+                          hx_sync="this:replace",
+                          hx_include="closest form"),
+                    Input(type="hidden", name="tz", value=tz),
+                    action="/myzone/newsletter",
+                    method="get",
+                    style="display: inline; margin-left: 0.5rem;"
+                ),
+                Form(
+                    Input(type="text", name="tz", value=tz, placeholder="e.g. Europe/Berlin",
+                          aria_label="Timezone", style="font-size: 0.8em; width: 12em;"),
+                    Button("Set timezone", type="submit", cls="btn", style="font-size: 0.8em;"),
+                    action="/myzone/newsletter",
+                    method="get",
+                    style="display: inline; margin-left: 0.5rem;"
                 )
             ),
+            Form(
+                Button("Delete selected", type="submit", cls="btn",
+                       style="background: #fee; color: red; border: 1px solid #faa; font-size: 0.8em; padding: 0.2rem 0.5rem; cursor: pointer;"),
+                Span(id="bulk-delete-result"),
+                id="bulk-delete",
+                method="post",
+                action="/myzone/newsletter/delete",
+                hx_post="/myzone/newsletter/delete",
+                hx_target="#bulk-delete-result",
+                hx_confirm="Delete the selected subscribers?",
+                # Drop the deleted rows in place once the server confirms
+                hx_on__after_request="if (event.detail.successful) document.querySelectorAll('input[name=ids]:checked').forEach(c => c.closest('tr').remove())",
+                style="margin-bottom: 1rem;"
+            ),
+            Form(
+                Input(type="file", name="file", accept=".csv,.ndjson,.jsonl,.txt", required=True),
+                Button("Import", type="submit", cls="btn", style="font-size: 0.8em;"),
+                Span(id="import-result"),
+                hx_post="/myzone/newsletter/import",
+                hx_encoding="multipart/form-data",
+                hx_target="#import-result",
+                action="/myzone/newsletter/import",
+                method="post",
+                enctype="multipart/form-data",
+                style="margin-bottom: 1rem;"
+            ),
             Table(
                 Thead(
                     Tr(
-                        Th("ID", style="text-align: left; padding: 0.5rem; border-bottom: 2px solid #ccc;"),
-                        Th("Email", style="text-align: left; padding: 0.5rem; border-bottom: 2px solid #ccc;"),
-                        Th(f"Joined At ({tz})", style="text-align: left; padding: 0.5rem; border-bottom: 2px solid #ccc;"),
-                        Th("Status", style="text-align: left; padding: 0.5rem; border-bottom: 2px solid #ccc;"),
-                        Th("Action", style="text-align: left; padding: 0.5rem; border-bottom: 2px solid #ccc;"),
+                        Th("", style=HEADER_CELL_STYLE),
+                        Th("ID", style=HEADER_CELL_STYLE),
+                        Th("Email", style=HEADER_CELL_STYLE),
+                        Th(f"Joined At ({tz})", style=HEADER_CELL_STYLE),
+                        Th("Status", style=HEADER_CELL_STYLE),
+                        Th("Action", style=HEADER_CELL_STYLE),
                     )
                 ),
-                Tbody(*rows),
+                Tbody(*rows, id="subscriber-rows"),
                 style="width: 100%; border-collapse: collapse;"
             )
         )
     )
 
+ROWS_MARKER = "<!--subscriber-rows-->"
+
+async def stream_newsletter_page(tz):
+    """
+    Yields the full subscriber table as HTML, one chunk of rows at a time,
+    so memory stays flat and the page head goes out before any row query.
+    """
+    tz, fmt = timestamp_formatter(tz)
+    total = await db.get_count_async()
+    head, tail = to_xml(newsletter_page(tz, [NotStr(ROWS_MARKER)], total)).split(ROWS_MARKER)
+    yield head
+    async for chunk in db.iter_subscribers_async(NEWSLETTER_PAGE_SIZE):
+        joined = fmt.format_all([s['created_at'] for s in chunk])
+        yield "".join(to_xml(subscriber_row(s, j)) for s, j in zip(chunk, joined))
+    yield tail
+
+@app.get("/myzone/newsletter")
+async def newsletter_list(req, session, tz: str = "UTC", after_ts: int = 0, after_id: int = 0, stream: bool = False,
+                          q: str = ""):
+    if not auth.check_auth(session):
+        return RedirectResponse("/login", status_code=303)
+
+    headers, fresh = await admin_validators(req, "newsletter", tz, after_ts, after_id, stream, q,
+                                            NEWSLETTER_PAGE_SIZE)
+    if fresh:
+        return Response(status_code=304, headers=headers)
+    if stream:
+        return StreamingResponse(stream_newsletter_page(tz), media_type="text/html; charset=utf-8",
+                                 headers=headers)
+    render = partial(render_newsletter_page, tz, _after(after_ts, after_id), q)
+    return HTMLResponse(await cached_render(headers["ETag"], render), headers=headers)
+
+async def render_newsletter_page(tz, after, q):
+    tz, fmt = timestamp_formatter(tz)
+    total = await db.get_count_async()
+    if q:
+        # Plain form submit of the search box (no htmx)
+        results = await db.search_subscribers_async(q, NEWSLETTER_SEARCH_LIMIT)
+        return newsletter_page(tz, search_rows(results, q, fmt, NEWSLETTER_SEARCH_LIMIT), total, q)
+    page = await db.get_subscribers_page_async(after, NEWSLETTER_PAGE_SIZE)
+    return newsletter_page(tz, subscriber_rows(page, tz, fmt, NEWSLETTER_PAGE_SIZE), total)
+
+@app.get("/myzone/newsletter/rows")
+async def newsletter_rows(session, tz: str = "UTC", after_ts: int = 0, after_id: int = 0):
+    """Next page of table rows as an htmx fragment"""
+    if not auth.check_auth(session):
+        return Response(status_code=403)
+
+    tz, fmt = timestamp_formatter(tz)
+    page = await db.get_subscribers_page_async(_after(after_ts, after_id), NEWSLETTER_PAGE_SIZE)
+    return tuple(subscriber_rows(page, tz, fmt, NEWSLETTER_PAGE_SIZE))
+
+@app.get("/myzone/newsletter/search")
+async def newsletter_search(session, q: str = "", tz: str = "UTC"):
+    """Rows matching `q` as an htmx fragment; an empty box restores the first page"""
+    if not auth.check_auth(session):
+        return Response(status_code=403)
+
+    tz, fmt = timestamp_formatter(tz)
+    if not q.strip():
+        page = await db.get_subscribers_page_async(None, NEWSLETTER_PAGE_SIZE)
+        return tuple(subscriber_rows(page, tz, fmt, NEWSLETTER_PAGE_SIZE))
+    results = await db.search_subscribers_async(q, NEWSLETTER_SEARCH_LIMIT)
+    return tuple(search_rows(results, q, fmt, NEWSLETTER_SEARCH_LIMIT))
+
+@app.get("/myzone/newsletter/export")
+async def newsletter_export(session, format: str = "csv"):
+    """Streams every subscriber as CSV or NDJSON"""
+    if not auth.check_auth(session):
+        return Response(status_code=403)
+    if format not in transfer.MEDIA_TYPES:
+        return Response(f"Unknown format: {format}", status_code=400)
+
+    return StreamingResponse(
+        transfer.export_async(format),
+        media_type=transfer.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="subscribers.{format}"'},
+    )
+
+@app.post("/myzone/newsletter/import")
+async def newsletter_import(session, file: UploadFile):
+    """Bulk-imports an uploaded CSV, NDJSON or one-per-line address list"""
+    if not auth.check_auth(session):
+        return Response(status_code=403)
+
+    result = await db.run(transfer.import_file, file.file, transfer.detect_format(file.filename))
+    return Span(
+        f"Imported {result.inserted}, skipped {result.skipped} existing, {result.invalid} invalid.",
+        style="font-size: 0.8em; margin-left: 0.5rem;"
+    )
+
 @app.post("/myzone/newsletter/delete/{id}")
-def delete_subscriber(id: int, session):
+async def delete_subscriber(id: int, session, htmx: HtmxHeaders):
     if not auth.check_auth(session):
         return Response(status_code=403)
         
-    db.delete_subscriber(id)
+    await db.delete_subscriber_async(id)
+    if htmx.request:
+        # The empty body replaces the row; the total is updated out of band
+        return total_line(await db.get_count_async(), oob=True)
     # Redirect back to the list to refresh the page
     return RedirectResponse("/myzone/newsletter", status_code=303)
 
+@app.post("/myzone/newsletter/delete")
+async def delete_subscribers(session, htmx: HtmxHeaders, ids: list[int] = None):  # noqa: RUF013 - FastHTML can't parse list[int] | None
+    """Deletes every selected subscriber in one transaction"""
+    if not auth.check_auth(session):
+        return Response(status_code=403)
+
+    deleted = await db.delete_subscribers_async(ids or [])
+    if htmx.request:
+        return (
+            Span(f"Deleted {deleted}.", style="font-size: 0.8em; margin-left: 0.5rem;"),
+            total_line(await db.get_count_async(), oob=True)
+        )
+    return RedirectResponse("/myzone/newsletter", status_code=303)
+
+
+def broadcast_state(b):
+    """What the dashboard calls a broadcast's state; a 'sending' row nobody is heartbeating was interrupted"""
+    if b['status'] == 'sending' and b['heartbeat_at'] < timestamps.now() - broadcaster.stale_after:
+        return "interrupted"
+    return b['status']
+
+def broadcast_progress(b, failures=()):
+    """
+    Live counters for one broadcast. While it's sending, the panel polls for
+    a fresh copy of itself every second; once it stops, the last copy has
+    no trigger and polling ends.
+    """
+    state = broadcast_state(b)
+    done = b['sent'] + b['failed']
+    # Rate of the current run (or the last, once done); resumed runs don't
+    # count what earlier runs sent
+    end = {"sending": timestamps.now(), "done": b['finished_at']}.get(state)
+    throughput = (
+        f"{(done - b['run_start_count']) / max(1, end - b['started_at']):.1f}" if end and b['started_at'] else "–"
+    )
+    if state == "sending":
+        action = Button("Pause", hx_post=f"/myzone/broadcasts/{b['id']}/pause",
+                        hx_target="#broadcast-progress", hx_swap="outerHTML", cls="btn", style=TOOL_BTN_STYLE)
+    elif state in ("draft", "paused", "interrupted"):
+        action = Button("Resume" if state != "draft" else "Start", hx_post=f"/myzone/broadcasts/{b['id']}/start",
+                        hx_target="#broadcast-progress", hx_swap="outerHTML", cls="btn", style=TOOL_BTN_STYLE)
+    else:
+        action = ""
+    return Div(
+        P(f"Status: {state}", style="font-weight: bold;"),
+        Progress(value=done, max=max(b['recipients'], 1), style="width: 100%;"),
+        stat("Sent", b['sent']),
+        stat("Failed", b['failed']),
+        stat("Remaining", max(b['recipients'] - done, 0)),
+        stat("Messages/s", throughput),
+        action,
+        *([H3("Recent failures"),
+           Ul(*[Li(f"{f['email']}: {f['error']}") for f in failures], style="font-size: 0.8em;")]
+          if failures else []),
+        id="broadcast-progress",
+        hx_get=f"/myzone/broadcasts/{b['id']}/progress" if state == "sending" else None,
+        hx_trigger="every 1s" if state == "sending" else None,
+        hx_swap="outerHTML",
+        style="padding: 2rem; background: #f9f9f9; border-radius: 8px;"
+    )
+
+@app.get("/myzone/broadcasts")
+async def broadcasts_page(session):
+    if not auth.check_auth(session):
+        return RedirectResponse("/login", status_code=303)
+
+    totals = await db.get_status_totals_async()
+    rows = [
+        Tr(
+            Td(b['id'], style=CELL_STYLE),
+            Td(A(b['subject'], href=f"/myzone/broadcasts/{b['id']}"), style=CELL_STYLE),
+            Td(broadcast_state(b), style=CELL_STYLE),
+            Td(f"{b['sent']} sent, {b['failed']} failed of {b['recipients']}", style=CELL_STYLE),
+        )
+        for b in await db.get_broadcasts_async()
+    ]
+    return create_layout(
+        "Newsletter Broadcasts",
+        Header(
+            H1("Send a Newsletter"),
+            Div(A("← Back to Dashboard", href="/myzone", cls="btn", style="font-size: 0.9em;"),
+                style="margin-top: 1rem;")
+        ),
+        Section(
+            Form(
+                Input(type="text", name="subject", placeholder="Subject", required=True, style="width: 100%;"),
+                Textarea(name="body", placeholder="Plain-text body", required=True, rows=12,
+                         style="width: 100%; margin-top: 0.5rem;"),
+                Button(f"Send to {totals.get('active', 0)} active subscribers", type="submit", cls="btn",
+                       style="margin-top: 0.5rem;"),
+                action="/myzone/broadcasts",
+                method="post",
+                onsubmit="return confirm('Send this issue to every active subscriber?')",
+                style="margin-bottom: 2rem;"
+            ),
+            Table(
+                Thead(Tr(*[Th(h, style=HEADER_CELL_STYLE) for h in ("ID", "Subject", "State", "Progress")])),
+                Tbody(*rows),
+                style="width: 100%; border-collapse: collapse;"
+            )
+        )
+    )
+
+@app.post("/myzone/broadcasts")
+async def create_broadcast(session, subject: str, body: str):
+    if not auth.check_auth(session):
+        return Response(status_code=403)
+
+    id = await db.create_broadcast_async(subject.strip(), body)
+    await db.run(broadcaster.start, id)
+    return RedirectResponse(f"/myzone/broadcasts/{id}", status_code=303)
+
+@app.get("/myzone/broadcasts/{id}")
+async def broadcast_page(session, id: int):
+    if not auth.check_auth(session):
+        return RedirectResponse("/login", status_code=303)
+
+    b = await db.get_broadcast_async(id)
+    if b is None:
+        raise HTTPException(404)
+    return create_layout(
+        b['subject'],
+        Header(
+            H1(b['subject']),
+            Div(A("← All broadcasts", href="/myzone/broadcasts", cls="btn", style="font-size: 0.9em;"),
+                style="margin-top: 1rem;")
+        ),
+        Section(
+            broadcast_progress(b, await db.get_broadcast_failures_async(id)),
+            H2("Message"),
+            Pre(b['body'], style="white-space: pre-wrap;")
+        )
+    )
+
+@app.get("/myzone/broadcasts/{id}/progress")
+async def broadcast_progress_panel(session, id: int):
+    if not auth.check_auth(session):
+        return Response(status_code=403)
+
+    b = await db.get_broadcast_async(id)
+    if b is None:
+        raise HTTPException(404)
+    return broadcast_progress(b, await db.get_broadcast_failures_async(id))
+
+@app.post("/myzone/broadcasts/{id}/start")
+async def start_broadcast(session, id: int):
+    """Starts a draft, or resumes a paused or interrupted broadcast where it stopped"""
+    if not auth.check_auth(session):
+        return Response(status_code=403)
+
+    await db.run(broadcaster.start, id)
+    return await broadcast_progress_panel(session, id)
+
+@app.post("/myzone/broadcasts/{id}/pause")
+async def pause_broadcast(session, id: int):
+    if not auth.check_auth(session):
+        return Response(status_code=403)
+
+    # The run notices at its next heartbeat, whichever worker it's in
+    await db.pause_broadcast_async(id)
+    return await broadcast_progress_panel(session, id)
+
+
+@app.post("/myzone/maintenance/backup")
+async def backup_database(session, htmx: HtmxHeaders):
+    """Takes an online snapshot of the database and reports how long it took"""
+    if not auth.check_auth(session):
+        return Response(status_code=403)
+
+    loop = asyncio.get_running_loop()
+    try:
+        # Off the DB executor: a long copy shouldn't hold a request slot
+        result = await loop.run_in_executor(None, maintenance.backup)
+    except maintenance.BackupInProgress as e:
+        return Span(str(e)) if htmx.request else JSONResponse({"error": str(e)}, status_code=409)
+    if htmx.request:
+        return Span(f"Saved {os.path.basename(result.path)} ({result.bytes / 1e6:.1f} MB) in {result.seconds:.2f}s.")
+    return {
+        "path": result.path,
+        "bytes": result.bytes,
+        "pages": result.pages,
+        "steps": result.steps,
+        "restarts": result.restarts,
+        "seconds": round(result.seconds, 3),
+    }
+
+
+def not_found_page():
+    """Custom 404 page"""
+    return create_layout(
+        "404 - Page Not Found",
+        Header(
+            H1("404 - Page Not Found")
+        ),
+        Section(
+            P("Sorry, the page you're looking for doesn't exist."),
+            P(A("← Back to Home", href="/"))
+        )
+    )
+
 
 # Custom 404 handler
 @app.exception_handler(404)
 def not_found(request, exc):
     """Custom 404 page"""
-    """Custom 404 page"""
-    return HTMLResponse(
-        to_xml(
-            create_layout(
-                "404 - Page Not Found",
-                Header(
-                    H1("404 - Page Not Found")
-                ),
-                Section(
-                    P("Sorry, the page you're looking for doesn't exist."),
-                    P(A("← Back to Home", href="/"))
-                )
-            )
-        ),
-        status_code=404
-    )
+    return page_cache.get("404").response(request)
+
+
+# Too many queued DB calls: shed load instead of piling up requests
+@app.exception_handler(db.DatabaseBusy)
+def database_busy(request, exc):
+    return Response("Server busy, please try again shortly.", status_code=503, headers={"Retry-After": "1"})
+
+
+page_cache.register("home", home_page)
+page_cache.register("about", about_page)
+page_cache.register("404", not_found_page, status_code=404)
 
 
 if __name__ == "__main__":
-    # Use uvicorn for production-ready server
-    import uvicorn
-    
-    print(f"🚀 Starting FastHTML server on {HOST}:{PORT}")
-    print(f"🔧 Debug mode: {DEBUG}")
-    
-    uvicorn.run(
-        "website.app:app",
-        host=HOST,
-        port=PORT,
-        reload=DEBUG,
-        log_level="info" if not DEBUG else "debug"
-    )
\ No newline at end of file
+    # The launcher reads .env and then imports website.app afresh (this copy
+    # runs as __main__), so the settings still pick it up
+    from website.serve import main
+    main()
\ No newline at end of file
@@ -0,0 +1,76 @@
+'''Content-hashed static assets (CSS, JS) served with immutable caching'''
+
+import base64
+import hashlib
+from functools import cached_property
+from pathlib import Path
+
+from website.cache import RenderedPage
+
+STATIC_DIR = Path(__file__).parent / "static"
+# Hashed URLs never change content, so browsers may keep them for a year
+# without revalidating
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+MEDIA_TYPES = {
+    ".css": "text/css; charset=utf-8",
+    ".js": "text/javascript; charset=utf-8",
+}
+
+
+class Asset:
+    """
+    One static file. Its URL embeds a hash of the content, so a deploy that
+    changes the file changes the URL. Compression happens on the first
+    request for it.
+    """
+
+    def __init__(self, name: str, content: str | bytes, prefix: str = "/static"):
+        self.name = name
+        self.content = content.encode() if isinstance(content, str) else content
+        self.prefix = prefix
+
+    @cached_property
+    def filename(self) -> str:
+        stem, dot, ext = self.name.rpartition(".")
+        digest = hashlib.sha256(self.content).hexdigest()[:12]
+        return f"{stem}.{digest}.{ext}" if dot else f"{self.name}.{digest}"
+
+    @property
+    def url(self) -> str:
+        return f"{self.prefix}/{self.filename}"
+
+    @cached_property
+    def integrity(self) -> str:
+        """Subresource Integrity value for <script>/<link> tags"""
+        return "sha384-" + base64.b64encode(hashlib.sha384(self.content).digest()).decode()
+
+    @cached_property
+    def page(self) -> RenderedPage:
+        media_type = MEDIA_TYPES.get(Path(self.name).suffix, "application/octet-stream")
+        return RenderedPage.build(self.content, media_type=media_type, cache_control=IMMUTABLE)
+
+
+class AssetRegistry:
+    """Named assets, looked up by hashed filename when serving"""
+
+    def __init__(self, prefix: str = "/static"):
+        self.prefix = prefix
+        self._assets: dict[str, Asset] = {}
+
+    def add(self, name: str, content: str | bytes) -> Asset:
+        asset = self._assets[name] = Asset(name, content, self.prefix)
+        return asset
+
+    def add_file(self, path: str | Path, name: str | None = None) -> Asset:
+        path = Path(path)
+        return self.add(name or path.name, path.read_bytes())
+
+    def find(self, filename: str) -> Asset | None:
+        for asset in self._assets.values():
+            if asset.filename == filename:
+                return asset
+        return None
+
+    def __iter__(self):
+        return iter(self._assets.values())
@@ -1,18 +1,41 @@
 import os
 import httpx
-from fasthtml.common import *
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
+from fasthtml.common import A, Body, Div, H1, Head, Html, Meta, P, RedirectResponse, Style, Title, Titled
+from website import metrics
 
 # GitHub OAuth Configuration
 GITHUB_CLIENT_ID = os.getenv("GITHUB_CLIENT_ID")
 GITHUB_CLIENT_SECRET = os.getenv("GITHUB_CLIENT_SECRET")
 ALLOWED_USER = "prabhanshu11"  # Restrict access to this GitHub user
 
+# Base URLs, overridable so the flow can run against a local stub server
+# (see tests/github_stub.py)
+GITHUB_OAUTH_URL = os.getenv("GITHUB_OAUTH_URL", "https://github.com/login/oauth")
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+GITHUB_CONNECT_TIMEOUT = float(os.getenv("GITHUB_CONNECT_TIMEOUT", "5"))
+GITHUB_READ_TIMEOUT = float(os.getenv("GITHUB_READ_TIMEOUT", "10"))
+
+# One pooled client for the app's lifetime, so logins reuse keep-alive
+# connections instead of paying a TLS handshake per request
+_client: httpx.AsyncClient | None = None
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(GITHUB_READ_TIMEOUT, connect=GITHUB_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=60),
+        )
+    return _client
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
 def get_github_auth_url():
-    return f"https://github.com/login/oauth/authorize?client_id={GITHUB_CLIENT_ID}&scope=read:user"
+    return f"{GITHUB_OAUTH_URL}/authorize?client_id={GITHUB_CLIENT_ID}&scope=read:user"
 
 def login_page():
     return Html(
@@ -47,17 +70,19 @@ async def github_callback(code: str, req, session):
     if not code:
         return Titled("Error", P("No code provided."))
     
-    async with httpx.AsyncClient() as client:
+    client = get_client()
+    try:
         # Exchange code for access token
-        token_resp = await client.post(
-            "https://github.com/login/oauth/access_token",
-            headers={"Accept": "application/json"},
-            data={
-                "client_id": GITHUB_CLIENT_ID,
-                "client_secret": GITHUB_CLIENT_SECRET,
-                "code": code,
-            },
-        )
+        with metrics.timer("github_request_duration_seconds", "access_token"):
+            token_resp = await client.post(
+                f"{GITHUB_OAUTH_URL}/access_token",
+                headers={"Accept": "application/json"},
+                data={
+                    "client_id": GITHUB_CLIENT_ID,
+                    "client_secret": GITHUB_CLIENT_SECRET,
+                    "code": code,
+                },
+            )
         token_data = token_resp.json()
         access_token = token_data.get("access_token")
         
@@ -65,22 +90,25 @@ async def github_callback(code: str, req, session):
             return Titled("Error", P("Failed to get access token."))
         
         # Get user info
-        user_resp = await client.get(
-            "https://api.github.com/user",
-            headers={
-                "Authorization": f"Bearer {access_token}",
-                "Accept": "application/json",
-            },
-        )
+        with metrics.timer("github_request_duration_seconds", "user"):
+            user_resp = await client.get(
+                f"{GITHUB_API_URL}/user",
+                headers={
+                    "Authorization": f"Bearer {access_token}",
+                    "Accept": "application/json",
+                },
+            )
         user_data = user_resp.json()
         username = user_data.get("login")
-        
-        if username != ALLOWED_USER:
-            return Titled("Unauthorized", P(f"User '{username}' is not allowed to access this area."))
-        
-        # Set session
-        session["user"] = username
-        return RedirectResponse("/myzone", status_code=303)
+    except (httpx.HTTPError, ValueError):
+        return Titled("Error", P("Could not reach GitHub. Please try again."))
+
+    if username != ALLOWED_USER:
+        return Titled("Unauthorized", P(f"User '{username}' is not allowed to access this area."))
+
+    # Set session
+    session["user"] = username
+    return RedirectResponse("/myzone", status_code=303)
 
 def logout(session):
     session.clear()
@@ -0,0 +1,216 @@
+'''Sending a newsletter issue to every active subscriber'''
+
+import logging
+import queue
+import smtplib
+import threading
+import time
+import traceback
+
+from website import db, mailer
+
+log = logging.getLogger(__name__)
+
+
+class RatePacer:
+    """Spaces calls at least 1/rate seconds apart across all threads; rate 0 means unpaced"""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self, stop: threading.Event) -> bool:
+        """Blocks until the next slot. Returns False if `stop` was set meanwhile."""
+        if not self.interval:
+            return not stop.is_set()
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        return not stop.wait(slot - now) if slot > now else not stop.is_set()
+
+
+class Broadcaster:
+    """
+    Sends broadcasts. Each run streams the recipients still owed (in id
+    order, from db.iter_broadcast_recipients) into a short queue drained by
+    `concurrency` threads. Each thread keeps one SMTP session open for the
+    whole run, reconnecting if the relay drops it, and all of them share a
+    pacer capping the run at `rate` messages per second.
+
+    Every attempt is recorded before the next one starts, so a run that is
+    paused, shut down or killed resumes with exactly the recipients it
+    hadn't reached. The run refreshes the broadcast's heartbeat every
+    `heartbeat` seconds and stops as soon as it finds the broadcast paused;
+    a heartbeat older than `stale_after` marks a dead run that may be
+    resumed elsewhere.
+
+    `connect()` returns a new smtplib.SMTP-like session; it's mailer.connect
+    in production.
+    """
+
+    def __init__(self, connect=mailer.connect, concurrency: int = 4, rate: float = 0,
+                 heartbeat: float = 1.0, stale_after: int = 30):
+        self.connect = connect
+        self.concurrency = max(1, concurrency)
+        self.rate = rate
+        self.heartbeat = heartbeat
+        self.stale_after = stale_after
+        self._runs: dict[int, tuple[threading.Thread, threading.Event]] = {}
+        self._lock = threading.Lock()
+
+    def start(self, broadcast_id: int) -> bool:
+        """Starts or resumes a broadcast in the background. False if it can't be claimed."""
+        with self._lock:
+            if self.running(broadcast_id):
+                return False
+            broadcast = db.claim_broadcast(broadcast_id, self.stale_after)
+            if broadcast is None:
+                return False
+            stop = threading.Event()
+            thread = threading.Thread(target=self._run, args=(broadcast, stop),
+                                      name=f"broadcast-{broadcast_id}", daemon=True)
+            self._runs[broadcast_id] = (thread, stop)
+            thread.start()
+            return True
+
+    def resume_interrupted(self) -> list[int]:
+        """Restarts broadcasts whose run died or was shut down. Returns the ids started."""
+        return [id for id in db.get_interrupted_broadcasts(self.stale_after) if self.start(id)]
+
+    def running(self, broadcast_id: int) -> bool:
+        run = self._runs.get(broadcast_id)
+        return run is not None and run[0].is_alive()
+
+    def join(self, broadcast_id: int, timeout: float | None = None):
+        run = self._runs.get(broadcast_id)
+        if run is not None:
+            run[0].join(timeout)
+
+    def stop(self, timeout: float | None = 30):
+        """
+        Stops every run after its in-flight messages, leaving the broadcasts
+        'sending' but unclaimed so the next process start picks them up.
+        """
+        runs = list(self._runs.values())
+        for _, stop in runs:
+            stop.set()
+        for thread, _ in runs:
+            thread.join(timeout)
+
+    def _run(self, broadcast, stop):
+        id = broadcast["id"]
+        template = mailer.BroadcastTemplate(broadcast["subject"], broadcast["body"])
+        pacer = RatePacer(self.rate)
+        jobs = queue.Queue(maxsize=self.concurrency * 4)
+        senders = [
+            threading.Thread(target=self._send_loop, args=(id, template, pacer, jobs, stop),
+                             name=f"broadcast-{id}-{i}", daemon=True)
+            for i in range(self.concurrency)
+        ]
+        for sender in senders:
+            sender.start()
+
+        completed = False
+        last_beat = time.monotonic()
+        try:
+            for recipient in db.iter_broadcast_recipients(id):
+                while not stop.is_set():
+                    try:
+                        jobs.put(recipient, timeout=self.heartbeat)
+                        break
+                    except queue.Full:
+                        pass
+                    finally:
+                        if time.monotonic() - last_beat >= self.heartbeat:
+                            last_beat = time.monotonic()
+                            if not db.heartbeat_broadcast(id):
+                                stop.set()  # paused from the dashboard
+                if stop.is_set():
+                    break
+            else:
+                completed = True
+        except Exception:
+            log.exception("broadcast %s stopped", id)
+            stop.set()
+        finally:
+            for _ in senders:
+                jobs.put(None)
+            while any(sender.is_alive() for sender in senders):
+                for sender in senders:
+                    sender.join(self.heartbeat)
+                if not stop.is_set() and not db.heartbeat_broadcast(id):
+                    stop.set()
+
+        if completed and not stop.is_set():
+            db.finish_broadcast(id)
+            log.info("broadcast %s finished", id)
+        else:
+            # Paused rows stay paused; anything else becomes resumable now
+            db.release_broadcast(id)
+
+    def _send_loop(self, broadcast_id, template, pacer, jobs, stop):
+        smtp = None
+        try:
+            while (recipient := jobs.get()) is not None:
+                if stop.is_set() or not pacer.wait(stop):
+                    continue  # leave the rest unrecorded for the resumed run
+                subscriber_id, email = recipient
+                try:
+                    smtp, error = self._deliver(smtp, template, email)
+                except Exception:
+                    # Relay down or misconfigured: stop, leaving this and the
+                    # remaining recipients for a resumed run
+                    log.exception("broadcast %s: can't reach the mail relay", broadcast_id)
+                    smtp = None
+                    stop.set()
+                    continue
+                try:
+                    db.record_delivery(broadcast_id, subscriber_id, error)
+                except Exception:
+                    # Without a record we can't promise no duplicates; stop
+                    # the run (keep draining the queue) and let it resume
+                    log.exception("broadcast %s: couldn't record delivery", broadcast_id)
+                    stop.set()
+        finally:
+            if smtp is not None:
+                try:
+                    smtp.quit()
+                except (smtplib.SMTPException, OSError):
+                    smtp.close()
+
+    def _deliver(self, smtp, template, email):
+        """
+        Sends one message, reconnecting once if the session is gone.
+        Returns (session, error); error is set when the relay refused this
+        message. Raises if the relay can't be reached at all, which is no
+        fault of the recipient's.
+        """
+        data = template.render(email)
+        for attempt in (1, 2):
+            if smtp is None:
+                smtp = self.connect()
+            try:
+                smtp.sendmail(template.sender, [email], data)
+                return smtp, None
+            except (smtplib.SMTPException, OSError) as e:
+                if not _session_lost(e):
+                    # Refused recipient or message: the session is still usable
+                    return smtp, _describe(e)
+                # The relay closed an idle or overused session; retry on a new one
+                smtp.close()
+                smtp = None
+                if attempt == 2:
+                    raise
+
+
+def _session_lost(e: BaseException) -> bool:
+    if isinstance(e, (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)):
+        return True
+    # 421: the server is closing the session (e.g. too many messages on it)
+    return isinstance(e, smtplib.SMTPResponseException) and e.smtp_code == 421
+
+
+def _describe(e: BaseException) -> str:
+    return "".join(traceback.format_exception_only(e)).strip()
@@ -0,0 +1,171 @@
+'''Pre-rendered, precompressed response caches for static and admin pages'''
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from fasthtml.common import Response, to_xml
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+
+def accepted_encodings(header: str) -> set[str]:
+    """Parse an Accept-Encoding header into the set of codings with q > 0"""
+    codings = set()
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name and q > 0:
+            codings.add(name.strip().lower())
+    return codings
+
+
+def etag_matches(if_none_match: str, etags) -> bool:
+    """True if an If-None-Match header matches any of the given ETags"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return any(etag.removeprefix("W/") in candidates for etag in etags)
+
+
+@dataclass(frozen=True)
+class RenderedPage:
+    """A serialized page plus its compressed variants and strong ETags"""
+    body: bytes
+    gzip: bytes
+    br: bytes | None
+    etag: str
+    status_code: int = 200
+    media_type: str = "text/html; charset=utf-8"
+    cache_control: str = "public, no-cache"
+
+    @classmethod
+    def build(cls, content, status_code: int = 200, **kw) -> "RenderedPage":
+        """Serialize an FT tree (or str/bytes) once and precompress it"""
+        if isinstance(content, bytes):
+            body = content
+        elif isinstance(content, str):
+            body = content.encode()
+        else:
+            body = to_xml(content).encode()
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        return cls(
+            body=body,
+            # mtime=0 keeps the gzip bytes (and so the ETag) reproducible
+            gzip=gzip.compress(body, compresslevel=9, mtime=0),
+            br=brotli.compress(body, quality=11) if brotli else None,
+            etag=f'"{digest}"',
+            status_code=status_code,
+            **kw,
+        )
+
+    def variant_etag(self, coding: str | None) -> str:
+        # Each representation gets its own strong validator
+        return self.etag if coding is None else f'{self.etag[:-1]}-{coding}"'
+
+    def negotiate(self, accept_encoding: str) -> tuple[str | None, bytes]:
+        """Pick the smallest representation the client accepts"""
+        codings = accepted_encodings(accept_encoding)
+        if self.br is not None and "br" in codings:
+            return "br", self.br
+        if "gzip" in codings:
+            return "gzip", self.gzip
+        return None, self.body
+
+    def response(self, req) -> Response:
+        """Build a response for `req`, honoring Accept-Encoding and If-None-Match"""
+        coding, payload = self.negotiate(req.headers.get("accept-encoding", ""))
+        headers = {
+            "ETag": self.variant_etag(coding),
+            "Cache-Control": self.cache_control,
+            "Vary": "Accept-Encoding",
+        }
+        all_etags = [self.variant_etag(c) for c in (None, "gzip", "br")]
+        if self.status_code == 200 and etag_matches(req.headers.get("if-none-match", ""), all_etags):
+            return Response(status_code=304, headers=headers)
+        if coding:
+            headers["Content-Encoding"] = coding
+        return Response(payload, status_code=self.status_code, media_type=self.media_type, headers=headers)
+
+
+class PageCache:
+    """Builds each page once, on first use or when warmed, and keeps it in memory"""
+
+    def __init__(self):
+        self._renderers = {}
+        self._pages: dict[str, RenderedPage] = {}
+
+    def register(self, name: str, render, status_code: int = 200):
+        """Register a zero-argument function that returns the page's FT tree"""
+        self._renderers[name] = (render, status_code)
+        self._pages.pop(name, None)
+
+    def get(self, name: str) -> RenderedPage:
+        page = self._pages.get(name)
+        if page is None:
+            render, status_code = self._renderers[name]
+            # Rendering is deterministic, so a concurrent double build is harmless
+            page = self._pages[name] = RenderedPage.build(render(), status_code=status_code)
+        return page
+
+    def warm(self):
+        """Render every registered page now rather than on first request"""
+        for name in self._renderers:
+            self.get(name)
+
+    def clear(self):
+        self._pages.clear()
+
+    def __contains__(self, name):
+        return name in self._pages
+
+
+class RenderCache:
+    """
+    A small LRU of rendered pages whose content is fully determined by
+    their key. Keys embed the data version they were rendered from, so an
+    entry never needs invalidating: after a write, requests look up a new
+    key and the old entries age out.
+    """
+
+    def __init__(self, maxsize: int = 32):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: str):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
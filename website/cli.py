@@ -0,0 +1,152 @@
+'''Command line tools for managing the site
+
+Usage:
+    python -m website.cli export [--format csv|ndjson] [-o FILE]
+    python -m website.cli import FILE [--format csv|ndjson|txt] [--batch-size N]
+    python -m website.cli importtime [--module website.app] [--top N] [--budget-ms MS]
+    python -m website.cli backup [--dir DIR] [--keep N] [--pages-per-step N]
+    python -m website.cli checkpoint [--mode passive|truncate]
+    python -m website.cli export-site DIR
+'''
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+from contextlib import nullcontext
+
+from dotenv import load_dotenv
+
+
+def cmd_export(args):
+    from website import transfer
+    with open(args.output, "w", newline="") if args.output else nullcontext(sys.stdout) as out:
+        for chunk in transfer.export(args.format):
+            out.write(chunk)
+
+def cmd_import(args):
+    from website import transfer
+    fmt = args.format or transfer.detect_format(args.file)
+    start = time.perf_counter()
+    with open(args.file, "rb") as f:
+        result = transfer.import_file(f, fmt, args.batch_size or transfer.IMPORT_BATCH_SIZE)
+    elapsed = time.perf_counter() - start
+    print(f"inserted={result.inserted} skipped={result.skipped} invalid={result.invalid} "
+          f"in {elapsed:.2f}s")
+
+
+def cmd_backup(args):
+    from website import maintenance
+    try:
+        result = maintenance.backup(args.dir or maintenance.BACKUP_DIR, args.keep, args.pages_per_step)
+    except maintenance.BackupInProgress as e:
+        raise SystemExit(str(e))
+    print(f"{result.path}: {result.bytes / 1e6:.1f} MB, {result.pages} pages in {result.steps} steps "
+          f"({result.restarts} restarts) in {result.seconds:.2f}s")
+
+def cmd_checkpoint(args):
+    from website import db, maintenance
+    before = maintenance.wal_size()
+    conn = db.connect()
+    try:
+        result = maintenance.checkpoint(conn, args.mode)
+    finally:
+        conn.conn.close()
+    print(f"{result.mode}: {result.checkpointed}/{result.wal_frames} frames{' (busy)' if result.busy else ''}, "
+          f"WAL {before / 1e6:.1f} -> {maintenance.wal_size() / 1e6:.1f} MB in {result.seconds * 1000:.0f} ms")
+
+def cmd_export_site(args):
+    from website import sitegen
+    start = time.perf_counter()
+    written = sitegen.export_site(args.dir)
+    size = sum(path.stat().st_size for path in written)
+    print(f"wrote {len(written)} files ({size / 1000:.0f} kB) to {args.dir} "
+          f"in {time.perf_counter() - start:.2f}s")
+
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int, int]]:
+    """(module, self us, cumulative us, depth) for each line of -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        m = IMPORTTIME_LINE.match(line)
+        if m:
+            rows.append((m[4], int(m[1]), int(m[2]), len(m[3]) // 2))
+    return rows
+
+def measure_import(module: str) -> tuple[float, list]:
+    """
+    Imports `module` in a fresh interpreter with -X importtime and returns
+    (wall seconds, parsed rows). The child's DB_PATH can't be created, so
+    a module that opens the database at import fails here loudly.
+    """
+    env = dict(os.environ, DB_PATH=os.path.join(os.devnull, "unused.db"))
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, env=env, check=False)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise SystemExit(proc.stderr.strip().splitlines()[-1])
+    return elapsed, parse_importtime(proc.stderr)
+
+def cmd_importtime(args):
+    elapsed, rows = measure_import(args.module)
+    total_us = next((cum for name, _, cum, depth in rows if name == args.module and depth == 0), 0)
+    print(f"{'self ms':>9} {'cumul ms':>9}  module")
+    for name, self_us, cum_us, depth in sorted(rows, key=lambda r: r[2], reverse=True)[:args.top]:
+        print(f"{self_us / 1000:9.1f} {cum_us / 1000:9.1f}  {'  ' * depth}{name}")
+    print(f"import {args.module}: {total_us / 1000:.1f} ms (interpreter wall time {elapsed * 1000:.0f} ms)")
+    if args.budget_ms is not None and elapsed * 1000 > args.budget_ms:
+        print(f"over budget: {elapsed * 1000:.0f} ms > {args.budget_ms} ms")
+        sys.exit(1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m website.cli", description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("export", help="Write all subscribers as CSV or NDJSON")
+    p.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+    p.add_argument("-o", "--output", help="Output file (default: stdout)")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("import", help="Bulk import subscriber addresses")
+    p.add_argument("file")
+    p.add_argument("--format", choices=["csv", "ndjson", "txt"],
+                   help="Input format (default: from the file extension)")
+    # None means IMPORT_BATCH_SIZE, like the HTTP import; transfer isn't
+    # imported until a command needs it
+    p.add_argument("--batch-size", type=int, default=None,
+                   help="Rows per transaction (default: IMPORT_BATCH_SIZE, 5000)")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("importtime", help="Profile cold import time (python -X importtime)")
+    p.add_argument("--module", default="website.app")
+    p.add_argument("--top", type=int, default=25, help="Show the N slowest imports by cumulative time")
+    p.add_argument("--budget-ms", type=float, help="Exit non-zero if the cold start takes longer")
+    p.set_defaults(func=cmd_importtime)
+
+    p = sub.add_parser("backup", help="Snapshot the database online and prune old snapshots")
+    p.add_argument("--dir", help="Backup directory (default: BACKUP_DIR)")
+    p.add_argument("--keep", type=int, default=int(os.getenv("BACKUP_KEEP", "7")), help="Snapshots to keep")
+    p.add_argument("--pages-per-step", type=int, default=int(os.getenv("BACKUP_PAGES_PER_STEP", "256")))
+    p.set_defaults(func=cmd_backup)
+
+    p = sub.add_parser("checkpoint", help="Checkpoint the WAL into the database file")
+    p.add_argument("--mode", choices=["passive", "full", "restart", "truncate"], default="passive")
+    p.set_defaults(func=cmd_checkpoint)
+
+    p = sub.add_parser("export-site", help="Render the public pages and assets for nginx to serve")
+    p.add_argument("dir", help="Output directory, nginx's root")
+    p.set_defaults(func=cmd_export_site)
+
+    args = parser.parse_args(argv)
+    load_dotenv(".env")
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+'''ASGI response compression (zstd, brotli, gzip) with per-type levels'''
+
+import time
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from website.cache import accepted_encodings
+from website.metrics import REGISTRY
+
+try:
+    import brotli
+except ImportError:  # optional, like in website.cache
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Compression level per coding for each media type worth compressing.
+# Anything not listed (images, archives, already-compressed downloads)
+# passes through untouched. Exports are large and generated on the fly, so
+# they get cheaper levels than pages.
+DEFAULT_LEVELS = {
+    "text/html": {"zstd": 6, "br": 5, "gzip": 6},
+    "text/css": {"zstd": 9, "br": 9, "gzip": 9},
+    "text/javascript": {"zstd": 9, "br": 9, "gzip": 9},
+    "application/json": {"zstd": 3, "br": 4, "gzip": 6},
+    "text/plain": {"zstd": 3, "br": 4, "gzip": 6},
+    "text/csv": {"zstd": 3, "br": 4, "gzip": 5},
+    "application/x-ndjson": {"zstd": 3, "br": 4, "gzip": 5},
+}
+
+# Server preference when a client accepts several codings
+CODINGS = tuple(c for c, lib in (("zstd", zstandard), ("br", brotli), ("gzip", zlib)) if lib)
+
+
+class _Gzip:
+    def __init__(self, level):
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data, finish):
+        return self._z.compress(data) + self._z.flush(zlib.Z_FINISH if finish else zlib.Z_SYNC_FLUSH)
+
+class _Brotli:
+    def __init__(self, level):
+        self._c = brotli.Compressor(quality=level)
+
+    def compress(self, data, finish):
+        return self._c.process(data) + (self._c.finish() if finish else self._c.flush())
+
+class _Zstd:
+    def __init__(self, level):
+        self._c = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data, finish):
+        flush = zstandard.COMPRESSOBJ_FLUSH_FINISH if finish else zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        return self._c.compress(data) + self._c.flush(flush)
+
+ENCODERS = {"gzip": _Gzip, "br": _Brotli, "zstd": _Zstd}
+
+
+class CompressionMiddleware:
+    """
+    Compresses response bodies in the best coding the client accepts.
+
+    A response is left alone if it already has a Content-Encoding (the
+    pre-compressed page cache and static assets), if its media type isn't in
+    `levels`, or if it's a single body shorter than `minimum_size`. Streamed
+    responses are compressed chunk by chunk and flushed after each one, so
+    the client still sees rows as they're produced.
+
+    Bytes in/out and the CPU time spent per response are recorded in the
+    metrics registry, per coding.
+    """
+
+    def __init__(self, app, minimum_size: int = 512, levels: dict | None = None, registry=REGISTRY):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = DEFAULT_LEVELS if levels is None else levels
+        self.registry = registry
+
+    def _choose(self, accept_encoding):
+        codings = accepted_encodings(accept_encoding)
+        return next((c for c in CODINGS if c in codings), None)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        coding = self._choose(Headers(scope=scope).get("accept-encoding", ""))
+        if coding is None:
+            return await self.app(scope, receive, send)
+
+        start = None
+        level = None
+        encoder = None
+        passthrough = False
+        bytes_in = bytes_out = 0
+        cpu = 0.0
+
+        async def send_wrapper(message):
+            nonlocal start, level, encoder, passthrough, bytes_in, bytes_out, cpu
+            if passthrough:
+                return await send(message)
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+                level = self.levels.get(media_type, {}).get(coding)
+                if level is None or "content-encoding" in headers or message["status"] in (204, 304):
+                    passthrough = True
+                    return await send(message)
+                start = message  # held until we've seen the first body chunk
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if encoder is None:
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start)
+                    return await send(message)
+                headers = MutableHeaders(scope=start)
+                headers["Content-Encoding"] = coding
+                headers.add_vary_header("Accept-Encoding")
+                del headers["Content-Length"]
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    # The bytes differ from the identity response's
+                    headers["ETag"] = f"W/{etag}"
+                await send(start)
+                encoder = ENCODERS[coding](level)
+
+            t0 = time.thread_time()
+            out = encoder.compress(body, finish=not more_body)
+            cpu += time.thread_time() - t0
+            bytes_in += len(body)
+            bytes_out += len(out)
+            await send({"type": "http.response.body", "body": out, "more_body": more_body})
+            if not more_body:
+                labels = (coding,)
+                self.registry.inc("http_compression_input_bytes_total", labels, bytes_in)
+                self.registry.inc("http_compression_output_bytes_total", labels, bytes_out)
+                self.registry.observe("http_compression_cpu_seconds", labels, cpu)
+
+        await self.app(scope, receive, send_wrapper)
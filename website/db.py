@@ -1,76 +1,986 @@
 from fastlite import *
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass
-from datetime import datetime
+import asyncio
+import json
+import itertools
 import os
+import threading
+import time
+import weakref
+import apsw
+from website import metrics, timestamps
+from website.emails import KnownEmails, normalize_email
 
-# Ensure data directory exists
-# We use an absolute path relative to the app root if possible, 
-# but relying on CWD being the project root is standard for this setup.
-os.makedirs('data', exist_ok=True)
+# Location of the SQLite database. Relative paths resolve against the CWD,
+# which is the project root for this setup.
+DB_PATH = os.getenv("DB_PATH", "data/site.db")
 
-# Connect to database
-db = database('data/site.db')
+# Production PRAGMA profile, applied to every connection
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",  # durable under WAL except on power loss
+    "busy_timeout": int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000")),
+    "mmap_size": int(os.getenv("DB_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "cache_size": int(os.getenv("DB_CACHE_SIZE", "-16000")),  # negative = KiB
+    "temp_store": "MEMORY",
+}
+
+# Each thread gets its own connection, so admin reads and public writes
+# never queue on a shared handle. A connection is closed when its thread
+# exits (the thread's _local entry is dropped and its finalizer runs), so
+# only live threads hold one.
+_local = threading.local()
+_connections = {}  # key -> weakref.finalize that closes the connection
+_connections_lock = threading.RLock()
+_connection_keys = itertools.count()
+
+class _Handle:
+    """A thread's connection, kept in _local for as long as the thread lives"""
+
+    def __init__(self, conn):
+        self.db = conn
+
+def _close(key, conn):
+    with _connections_lock:
+        _connections.pop(key, None)
+    conn.conn.close()
+
+def connect(path: str = DB_PATH):
+    """Opens a new connection with the PRAGMA profile applied"""
+    # apswutils registers apsw's bestpractice hooks, which run PRAGMA optimize
+    # (which may write) under a 100 ms busy timeout while the connection
+    # opens. Against a busy writer that fails with "database is locked", so
+    # retry until our own busy_timeout is used up instead.
+    deadline = time.monotonic() + PRAGMAS["busy_timeout"] / 1000
+    while True:
+        try:
+            conn = database(path)
+            break
+        except apsw.BusyError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.01)
+    for name, value in PRAGMAS.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+@contextmanager
+def write_transaction(db):
+    """
+    Runs the block in a BEGIN IMMEDIATE transaction. `with db.conn:` opens a
+    deferred one, which starts as a read and upgrades on the first write;
+    SQLite fails that upgrade at once with SQLITE_BUSY when another
+    connection is writing, without honouring busy_timeout. Taking the write
+    lock up front waits for it instead.
+    """
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        yield db
+    except BaseException:
+        db.execute("ROLLBACK")
+        raise
+    db.execute("COMMIT")
+
+def get_db():
+    """Returns this thread's connection, opening it on first use"""
+    handle = getattr(_local, "handle", None)
+    if handle is None:
+        init_db()
+        conn = connect()
+        handle = _local.handle = _Handle(conn)
+        key = next(_connection_keys)
+        with _connections_lock:
+            _connections[key] = weakref.finalize(handle, _close, key, conn)
+    return handle.db
+
+def close_all():
+    """Closes every connection handed out by get_db, in every thread"""
+    global _local
+    with _connections_lock:
+        finalizers = list(_connections.values())
+    for finalizer in finalizers:
+        finalizer()
+    # Threads still holding a closed handle in the old _local open a new
+    # connection on their next get_db
+    _local = threading.local()
+
+def _reset_after_fork():
+    # A forked worker must never touch the parent's SQLite handles, and the
+    # parent's executor threads don't exist in the child. Drop the inherited
+    # state so each worker opens its own connections on first use.
+    global _local, _connections, _connections_lock, _executor, _pending, _pending_lock
+    # The finalizers would close the parent's handles from the child, which
+    # releases the parent's locks; just forget them
+    for finalizer in _connections.values():
+        finalizer.detach()
+    _local = threading.local()
+    _connections = {}
+    _connections_lock = threading.RLock()
+    _executor = None
+    _pending = 0
+    _pending_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+# Async handlers run DB calls on a dedicated, bounded executor instead of the
+# shared threadpool, so slow SQLite work can't starve other sync routes.
+# Past DB_MAX_PENDING queued calls, new ones fail fast with DatabaseBusy.
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", "4"))
+DB_MAX_PENDING = int(os.getenv("DB_MAX_PENDING", "64"))
+
+class DatabaseBusy(Exception):
+    """Raised when too many DB calls are already queued"""
+
+_executor = None
+_pending = 0
+_pending_lock = threading.Lock()
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(DB_EXECUTOR_WORKERS, thread_name_prefix="db")
+    return _executor
+
+async def run(fn, *args, **kwargs):
+    """Runs a blocking DB function on the DB executor and awaits its result"""
+    global _pending
+    with _pending_lock:
+        if _pending >= DB_MAX_PENDING:
+            raise DatabaseBusy(f"{_pending} database calls already pending")
+        _pending += 1
+    try:
+        future = _get_executor().submit(fn, *args, **kwargs)
+    except BaseException:
+        _release_pending()
+        raise
+    # The slot frees when the call finishes (or is cancelled before it
+    # started), not when this coroutine is cancelled: a cancelled waiter's
+    # call keeps running and still counts against DB_MAX_PENDING.
+    future.add_done_callback(_release_pending)
+    return await asyncio.wrap_future(future)
+
+def _release_pending(future=None):
+    global _pending
+    with _pending_lock:
+        _pending -= 1
+
+def shutdown_executor():
+    """Waits for queued DB calls to finish and stops the executor threads"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+def _timed(fn):
+    """Records the call's duration in the db_call_duration_seconds histogram"""
+    return metrics.timed("db_call_duration_seconds", fn.__name__)(fn)
 
 @dataclass
 class Subscriber:
     id: int
     email: str
-    created_at: str
+    created_at: int  # seconds since the Unix epoch, UTC
     status: str
 
 # Create table if not exists
-subscribers = db.t.subscribers
-if "subscribers" not in db.t:
-    subscribers.create({
-        "id": int,
-        "email": str,
-        "created_at": str,
-        "status": str,
-    }, pk="id")
+def _create_subscribers(db):
+    if "subscribers" not in db.t:
+        db.t.subscribers.create({
+            "id": int,
+            "email": str,
+            "created_at": int,
+            "status": str,
+        }, pk="id")
+
+
+# Schema migrations. Each entry runs once, in order, inside a transaction;
+# PRAGMA user_version records how many have been applied to a database file.
+def _add_subscriber_indexes(db):
+    # Older databases may hold duplicate emails from the check-then-insert
+    # race; keep the earliest row so the unique index can be built.
+    db.execute("""
+        DELETE FROM subscribers
+        WHERE id NOT IN (SELECT MIN(id) FROM subscribers GROUP BY email)
+    """)
+    db.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_subscribers_email ON subscribers(email)")
+    db.execute("CREATE INDEX IF NOT EXISTS idx_subscribers_created_at ON subscribers(created_at)")
+
+def _normalize_emails(db):
+    # Emails are now keyed by their trimmed, lowercased form. Drop rows that
+    # only differed by case or whitespace (keeping the earliest), then
+    # rewrite the rest in canonical form.
+    db.execute("""
+        DELETE FROM subscribers
+        WHERE id NOT IN (SELECT MIN(id) FROM subscribers GROUP BY lower(trim(email)))
+    """)
+    db.execute("UPDATE subscribers SET email = lower(trim(email)) WHERE email != lower(trim(email))")
+
+def _epoch_created_at(db):
+    # created_at moves from ISO-8601 text to integer epoch seconds. The old
+    # column was declared TEXT, whose affinity would turn integers back into
+    # strings, so the table is rebuilt with an INTEGER column. Rows whose
+    # timestamp can't be parsed get 0 rather than being dropped.
+    db.execute("""
+        CREATE TABLE subscribers_new (
+            id INTEGER PRIMARY KEY,
+            email TEXT,
+            created_at INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'active'
+        )
+    """)
+    db.execute("""
+        INSERT INTO subscribers_new (id, email, created_at, status)
+        SELECT id, email,
+               CASE WHEN typeof(created_at) = 'integer' THEN created_at
+                    ELSE COALESCE(CAST(strftime('%s', created_at) AS INTEGER), 0) END,
+               COALESCE(status, 'active')
+        FROM subscribers
+    """)
+    db.execute("DROP TABLE subscribers")
+    db.execute("ALTER TABLE subscribers_new RENAME TO subscribers")
+    db.execute("CREATE UNIQUE INDEX idx_subscribers_email ON subscribers(email)")
+    # Ends in the rowid, so it also covers ORDER BY created_at DESC, id DESC
+    db.execute("CREATE INDEX idx_subscribers_created_at ON subscribers(created_at)")
+
+def _daily_rollup(db):
+    # Signups and deletions per UTC day and status, kept current by triggers
+    # in the same transaction as each write, so dashboard totals and growth
+    # never scan the subscribers table. Signups count on the day the row was
+    # created and move with it if its status changes; deletions count on the
+    # day they happen, under the status the row had.
+    db.execute("""
+        CREATE TABLE subscriber_daily (
+            day INTEGER NOT NULL,  -- days since the Unix epoch
+            status TEXT NOT NULL,
+            signups INTEGER NOT NULL DEFAULT 0,
+            deletions INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, status)
+        ) WITHOUT ROWID
+    """)
+    db.execute("""
+        INSERT INTO subscriber_daily (day, status, signups)
+        SELECT created_at / 86400, status, COUNT(*) FROM subscribers GROUP BY 1, 2
+    """)
+    db.execute("""
+        CREATE TRIGGER subscribers_rollup_insert AFTER INSERT ON subscribers BEGIN
+            INSERT INTO subscriber_daily (day, status, signups) VALUES (NEW.created_at / 86400, NEW.status, 1)
+            ON CONFLICT (day, status) DO UPDATE SET signups = signups + 1;
+        END
+    """)
+    db.execute("""
+        CREATE TRIGGER subscribers_rollup_delete AFTER DELETE ON subscribers BEGIN
+            INSERT INTO subscriber_daily (day, status, deletions)
+            VALUES (CAST(strftime('%s', 'now') AS INTEGER) / 86400, OLD.status, 1)
+            ON CONFLICT (day, status) DO UPDATE SET deletions = deletions + 1;
+        END
+    """)
+    db.execute("""
+        CREATE TRIGGER subscribers_rollup_status AFTER UPDATE OF status ON subscribers
+        WHEN OLD.status IS NOT NEW.status BEGIN
+            UPDATE subscriber_daily SET signups = signups - 1
+            WHERE day = OLD.created_at / 86400 AND status = OLD.status;
+            INSERT INTO subscriber_daily (day, status, signups) VALUES (NEW.created_at / 86400, NEW.status, 1)
+            ON CONFLICT (day, status) DO UPDATE SET signups = signups + 1;
+        END
+    """)
+
+def _search_index(db):
+    # Trigram full-text index over each address and its domain, so the
+    # admin can find any substring of 3+ characters without a table scan.
+    # The rowid is the subscriber id; triggers keep it in step with writes.
+    db.execute("CREATE VIRTUAL TABLE subscriber_search USING fts5(email, domain, tokenize='trigram')")
+    db.execute("""
+        INSERT INTO subscriber_search (rowid, email, domain)
+        SELECT id, email, substr(email, instr(email, '@') + 1) FROM subscribers
+    """)
+    db.execute("""
+        CREATE TRIGGER subscribers_search_insert AFTER INSERT ON subscribers BEGIN
+            INSERT INTO subscriber_search (rowid, email, domain)
+            VALUES (NEW.id, NEW.email, substr(NEW.email, instr(NEW.email, '@') + 1));
+        END
+    """)
+    db.execute("""
+        CREATE TRIGGER subscribers_search_delete AFTER DELETE ON subscribers BEGIN
+            DELETE FROM subscriber_search WHERE rowid = OLD.id;
+        END
+    """)
+    db.execute("""
+        CREATE TRIGGER subscribers_search_update AFTER UPDATE OF email ON subscribers BEGIN
+            UPDATE subscriber_search
+            SET email = NEW.email, domain = substr(NEW.email, instr(NEW.email, '@') + 1)
+            WHERE rowid = NEW.id;
+        END
+    """)
+
+def _outbox(db):
+    # Durable queue of outgoing mail. A signup that starts out 'pending'
+    # enqueues its confirmation in the same transaction, so an address is
+    # never stored without its email being owed, and a crash before sending
+    # only delays it. Workers claim rows by pushing next_attempt_at forward
+    # (a lease), so a worker that dies mid-send has its row retried.
+    db.execute("""
+        CREATE TABLE outbox (
+            id INTEGER PRIMARY KEY,
+            kind TEXT NOT NULL,
+            recipient TEXT NOT NULL,
+            subscriber_id INTEGER,
+            status TEXT NOT NULL DEFAULT 'queued',  -- queued | sent | failed
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at INTEGER NOT NULL,
+            last_error TEXT,
+            created_at INTEGER NOT NULL,
+            sent_at INTEGER
+        )
+    """)
+    db.execute("CREATE INDEX idx_outbox_due ON outbox(status, next_attempt_at)")
+    db.execute("""
+        CREATE TRIGGER subscribers_confirm_email AFTER INSERT ON subscribers
+        WHEN NEW.status = 'pending' BEGIN
+            INSERT INTO outbox (kind, recipient, subscriber_id, next_attempt_at, created_at)
+            VALUES ('confirm', NEW.email, NEW.id, NEW.created_at, NEW.created_at);
+        END
+    """)
+
+def _broadcasts(db):
+    # One row per newsletter issue plus one row per recipient once it has
+    # been attempted, so an interrupted send knows exactly who is left.
+    # The sending process refreshes heartbeat_at while it runs; a row stuck
+    # in 'sending' with a stale heartbeat belongs to a process that died.
+    db.execute("""
+        CREATE TABLE broadcasts (
+            id INTEGER PRIMARY KEY,
+            subject TEXT NOT NULL,
+            body TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'draft',  -- draft | sending | paused | done
+            created_at INTEGER NOT NULL,
+            started_at INTEGER,       -- start of the current (or last) run
+            finished_at INTEGER,
+            heartbeat_at INTEGER NOT NULL DEFAULT 0,
+            recipients INTEGER NOT NULL DEFAULT 0,
+            sent INTEGER NOT NULL DEFAULT 0,
+            failed INTEGER NOT NULL DEFAULT 0,
+            run_start_count INTEGER NOT NULL DEFAULT 0  -- sent + failed when this run began
+        )
+    """)
+    db.execute("""
+        CREATE TABLE broadcast_deliveries (
+            broadcast_id INTEGER NOT NULL,
+            subscriber_id INTEGER NOT NULL,
+            status TEXT NOT NULL,  -- sent | failed
+            error TEXT,
+            at INTEGER NOT NULL,
+            PRIMARY KEY (broadcast_id, subscriber_id)
+        ) WITHOUT ROWID
+    """)
+    # Keep the counters the dashboard polls in step with the deliveries
+    db.execute("""
+        CREATE TRIGGER broadcast_deliveries_count AFTER INSERT ON broadcast_deliveries BEGIN
+            UPDATE broadcasts SET sent = sent + (NEW.status = 'sent'),
+                                  failed = failed + (NEW.status = 'failed')
+            WHERE id = NEW.broadcast_id;
+        END
+    """)
+
+def _change_counter(db):
+    # A single row bumped by every write to subscribers (and so to the
+    # rollup and search index derived from it). Admin pages use it as their
+    # cache validator; see change_token().
+    db.execute("""
+        CREATE TABLE change_counter (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL,
+            changed_at INTEGER NOT NULL
+        )
+    """)
+    db.execute("INSERT INTO change_counter VALUES (1, 0, ?)", (timestamps.now(),))
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        db.execute(f"""
+            CREATE TRIGGER subscribers_{event.lower()}_version AFTER {event} ON subscribers BEGIN
+                UPDATE change_counter SET version = version + 1, changed_at = unixepoch() WHERE id = 1;
+            END
+        """)
+
+def _outbox_by_subscriber(db):
+    # request_confirmation() looks up a subscriber's earlier confirmations
+    db.execute("CREATE INDEX idx_outbox_subscriber ON outbox(subscriber_id, kind)")
 
+MIGRATIONS = [
+    _add_subscriber_indexes,
+    _normalize_emails,
+    _epoch_created_at,
+    _daily_rollup,
+    _search_index,
+    _outbox,
+    _broadcasts,
+    _change_counter,
+    _outbox_by_subscriber,
+]
+
+def migrate(db):
+    """Bring the schema up to date. Safe to call on every start."""
+    version = db.execute("PRAGMA user_version").fetchone()[0]
+    for i, step in enumerate(MIGRATIONS[version:], start=version + 1):
+        with db.conn:
+            step(db)
+            db.execute(f"PRAGMA user_version = {i}")
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+def init_db(path: str | None = None):
+    """
+    Creates the data directory and the tables, then applies pending
+    migrations. Runs once per process for DB_PATH: the multi-worker
+    launcher calls it before forking so workers inherit a current schema.
+    The work happens under SQLite's write lock, so processes that start
+    without a launcher (e.g. uvicorn --workers) can't race each other.
+    """
+    global _schema_ready
+    if path is None:
+        if _schema_ready:
+            return
+        path = DB_PATH
+    with _schema_lock:
+        if _schema_ready and path == DB_PATH:
+            return
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        db = connect(path)
+        try:
+            with write_transaction(db):
+                _create_subscribers(db)
+                migrate(db)
+        finally:
+            db.conn.close()
+        if path == DB_PATH:
+            _schema_ready = True
+
+# Confirmed (or imported) addresses, kept in step with the confirmations,
+# imports and deletes below and filled from the table by load_known_emails()
+# at startup. Pending addresses stay out: signing up again while pending
+# must reach the database to get a fresh confirmation link.
+known_emails = KnownEmails()
+
+def load_known_emails():
+    cursor = get_db().execute("SELECT email FROM subscribers WHERE status != 'pending'")
+    known_emails.load(row[0] for row in cursor)
+
+
+def _upsert_subscriber(db, email: str) -> tuple[int, bool]:
+    # The unique index on email makes this a single atomic statement: a new
+    # address comes back through RETURNING, a duplicate returns no row.
+    # New signups wait in 'pending' until they follow the confirmation link
+    # (double opt-in); the insert trigger queues that email.
+    row = db.execute(
+        """
+        INSERT INTO subscribers (email, created_at, status) VALUES (?, ?, ?)
+        ON CONFLICT(email) DO NOTHING
+        RETURNING id
+        """,
+        (email, timestamps.now(), 'pending'),
+    ).fetchone()
+    if row is not None:
+        return row[0], True
+    # Already subscribed; an index lookup inside the same transaction
+    row = db.execute("SELECT id FROM subscribers WHERE email = ?", (email,)).fetchone()
+    return row[0], False
+
+def _remember(emails):
+    for email in emails:
+        known_emails.add(email)
+
+@_timed
 def add_subscriber(email: str) -> tuple[int, bool]:
     """
     Adds a subscriber.
     Returns (user_id, created) tuple.
     created is True if new, False if already existed.
     """
-    # Check if already exists
-    # FastLite's tables are callable for queries
-    # Note: Avoid raw SQL injection by using parameter binding if possible, 
-    # but fastlite often handles basic wrapper stuff. 
-    # For safety with simple strings in fastlite/sqlite-minutils:
-    results = subscribers(where='email = ?', where_args=[email])
-    
-    if results:
-        return results[0]['id'], False
-        
-    # Add new subscriber
-    # id is auto-incrementing integer as strictly defined by sqlite-minutils when int pk is used?
-    # Actually fastlite handles 'id' specially if passed as None or omitted if dataclass field allows it.
-    # We pass explicit dict or object.
-    
-    new_sub = Subscriber(
-        id=None, 
-        email=email,
-        created_at=datetime.utcnow().isoformat(),
-        status='active'
-    )
-    
-    # insert returns the inserted object including the new ID
-    res = subscribers.insert(new_sub)
-    return res['id'], True
+    email = normalize_email(email)
+    db = get_db()
+    with write_transaction(db):
+        return _upsert_subscriber(db, email)
+
+@_timed
+def add_subscribers(emails: list[str]) -> list[tuple[int, bool]]:
+    """
+    Adds several subscribers in one transaction (one commit, one fsync).
+    Returns an (user_id, created) tuple per email, in order.
+    """
+    emails = [normalize_email(email) for email in emails]
+    db = get_db()
+    with write_transaction(db):
+        return [_upsert_subscriber(db, email) for email in emails]
 
+@_timed
+def confirm_subscriber(id: int, email: str) -> bool:
+    """
+    Marks a pending subscriber active. The email must still match the id,
+    so a link can't confirm a different address that later reused the id.
+    Returns False if there's no such pending subscriber.
+    """
+    db = get_db()
+    with write_transaction(db):
+        row = db.execute(
+            "UPDATE subscribers SET status = 'active' WHERE id = ? AND email = ? AND status = 'pending' RETURNING id",
+            (id, email),
+        ).fetchone()
+    if row is not None:
+        _remember([email])
+    return row is not None
+
+@_timed
+def get_status(email: str) -> str | None:
+    row = get_db().execute("SELECT status FROM subscribers WHERE email = ?", (normalize_email(email),)).fetchone()
+    return row[0] if row else None
+
+@_timed
+def request_confirmation(email: str, min_interval: int = 600) -> bool:
+    """
+    For an address that signed up but never confirmed, queues a fresh
+    confirmation email, unless one is still waiting to go out or was
+    queued less than `min_interval` seconds ago. Returns True if the
+    address is pending (a link is on its way or was just sent), False if
+    it's unknown or already confirmed.
+    """
+    email = normalize_email(email)
+    db = get_db()
+    now = timestamps.now()
+    with write_transaction(db):
+        row = db.execute("SELECT id, status FROM subscribers WHERE email = ?", (email,)).fetchone()
+        if row is None or row[1] != 'pending':
+            return False
+        db.execute(
+            """
+            INSERT INTO outbox (kind, recipient, subscriber_id, next_attempt_at, created_at)
+            SELECT 'confirm', ?, ?, ?, ?
+            WHERE NOT EXISTS (
+                SELECT 1 FROM outbox WHERE subscriber_id = ? AND kind = 'confirm'
+                AND (status = 'queued' OR created_at > ?)
+            )
+            """,
+            (email, row[0], now, now, row[0], now - min_interval),
+        )
+    return True
+
+@_timed
+def import_subscribers(emails: list[str]) -> int:
+    """
+    Inserts a batch of addresses in one transaction, skipping any that are
+    already subscribed. Returns how many rows were inserted. Imported lists
+    are taken as already confirmed, so they go straight to 'active'.
+    """
+    emails = [normalize_email(email) for email in emails]
+    db = get_db()
+    created_at = timestamps.now()
+    with write_transaction(db):
+        # Count RETURNING rows rather than total_changes(), which also
+        # counts the rollup trigger's writes
+        inserted = [row[0] for row in db.conn.executemany(
+            """
+            INSERT INTO subscribers (email, created_at, status) VALUES (?, ?, 'active')
+            ON CONFLICT(email) DO NOTHING
+            RETURNING email
+            """,
+            [(email, created_at) for email in emails],
+        )]
+    # Only the new rows: a skipped address may still be pending, and must
+    # keep reaching the database so it can get a fresh confirmation
+    _remember(inserted)
+    return len(inserted)
+
+@_timed
 def get_count():
-    return len(subscribers())
+    return get_db().execute("SELECT COUNT(*) FROM subscribers").fetchone()[0]
+
+@_timed
+def get_status_totals() -> dict[str, int]:
+    """Current subscriber count per status, from the daily rollup"""
+    rows = get_db().execute(
+        "SELECT status, SUM(signups) - SUM(deletions) FROM subscriber_daily GROUP BY status"
+    ).fetchall()
+    return {status: count for status, count in rows if count}
+
+@_timed
+def get_daily_growth() -> list[tuple[int, int, int]]:
+    """(day, signups, deletions) for every day with activity, oldest first"""
+    return get_db().execute(
+        "SELECT day, SUM(signups), SUM(deletions) FROM subscriber_daily GROUP BY day ORDER BY day"
+    ).fetchall()
+
+@dataclass(frozen=True)
+class ChangeToken:
+    version: int     # bumped by every write to subscribers
+    changed_at: int  # when that last happened, epoch seconds
+
+@_timed
+def change_token() -> ChangeToken:
+    """
+    The subscriber data's current version, for use as a cache key.
+    PRAGMA data_version only moves when another connection commits, and
+    total_changes() when this one writes, so while both stand still the
+    last token read on this connection is still current and no table is
+    touched at all.
+    """
+    db = get_db()
+    stamp = (db.execute("PRAGMA data_version").fetchone()[0], db.conn.total_changes())
+    cached = getattr(_local, "change_token", None)
+    if cached is None or cached[0] != stamp:
+        version, changed_at = db.execute("SELECT version, changed_at FROM change_counter").fetchone()
+        cached = _local.change_token = (stamp, ChangeToken(version, changed_at))
+    return cached[1]
+
+# Trigram matching needs at least this many characters
+SEARCH_MIN_LENGTH = 3
+
+def _fts_query(query: str) -> str | None:
+    query = query.strip().lower()
+    column = ""
+    if query.startswith("@"):
+        # "@example.com" searches the domain column only
+        column, query = "domain : ", query[1:]
+    if len(query) < SEARCH_MIN_LENGTH:
+        return None
+    # Quote as a single phrase so FTS5 operators in the input are literal
+    return column + '"' + query.replace('"', '""') + '"'
+
+@_timed
+def search_subscribers(query: str, limit: int = 50) -> list[dict]:
+    """
+    Subscribers whose address contains `query` (or, for "@...", whose
+    domain does), newest first, at most `limit`. Queries shorter than
+    SEARCH_MIN_LENGTH return nothing.
+    """
+    match = _fts_query(query)
+    if match is None:
+        return []
+    # Ordering by the index's rowid (the subscriber id) lets FTS5 stop
+    # after `limit` hits instead of sorting every match
+    return get_db().q(
+        """
+        SELECT s.* FROM subscribers s
+        JOIN (SELECT rowid FROM subscriber_search WHERE subscriber_search MATCH ?
+              ORDER BY rowid DESC LIMIT ?) hits ON hits.rowid = s.id
+        ORDER BY s.id DESC
+        """,
+        [match, limit],
+    )
 
+@_timed
 def get_all_subscribers():
     """
     Returns all subscribers ordered by created_at desc.
     """
-    return subscribers(order_by='created_at DESC')
+    return get_db().q("SELECT * FROM subscribers ORDER BY created_at DESC")
+
+@_timed
+def get_subscribers_page(after: tuple | None = None, limit: int = 100) -> list[dict]:
+    """
+    Returns up to `limit` subscribers, newest first.
+    `after` is the (created_at, id) of the last row already shown; paging on
+    that key walks the created_at index instead of OFFSET-scanning.
+    """
+    db = get_db()
+    if after is None:
+        return db.q(
+            "SELECT * FROM subscribers ORDER BY created_at DESC, id DESC LIMIT ?",
+            [limit],
+        )
+    return db.q(
+        """
+        SELECT * FROM subscribers
+        WHERE (created_at, id) < (?, ?)
+        ORDER BY created_at DESC, id DESC LIMIT ?
+        """,
+        [*after, limit],
+    )
+
+def iter_subscribers(chunk_size: int = 500):
+    """
+    Yields all subscribers, newest first, in lists of `chunk_size` rows.
+    Each chunk is its own short keyset query, so a slow consumer never holds
+    a read transaction open.
+    """
+    after = None
+    while True:
+        chunk = get_subscribers_page(after, chunk_size)
+        if not chunk:
+            return
+        yield chunk
+        after = (chunk[-1]['created_at'], chunk[-1]['id'])
 
+@_timed
 def delete_subscriber(id: int):
     """
     Deletes a subscriber by ID.
     """
-    subscribers.delete(id)
+    db = get_db()
+    with write_transaction(db):
+        deleted = db.execute("DELETE FROM subscribers WHERE id = ? RETURNING email", (id,)).fetchall()
+    for (email,) in deleted:
+        known_emails.discard(email)
+
+@_timed
+def delete_subscribers(ids: list[int]) -> int:
+    """
+    Deletes several subscribers in one transaction.
+    Returns how many rows were deleted.
+    """
+    if not ids:
+        return 0
+    db = get_db()
+    with write_transaction(db):
+        deleted = db.execute(
+            "DELETE FROM subscribers WHERE id IN (SELECT value FROM json_each(?)) RETURNING email",
+            (json.dumps([int(i) for i in ids]),),
+        ).fetchall()
+    for (email,) in deleted:
+        known_emails.discard(email)
+    return len(deleted)
+
+
+# Async counterparts of the functions above, for `async def` handlers
+async def add_subscriber_async(email: str) -> tuple[int, bool]:
+    return await run(add_subscriber, email)
+
+async def change_token_async() -> ChangeToken:
+    return await run(change_token)
+
+async def get_count_async() -> int:
+    return await run(get_count)
+
+async def get_status_totals_async() -> dict[str, int]:
+    return await run(get_status_totals)
+
+async def get_daily_growth_async() -> list[tuple[int, int, int]]:
+    return await run(get_daily_growth)
+
+async def get_subscribers_page_async(after: tuple | None = None, limit: int = 100) -> list[dict]:
+    return await run(get_subscribers_page, after, limit)
+
+async def iter_subscribers_async(chunk_size: int = 500):
+    after = None
+    while chunk := await get_subscribers_page_async(after, chunk_size):
+        yield chunk
+        after = (chunk[-1]['created_at'], chunk[-1]['id'])
+
+async def search_subscribers_async(query: str, limit: int = 50) -> list[dict]:
+    return await run(search_subscribers, query, limit)
+
+async def confirm_subscriber_async(id: int, email: str) -> bool:
+    return await run(confirm_subscriber, id, email)
+
+async def request_confirmation_async(email: str, min_interval: int = 600) -> bool:
+    return await run(request_confirmation, email, min_interval)
+
+async def delete_subscriber_async(id: int):
+    await run(delete_subscriber, id)
+
+async def delete_subscribers_async(ids: list[int]) -> int:
+    return await run(delete_subscribers, ids)
+
+async def create_broadcast_async(subject: str, body: str) -> int:
+    return await run(create_broadcast, subject, body)
+
+async def get_broadcast_async(id: int) -> dict | None:
+    return await run(get_broadcast, id)
+
+async def get_broadcasts_async(limit: int = 20) -> list[dict]:
+    return await run(get_broadcasts, limit)
+
+async def get_broadcast_failures_async(id: int, limit: int = 5) -> list[dict]:
+    return await run(get_broadcast_failures, id, limit)
+
+async def pause_broadcast_async(id: int) -> bool:
+    return await run(pause_broadcast, id)
+
+
+# Outbox. Claiming is a single UPDATE ... RETURNING, so any number of
+# worker threads (in any number of processes) can poll without handing the
+# same row to two of them.
+OUTBOX_COLUMNS = ("id", "kind", "recipient", "subscriber_id", "attempts", "last_error")
+
+@_timed
+def claim_outbox(limit: int = 1, lease: int = 300) -> list[dict]:
+    """Leases up to `limit` due messages for `lease` seconds and returns them"""
+    db = get_db()
+    now = timestamps.now()
+    with write_transaction(db):
+        cursor = db.execute(
+            f"""
+            UPDATE outbox SET attempts = attempts + 1, next_attempt_at = ?
+            WHERE id IN (
+                SELECT id FROM outbox WHERE status = 'queued' AND next_attempt_at <= ?
+                ORDER BY next_attempt_at LIMIT ?
+            )
+            RETURNING {", ".join(OUTBOX_COLUMNS)}
+            """,
+            (now + lease, now, limit),
+        )
+        return [dict(zip(OUTBOX_COLUMNS, row)) for row in cursor]
+
+@_timed
+def mark_outbox_sent(id: int):
+    db = get_db()
+    with write_transaction(db):
+        db.execute("UPDATE outbox SET status = 'sent', sent_at = ?, last_error = NULL WHERE id = ?",
+                   (timestamps.now(), id))
+
+@_timed
+def mark_outbox_failed(id: int, error: str, retry_at: int | None):
+    """Records a failed attempt; retries at `retry_at`, or gives up if None"""
+    db = get_db()
+    with write_transaction(db):
+        if retry_at is None:
+            db.execute("UPDATE outbox SET status = 'failed', last_error = ? WHERE id = ?", (error, id))
+        else:
+            db.execute("UPDATE outbox SET next_attempt_at = ?, last_error = ? WHERE id = ?",
+                       (retry_at, error, id))
+
+# Broadcasts. A run owns its broadcast for as long as it keeps the heartbeat
+# fresh; claiming, heartbeating and finishing are single conditional UPDATEs,
+# so two processes can't send the same issue at once.
+@_timed
+def create_broadcast(subject: str, body: str) -> int:
+    db = get_db()
+    with write_transaction(db):
+        return db.execute(
+            "INSERT INTO broadcasts (subject, body, created_at) VALUES (?, ?, ?) RETURNING id",
+            (subject, body, timestamps.now()),
+        ).fetchone()[0]
+
+@_timed
+def get_broadcast(id: int) -> dict | None:
+    rows = get_db().q("SELECT * FROM broadcasts WHERE id = ?", [id])
+    return rows[0] if rows else None
+
+@_timed
+def get_broadcasts(limit: int = 20) -> list[dict]:
+    """Most recent broadcasts first"""
+    return get_db().q("SELECT * FROM broadcasts ORDER BY id DESC LIMIT ?", [limit])
+
+@_timed
+def get_broadcast_failures(id: int, limit: int = 5) -> list[dict]:
+    """The latest failed deliveries of a broadcast, with the address"""
+    return get_db().q(
+        """
+        SELECT s.email, d.error, d.at FROM broadcast_deliveries d
+        JOIN subscribers s ON s.id = d.subscriber_id
+        WHERE d.broadcast_id = ? AND d.status = 'failed'
+        ORDER BY d.at DESC LIMIT ?
+        """,
+        [id, limit],
+    )
+
+@_timed
+def claim_broadcast(id: int, stale_after: int = 30) -> dict | None:
+    """
+    Starts (or resumes) a run of broadcast `id` and returns it, or None if
+    it's finished or another live run holds it. Recipients is fixed here as
+    those already attempted plus the active subscribers still to go.
+    """
+    db = get_db()
+    now = timestamps.now()
+    with write_transaction(db):
+        rows = db.q(
+            """
+            UPDATE broadcasts SET
+                status = 'sending', started_at = ?, heartbeat_at = ?, finished_at = NULL,
+                run_start_count = sent + failed,
+                recipients = sent + failed + (
+                    SELECT COUNT(*) FROM subscribers s WHERE s.status = 'active' AND NOT EXISTS (
+                        SELECT 1 FROM broadcast_deliveries d
+                        WHERE d.broadcast_id = broadcasts.id AND d.subscriber_id = s.id))
+            WHERE id = ? AND (status IN ('draft', 'paused')
+                              OR (status = 'sending' AND heartbeat_at < ?))
+            RETURNING *
+            """,
+            [now, now, id, now - stale_after],
+        )
+    return rows[0] if rows else None
+
+@_timed
+def get_interrupted_broadcasts(stale_after: int = 30) -> list[int]:
+    """Ids of broadcasts left 'sending' by a run that is no longer alive"""
+    rows = get_db().execute(
+        "SELECT id FROM broadcasts WHERE status = 'sending' AND heartbeat_at < ? ORDER BY id",
+        (timestamps.now() - stale_after,),
+    ).fetchall()
+    return [row[0] for row in rows]
+
+@_timed
+def heartbeat_broadcast(id: int) -> bool:
+    """Refreshes a run's claim. False means it was paused and the run should stop."""
+    db = get_db()
+    with write_transaction(db):
+        row = db.execute(
+            "UPDATE broadcasts SET heartbeat_at = ? WHERE id = ? AND status = 'sending' RETURNING id",
+            (timestamps.now(), id),
+        ).fetchone()
+    return row is not None
+
+@_timed
+def release_broadcast(id: int):
+    """Gives up a run's claim but leaves it 'sending', so the next start resumes it at once"""
+    db = get_db()
+    with write_transaction(db):
+        db.execute("UPDATE broadcasts SET heartbeat_at = 0 WHERE id = ? AND status = 'sending'", (id,))
+
+@_timed
+def pause_broadcast(id: int) -> bool:
+    """Asks the run sending `id` (in any process) to stop after in-flight messages"""
+    db = get_db()
+    with write_transaction(db):
+        row = db.execute(
+            "UPDATE broadcasts SET status = 'paused' WHERE id = ? AND status = 'sending' RETURNING id",
+            (id,),
+        ).fetchone()
+    return row is not None
+
+@_timed
+def finish_broadcast(id: int):
+    db = get_db()
+    now = timestamps.now()
+    with write_transaction(db):
+        db.execute(
+            "UPDATE broadcasts SET status = 'done', finished_at = ?, heartbeat_at = ? WHERE id = ? AND status = 'sending'",
+            (now, now, id),
+        )
+
+@_timed
+def record_delivery(broadcast_id: int, subscriber_id: int, error: str | None = None):
+    """Marks one recipient of a broadcast as sent, or failed with `error`"""
+    db = get_db()
+    with write_transaction(db):
+        db.execute(
+            """
+            INSERT INTO broadcast_deliveries (broadcast_id, subscriber_id, status, error, at)
+            VALUES (?, ?, ?, ?, ?) ON CONFLICT DO NOTHING
+            """,
+            (broadcast_id, subscriber_id, "sent" if error is None else "failed", error, timestamps.now()),
+        )
+
+@_timed
+def get_broadcast_recipients(broadcast_id: int, after_id: int = 0, limit: int = 500) -> list[tuple[int, str]]:
+    """Active subscribers with id > after_id not yet attempted for this broadcast, by id"""
+    return get_db().execute(
+        """
+        SELECT id, email FROM subscribers s
+        WHERE id > ? AND status = 'active' AND NOT EXISTS (
+            SELECT 1 FROM broadcast_deliveries d WHERE d.broadcast_id = ? AND d.subscriber_id = s.id)
+        ORDER BY id LIMIT ?
+        """,
+        (after_id, broadcast_id, limit),
+    ).fetchall()
+
+def iter_broadcast_recipients(broadcast_id: int, chunk_size: int = 500):
+    """
+    Yields (id, email) for every recipient a broadcast still owes, in id
+    order. Like iter_subscribers, each chunk is a short keyset query, so the
+    sender never holds a read transaction open for the length of a send.
+    """
+    after_id = 0
+    while chunk := get_broadcast_recipients(broadcast_id, after_id, chunk_size):
+        yield from chunk
+        after_id = chunk[-1][0]
@@ -0,0 +1,72 @@
+'''Email address validation and an in-memory set of known addresses'''
+
+import re
+import threading
+from hashlib import blake2b
+
+# Basic regex for email validation, compiled once
+EMAIL_RE = re.compile(r'[\w\.-]+@[\w\.-]+\.\w+')
+
+
+def normalize_email(email: str) -> str:
+    """The canonical form addresses are stored and looked up by"""
+    return email.strip().lower()
+
+def is_valid_email(email):
+    return EMAIL_RE.fullmatch(email) is not None
+
+
+class KnownEmails:
+    """
+    Compact membership set of subscribed addresses, so repeat signups can be
+    answered without a database round trip. Each address is kept as a
+    64-bit blake2b digest of its normalized form rather than as a string; a
+    false positive needs a 64-bit collision, which is negligible at
+    newsletter scale.
+
+    Until `load` has run, nothing is reported as known and callers fall
+    through to the database.
+    """
+
+    def __init__(self):
+        self._hashes: set[int] = set()
+        self._lock = threading.Lock()
+        self._loading = False
+        self._removed_while_loading: set[int] = set()
+        self.loaded = False
+
+    @staticmethod
+    def _key(email: str) -> int:
+        digest = blake2b(normalize_email(email).encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "big")
+
+    def load(self, emails):
+        """Replaces the contents with `emails`, keeping concurrent updates"""
+        with self._lock:
+            self._loading = True
+            self._removed_while_loading.clear()
+        fresh = {self._key(email) for email in emails}
+        with self._lock:
+            # Keep adds that raced with the load, drop deletes that did
+            self._hashes = (fresh | self._hashes) - self._removed_while_loading
+            self._loading = False
+            self.loaded = True
+
+    def add(self, email: str):
+        key = self._key(email)
+        with self._lock:
+            self._hashes.add(key)
+            self._removed_while_loading.discard(key)
+
+    def discard(self, email: str):
+        key = self._key(email)
+        with self._lock:
+            self._hashes.discard(key)
+            if self._loading:
+                self._removed_while_loading.add(key)
+
+    def __contains__(self, email: str) -> bool:
+        return self.loaded and self._key(email) in self._hashes
+
+    def __len__(self):
+        return len(self._hashes)
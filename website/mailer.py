@@ -0,0 +1,105 @@
+'''Outgoing newsletter mail: SMTP settings, opt-in tokens and message bodies'''
+
+import os
+import smtplib
+from email import policy
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid, parseaddr
+
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+
+# SMTP relay. Point SMTP_HOST/SMTP_PORT at a local aiosmtpd instance
+# (python -m aiosmtpd -n -l localhost:8025) to see mail during development.
+SMTP_HOST = os.getenv("SMTP_HOST", "localhost")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "25"))
+SMTP_USER = os.getenv("SMTP_USER")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "False").lower() == "true"
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "10"))
+MAIL_FROM = os.getenv("MAIL_FROM", "Prabhanshu <newsletter@prabhanshu.space>")
+# Absolute base for links in emails
+SITE_URL = os.getenv("SITE_URL", "https://prabhanshu.space").rstrip("/")
+# How long a confirmation link stays valid
+CONFIRM_TOKEN_MAX_AGE = int(os.getenv("CONFIRM_TOKEN_MAX_AGE", str(7 * 24 * 3600)))
+
+_CONFIRM_SALT = "newsletter-confirm"
+
+
+def confirm_token(secret: str, subscriber_id: int, email: str) -> str:
+    return URLSafeTimedSerializer(secret, salt=_CONFIRM_SALT).dumps([subscriber_id, email])
+
+def read_confirm_token(secret: str, token: str, max_age: int = CONFIRM_TOKEN_MAX_AGE) -> tuple[int, str] | None:
+    """(subscriber_id, email) from a valid token, or None if it's forged or expired"""
+    try:
+        subscriber_id, email = URLSafeTimedSerializer(secret, salt=_CONFIRM_SALT).loads(token, max_age=max_age)
+    except (SignatureExpired, BadSignature, ValueError, TypeError):
+        return None
+    return int(subscriber_id), email
+
+
+def confirmation_email(secret: str, subscriber_id: int, email: str) -> EmailMessage:
+    link = f"{SITE_URL}/newsletter/confirm?token={confirm_token(secret, subscriber_id, email)}"
+    msg = EmailMessage()
+    msg["From"] = MAIL_FROM
+    msg["To"] = email
+    msg["Subject"] = "Confirm your subscription"
+    msg.set_content(
+        "Hi!\n\n"
+        "Please confirm that you'd like to receive my newsletter by opening this link:\n\n"
+        f"{link}\n\n"
+        f"The link is valid for {CONFIRM_TOKEN_MAX_AGE // 86400} days. "
+        "If you didn't sign up, just ignore this email.\n\n"
+        "— Prabhanshu\n"
+    )
+    return msg
+
+
+def connect() -> smtplib.SMTP:
+    """An SMTP session to the relay, upgraded and logged in as configured"""
+    smtp = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+    try:
+        if SMTP_STARTTLS:
+            smtp.starttls()
+        if SMTP_USER:
+            smtp.login(SMTP_USER, SMTP_PASSWORD or "")
+    except BaseException:
+        smtp.close()
+        raise
+    return smtp
+
+def send(msg: EmailMessage):
+    """Sends one message over a fresh SMTP connection"""
+    with connect() as smtp:
+        smtp.send_message(msg)
+
+
+class BroadcastTemplate:
+    """
+    A newsletter issue rendered to wire format once. Every recipient gets
+    the same bytes apart from the To and Message-ID headers, which are
+    prepended per message, so a send to the whole list never re-encodes
+    the body.
+    """
+
+    def __init__(self, subject: str, body: str):
+        # 7-bit clean, so no relay has to support 8BITMIME
+        msg = EmailMessage(policy=policy.SMTP.clone(cte_type="7bit"))
+        msg["From"] = MAIL_FROM
+        msg["Subject"] = subject
+        msg["Date"] = formatdate(localtime=False)
+        msg.set_content(body)
+        self.sender = parseaddr(MAIL_FROM)[1]
+        self._domain = self.sender.rpartition("@")[2] or None
+        self._data = msg.as_bytes()
+
+    def render(self, email: str) -> bytes:
+        return (f"To: {email}\r\nMessage-ID: {make_msgid(domain=self._domain)}\r\n".encode()
+                + self._data)
+
+
+def deliver(message: dict, secret: str):
+    """Outbox delivery callback: builds the message for an outbox row and sends it"""
+    if message["kind"] == "confirm":
+        send(confirmation_email(secret, message["subscriber_id"], message["recipient"]))
+    else:
+        raise ValueError(f"unknown outbox message kind {message['kind']!r}")
@@ -0,0 +1,260 @@
+'''Database upkeep: WAL checkpoints and online backups'''
+
+import fcntl
+import glob
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+import apsw
+
+from website import db, metrics
+
+log = logging.getLogger(__name__)
+
+# Checkpoint policy: a PASSIVE checkpoint every WAL_CHECKPOINT_SECONDS, and a
+# TRUNCATE as soon as the -wal file passes WAL_MAX_BYTES (checked every
+# WAL_CHECK_SECONDS)
+WAL_CHECKPOINT_SECONDS = float(os.getenv("WAL_CHECKPOINT_SECONDS", "300"))
+WAL_MAX_BYTES = int(os.getenv("WAL_MAX_BYTES", str(64 * 1024 * 1024)))
+WAL_CHECK_SECONDS = float(os.getenv("WAL_CHECK_SECONDS", "10"))
+# Snapshots land in BACKUP_DIR as site-<UTC timestamp>.db; the newest
+# BACKUP_KEEP are kept. Each backup step copies BACKUP_PAGES_PER_STEP pages.
+BACKUP_DIR = os.getenv(
+    "BACKUP_DIR", os.path.join(os.path.dirname(db.DB_PATH) or ".", "backups")
+)
+BACKUP_KEEP = int(os.getenv("BACKUP_KEEP", "7"))
+BACKUP_PAGES_PER_STEP = int(os.getenv("BACKUP_PAGES_PER_STEP", "256"))
+
+metrics.REGISTRY.describe(
+    "db_checkpoint_duration_seconds", "histogram", "WAL checkpoint duration", ("call",)
+)
+metrics.REGISTRY.describe(
+    "db_backup_duration_seconds", "histogram", "Online backup duration", ("call",)
+)
+
+
+class BackupInProgress(Exception):
+    """Raised when another backup (in any process) is writing to the backup directory"""
+
+
+@dataclass
+class CheckpointResult:
+    mode: str
+    busy: bool         # couldn't finish because a reader or writer was in the way
+    wal_frames: int    # frames in the WAL when it ran
+    checkpointed: int  # frames copied into the database
+    seconds: float
+
+
+@dataclass
+class BackupResult:
+    path: str
+    bytes: int
+    pages: int
+    steps: int
+    restarts: int  # times a concurrent write sent the copy back to the start
+    seconds: float
+
+
+def wal_size(path: str | None = None) -> int:
+    try:
+        return os.path.getsize((path or db.DB_PATH) + "-wal")
+    except FileNotFoundError:
+        return 0
+
+
+def checkpoint(conn, mode: str = "PASSIVE") -> CheckpointResult:
+    """Runs PRAGMA wal_checkpoint(`mode`) on `conn`, a fastlite database"""
+    mode = mode.upper()
+    if mode not in ("PASSIVE", "FULL", "RESTART", "TRUNCATE"):
+        raise ValueError(f"unknown checkpoint mode {mode!r}")
+    start = time.perf_counter()
+    with metrics.timer("db_checkpoint_duration_seconds", mode.lower()):
+        pragma = f"PRAGMA wal_checkpoint({mode})"
+        busy, frames, copied = conn.execute(pragma).fetchone()
+    seconds = time.perf_counter() - start
+    return CheckpointResult(mode, bool(busy), frames, copied, seconds)
+
+
+class WalCheckpointer:
+    """
+    A background thread that keeps the WAL short, so readers don't wade
+    through a long log. Every `interval` seconds it runs a PASSIVE
+    checkpoint, which copies what it can without waiting on anyone; if the
+    WAL file has grown past `max_bytes` it runs TRUNCATE instead, which
+    waits up to `busy_timeout_ms` for readers to move on and then resets
+    the file to zero length. A busy checkpoint is simply retried later.
+    It uses its own connection, so it never holds up a request thread.
+
+    Every server process starts one, but only the holder of an flock on
+    `<database>.checkpoint-lock` does any work; the others keep trying to
+    take the lock, so one of them carries on if the holder exits.
+    """
+
+    def __init__(self, interval: float = WAL_CHECKPOINT_SECONDS,
+                 max_bytes: int = WAL_MAX_BYTES, check_every: float = WAL_CHECK_SECONDS,
+                 busy_timeout_ms: int = 1000, path: str | None = None):
+        self.interval = interval
+        self.max_bytes = max_bytes
+        self.check_every = check_every
+        self.busy_timeout_ms = busy_timeout_ms
+        self.path = path or db.DB_PATH
+        self.lock_path = self.path + ".checkpoint-lock"
+        self._stop = threading.Event()
+        self._thread = None
+        self._conn = None
+        self._lock = None
+        self._last = time.monotonic()
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="wal-checkpointer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = 10):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_once(self, now: float | None = None) -> CheckpointResult | None:
+        """Checkpoints if the policy says it's time. Returns what ran, if anything."""
+        now = time.monotonic() if now is None else now
+        if wal_size(self.path) > self.max_bytes:
+            mode = "TRUNCATE"
+        elif now - self._last >= self.interval:
+            mode = "PASSIVE"
+        else:
+            return None
+        if self._conn is None:
+            self._conn = db.connect(self.path)
+            self._conn.execute(f"PRAGMA busy_timeout = {self.busy_timeout_ms}")
+        try:
+            result = checkpoint(self._conn, mode)
+        except apsw.BusyError:
+            result = CheckpointResult(mode, True, -1, -1, 0.0)
+        self._last = now
+        if result.busy:
+            log.info("%s checkpoint busy; will retry", mode)
+        return result
+
+    def acquire(self) -> bool:
+        """Whether this is (now) the one checkpointer for the database"""
+        if self._lock is None:
+            lock = open(self.lock_path, "w")  # noqa: SIM115 - held open while we checkpoint
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock.close()
+                return False
+            self._lock = lock
+        return True
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.check_every):
+                try:
+                    if self.acquire():
+                        self.run_once()
+                except Exception:
+                    log.exception("WAL checkpoint failed")
+        finally:
+            if self._conn is not None:
+                self._conn.conn.close()
+                self._conn = None
+            if self._lock is not None:
+                self._lock.close()  # lets another process take over
+                self._lock = None
+
+
+def list_backups(dest_dir: str = BACKUP_DIR) -> list[str]:
+    """Snapshot paths, oldest first (the names sort by time)"""
+    return sorted(glob.glob(os.path.join(dest_dir, "site-*.db")))
+
+
+def prune(dest_dir: str = BACKUP_DIR, keep: int = BACKUP_KEEP) -> list[str]:
+    """Deletes all but the newest `keep` snapshots. Returns the deleted paths."""
+    old = list_backups(dest_dir)[:-keep] if keep > 0 else list_backups(dest_dir)
+    for path in old:
+        os.remove(path)
+    return old
+
+
+def backup(dest_dir: str = BACKUP_DIR, keep: int = BACKUP_KEEP,
+           pages_per_step: int = BACKUP_PAGES_PER_STEP, pause: float = 0.005,
+           max_restarts: int = 3, path: str | None = None) -> BackupResult:
+    """
+    Copies the live database to a new snapshot in `dest_dir` with SQLite's
+    online backup API, then prunes old snapshots down to `keep`.
+
+    The copy runs `pages_per_step` pages at a time with a short pause in
+    between, holding a read lock only for the length of a step, so writers
+    (which under WAL never wait on readers anyway) are never stalled. A
+    write from another connection sends SQLite's copy back to the start;
+    after `max_restarts` of those the rest is copied in one step, inside a
+    single read snapshot, so a busy site can't keep a backup from ever
+    finishing. The snapshot is written beside its final name, checked with
+    PRAGMA quick_check, switched to a self-contained rollback journal, and
+    only then renamed into place.
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    with open(os.path.join(dest_dir, ".lock"), "w") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise BackupInProgress(
+                f"a backup into {dest_dir} is already running"
+            ) from None
+        with metrics.timer("db_backup_duration_seconds", "backup"):
+            result = _backup(
+                dest_dir, pages_per_step, pause, max_restarts, path or db.DB_PATH
+            )
+        prune(dest_dir, keep)
+    return result
+
+
+def _backup(dest_dir, pages_per_step, pause, max_restarts, path) -> BackupResult:
+    stamp = f"{datetime.now(UTC):%Y%m%dT%H%M%S%fZ}"
+    final = os.path.join(dest_dir, f"site-{stamp}.db")
+    partial = final + ".partial"
+    for leftover in glob.glob(os.path.join(dest_dir, "*.partial")):
+        os.remove(leftover)  # from a backup that crashed; we hold the lock
+
+    start = time.perf_counter()
+    source = db.connect(path)
+    dest = apsw.Connection(partial)
+    steps = restarts = 0
+    try:
+        with dest.backup("main", source.conn, "main") as copy:
+            remaining = None
+            while not copy.done:
+                try:
+                    copy.step(pages_per_step if restarts < max_restarts else -1)
+                except (apsw.BusyError, apsw.LockedError):
+                    time.sleep(pause)
+                    continue
+                steps += 1
+                if remaining is not None and copy.remaining > remaining:
+                    restarts += 1
+                remaining = copy.remaining
+                if not copy.done:
+                    time.sleep(pause)
+            pages = copy.page_count
+        dest.execute("PRAGMA journal_mode = DELETE").fetchall()
+        check = dest.execute("PRAGMA quick_check").fetchall()
+    finally:
+        dest.close()
+        source.conn.close()
+
+    if check != [("ok",)]:
+        os.remove(partial)
+        raise RuntimeError(f"backup failed quick_check: {check[:5]}")
+    os.replace(partial, final)
+    seconds = time.perf_counter() - start
+    return BackupResult(final, os.path.getsize(final), pages, steps, restarts, seconds)
@@ -0,0 +1,264 @@
+'''Low-overhead request/DB/outbound metrics in Prometheus text format'''
+
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+
+# Upper bounds (seconds) shared by every latency histogram
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Registry:
+    """
+    Counters and histograms keyed by (metric name, label values). Updates
+    are a dict lookup plus a few integer adds under one lock, which keeps
+    the per-request cost in the low microseconds.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._help: dict[str, tuple[str, str, tuple]] = {}  # name -> (type, help, label names)
+        self._counters: dict[tuple, float] = {}
+        self._histograms: dict[tuple, list] = {}  # key -> [bucket counts..., sum, count]
+
+    def describe(self, name, kind, help, labels=()):
+        self._help[name] = (kind, help, tuple(labels))
+
+    def inc(self, name, labels=(), amount=1):
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        key = (name, labels)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            h = self._histograms.get(key)
+            if h is None:
+                h = self._histograms[key] = [0] * (len(self.buckets) + 3)
+            h[i] += 1  # index len(buckets) is the +Inf overflow bucket
+            h[-2] += value
+            h[-1] += 1
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self) -> dict:
+        """The current values as plain JSON-serialisable lists"""
+        with self._lock:
+            return {
+                "counters": [[n, list(labels), v] for (n, labels), v in self._counters.items()],
+                "histograms": [[n, list(labels), list(h)] for (n, labels), h in self._histograms.items()],
+            }
+
+    def render(self, snapshots: list[dict] | None = None) -> str:
+        """
+        Prometheus text exposition format (version 0.0.4). Given `snapshots`
+        (e.g. one per worker process), renders their sum instead of this
+        registry's own values.
+        """
+        if snapshots is None:
+            snapshots = [self.snapshot()]
+        counters, histograms = {}, {}
+        for snapshot in snapshots:
+            for n, labels, value in snapshot["counters"]:
+                key = (n, tuple(labels))
+                counters[key] = counters.get(key, 0) + value
+            for n, labels, h in snapshot["histograms"]:
+                total = histograms.setdefault((n, tuple(labels)), [0] * len(h))
+                for i, value in enumerate(h):
+                    total[i] += value
+        lines = []
+        for name, (kind, help, label_names) in self._help.items():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "counter":
+                for (n, labels), value in sorted(counters.items()):
+                    if n == name:
+                        lines.append(f"{name}{_labels(label_names, labels)} {_num(value)}")
+            else:
+                for (n, labels), h in sorted(histograms.items()):
+                    if n != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip((*self.buckets, "+Inf"), h[:-2]):
+                        cumulative += count
+                        le = bound if bound == "+Inf" else _num(bound)
+                        lines.append(f"{name}_bucket{_labels((*label_names, 'le'), (*labels, le))} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(label_names, labels)} {_num(h[-2])}")
+                    lines.append(f"{name}_count{_labels(label_names, labels)} {h[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+def _num(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REGISTRY = Registry()
+REGISTRY.describe("http_requests_total", "counter", "HTTP requests by method, route and status class",
+                  ("method", "route", "status"))
+REGISTRY.describe("http_request_duration_seconds", "histogram", "HTTP request latency by route",
+                  ("route",))
+REGISTRY.describe("db_call_duration_seconds", "histogram", "Time spent in website.db calls", ("call",))
+REGISTRY.describe("github_request_duration_seconds", "histogram", "Outbound GitHub API latency",
+                  ("call",))
+# Compression ratio per coding is output_bytes / input_bytes
+REGISTRY.describe("http_compression_input_bytes_total", "counter",
+                  "Response bytes fed to the compression middleware", ("encoding",))
+REGISTRY.describe("http_compression_output_bytes_total", "counter",
+                  "Compressed response bytes sent", ("encoding",))
+REGISTRY.describe("http_compression_cpu_seconds", "histogram",
+                  "CPU time spent compressing each response", ("encoding",))
+
+
+class SharedMetrics:
+    """
+    Pools the metrics of several server processes. Each process keeps its
+    own registry, so with WORKERS > 1 a scrape would otherwise see only the
+    worker that happened to answer. Every process writes its registry to
+    `directory` every `interval` seconds (and right before answering a
+    scrape), and render() sums every file there, so the other workers'
+    figures are at most `interval` seconds old. Files of workers that have
+    exited are kept, so totals never go backwards; the launcher empties the
+    directory when the server starts.
+    """
+
+    def __init__(self, directory: str, registry=REGISTRY, interval: float = 1.0):
+        self.directory = directory
+        self.registry = registry
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._path = None
+
+    @staticmethod
+    def reset(directory: str):
+        """Creates `directory`, dropping the files of a previous server run"""
+        os.makedirs(directory, exist_ok=True)
+        for path in glob.glob(os.path.join(directory, "*.json")):
+            os.remove(path)
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        # pid plus start time, so a recycled pid never overwrites a dead
+        # worker's totals with smaller ones
+        self._path = os.path.join(self.directory, f"{os.getpid()}-{time.time_ns()}.json")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def flush(self):
+        if self._path is None:
+            return
+        tmp = self._path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.registry.snapshot(), f)
+        os.replace(tmp, self._path)
+
+    def render(self) -> str:
+        self.flush()
+        snapshots = []
+        for path in glob.glob(os.path.join(self.directory, "*.json")):
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue  # removed by a restarting server
+        return self.registry.render(snapshots)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+
+def timed(metric, call, registry=REGISTRY):
+    """Decorator recording each call's duration under `metric{call=...}`"""
+    labels = (call,)
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                registry.observe(metric, labels, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+@contextmanager
+def timer(metric, call, registry=REGISTRY):
+    """Context manager form of `timed`, usable around awaits"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.observe(metric, (call,), time.perf_counter() - start)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting requests and timing them per route. Routes are
+    labelled by their path template (e.g. /myzone/newsletter/delete/{id})
+    so label cardinality stays bounded; unmatched paths share one label.
+    """
+
+    def __init__(self, app, registry=REGISTRY):
+        self.app = app
+        self.registry = registry
+        self._route_paths = {}
+
+    def _route_label(self, scope):
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        path = self._route_paths.get(endpoint)
+        if path is None:
+            # Routes can be added after startup; refresh the map on a miss
+            for route in scope["app"].router.routes:
+                self._route_paths[getattr(route, "endpoint", None)] = getattr(route, "path", "unknown")
+            path = self._route_paths.setdefault(endpoint, "unknown")
+        return path
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = self._route_label(scope)
+            self.registry.inc("http_requests_total", (scope["method"], route, f"{status // 100}xx"))
+            self.registry.observe("http_request_duration_seconds", (route,), time.perf_counter() - start)
@@ -0,0 +1,99 @@
+'''Background delivery of queued mail from the outbox table'''
+
+import logging
+import threading
+import traceback
+
+from website import db, timestamps
+
+log = logging.getLogger(__name__)
+
+
+def backoff(attempt: int, base: float, cap: float) -> int:
+    """Seconds to wait after the `attempt`-th failure: base * 2^(n-1), capped"""
+    return int(min(cap, base * 2 ** (attempt - 1)))
+
+
+class OutboxWorker:
+    """
+    A small pool of threads that drains the outbox. Each thread claims one
+    due message at a time (db.claim_outbox), hands it to `deliver`, and
+    records the outcome: sent, retried after an exponential backoff, or
+    failed once `max_attempts` is reached. Idle threads sleep until
+    `poll_interval` passes or `notify()` is called.
+
+    `deliver(message)` gets the outbox row as a dict and raises on failure;
+    it runs on a worker thread, so blocking SMTP calls are fine.
+    """
+
+    def __init__(self, deliver, concurrency: int = 2, poll_interval: float = 5.0,
+                 max_attempts: int = 6, backoff_base: float = 30, backoff_cap: float = 3600,
+                 lease: int = 300):
+        self.deliver = deliver
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.lease = lease
+        self._wake = threading.Condition()
+        self._pending_wakeups = 0
+        self._stopping = False
+        self._threads: list[threading.Thread] = []
+
+    def start(self):
+        self._stopping = False
+        for i in range(self.concurrency):
+            thread = threading.Thread(target=self._run, name=f"outbox-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def notify(self):
+        """Wake an idle thread now rather than at its next poll"""
+        with self._wake:
+            self._pending_wakeups += 1
+            self._wake.notify()
+
+    def stop(self, timeout: float | None = 10):
+        """Let in-flight deliveries finish, then stop the threads"""
+        with self._wake:
+            self._stopping = True
+            self._wake.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads.clear()
+
+    def process_one(self) -> bool:
+        """Claims and delivers one due message. Returns False if none was due."""
+        claimed = db.claim_outbox(1, self.lease)
+        if not claimed:
+            return False
+        message = claimed[0]
+        try:
+            self.deliver(message)
+        except Exception as e:  # noqa: BLE001 - recorded on the row and retried
+            error = "".join(traceback.format_exception_only(e)).strip()
+            attempt = message["attempts"]
+            if attempt >= self.max_attempts:
+                log.error("giving up on outbox message %s after %s attempts: %s", message["id"], attempt, error)
+                db.mark_outbox_failed(message["id"], error, None)
+            else:
+                retry_at = timestamps.now() + backoff(attempt, self.backoff_base, self.backoff_cap)
+                log.warning("outbox message %s failed (attempt %s), retrying: %s", message["id"], attempt, error)
+                db.mark_outbox_failed(message["id"], error, retry_at)
+        else:
+            db.mark_outbox_sent(message["id"])
+        return True
+
+    def _run(self):
+        while not self._stopping:
+            try:
+                if self.process_one():
+                    continue
+            except Exception:
+                # A database hiccup shouldn't kill the thread; try again later
+                log.exception("outbox worker error")
+            with self._wake:
+                if self._pending_wakeups == 0 and not self._stopping:
+                    self._wake.wait(self.poll_interval)
+                self._pending_wakeups = max(0, self._pending_wakeups - 1)
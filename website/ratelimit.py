@@ -0,0 +1,82 @@
+'''Per-client token buckets and a global concurrency cap for public writes'''
+
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenBucketLimiter:
+    """
+    One token bucket per client key: each holds up to `burst` tokens and
+    refills at `rate` tokens per second. Buckets live in an LRU capped at
+    `max_clients`, so memory stays bounded however many addresses show up;
+    evicting an idle bucket only forgets a client that was under its limit
+    anyway or has since refilled.
+    """
+
+    def __init__(self, rate: float, burst: int, max_clients: int = 10_000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: OrderedDict[str, list[float]] = OrderedDict()  # key -> [tokens, updated]
+        self._lock = threading.Lock()
+
+    def allow(self, key: str, now: float | None = None) -> tuple[bool, int]:
+        """Takes a token for `key`. Returns (allowed, seconds until retry)."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(self.burst), now]
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return True, 0
+            return False, math.ceil((1 - bucket[0]) / self.rate) if self.rate else 60
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class ConcurrencyLimiter:
+    """Admits at most `limit` concurrent holders; extra callers are refused, not queued"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.active >= self.limit:
+                return False
+            self.active += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+
+
+def client_ip(req, trust_proxy_headers: bool = False) -> str:
+    """
+    The client's address. Behind our nginx, X-Real-IP is set to the peer
+    address; failing that, the right-most X-Forwarded-For entry is the one
+    nginx appended (anything left of it is client-supplied). The headers
+    are only read with `trust_proxy_headers`, i.e. when nothing but nginx
+    can reach the app.
+    """
+    if trust_proxy_headers:
+        real_ip = req.headers.get("x-real-ip")
+        if real_ip:
+            return real_ip.strip()
+        forwarded = req.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[-1].strip()
+    return req.client.host if req.client else "unknown"
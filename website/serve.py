@@ -0,0 +1,96 @@
+'''Production launcher for the site, single- or multi-process
+
+    python -m website.serve
+
+WORKERS (default 1, or "auto" for one per core) sets how many server
+processes share the listening socket. When gunicorn is installed (the
+"gunicorn" extra) and WORKERS > 1, a gunicorn arbiter runs uvicorn workers
+and restarts any that crash; otherwise uvicorn's own supervisor is used.
+Either way the database schema is created and migrated here, once, before
+any worker starts; each worker opens its own connections lazily. Workers
+pool their metrics in METRICS_DIR (default: a directory under the system
+temp dir), so /metrics reports the whole server whichever worker answers.
+'''
+
+import importlib.util
+import os
+import tempfile
+
+import uvicorn
+from dotenv import load_dotenv
+
+# Local settings live in ./.env; read them before the app module reads its
+# configuration from the environment. Deployments pass real environment
+# variables (docker --env-file, systemd EnvironmentFile), which take priority.
+load_dotenv(".env")
+
+from website import db
+from website.app import DEBUG, HOST, PORT, WORKERS
+from website.metrics import SharedMetrics
+
+APP = "website.app:app"
+
+
+def _uvicorn_worker_class():
+    if importlib.util.find_spec("uvicorn_worker"):  # maintained home of the gunicorn worker
+        return "uvicorn_worker.UvicornWorker"
+    return "uvicorn.workers.UvicornWorker"
+
+
+def run_gunicorn(workers: int):
+    from gunicorn.app.base import BaseApplication
+
+    options = {
+        "bind": f"{HOST}:{PORT}",
+        "workers": workers,
+        "worker_class": _uvicorn_worker_class(),
+        # Import the app once in the arbiter and fork it, so workers share
+        # the already-loaded code pages
+        "preload_app": True,
+        "graceful_timeout": 30,
+        "loglevel": "debug" if DEBUG else "info",
+    }
+
+    class Server(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from website.app import app
+            return app
+
+    Server().run()
+
+
+def run_uvicorn(workers: int):
+    uvicorn.run(
+        APP,
+        host=HOST,
+        port=PORT,
+        workers=workers,
+        # The reloader only supports a single process
+        reload=DEBUG and workers == 1,
+        log_level="debug" if DEBUG else "info",
+    )
+
+
+def main():
+    print(f"🚀 Starting FastHTML server on {HOST}:{PORT} with {WORKERS} worker(s)")
+    print(f"🔧 Debug mode: {DEBUG}")
+
+    db.init_db()
+
+    if WORKERS > 1:
+        # Workers read this at startup (after the fork or spawn)
+        metrics_dir = os.environ.setdefault(
+            "METRICS_DIR", os.path.join(tempfile.gettempdir(), f"website-metrics-{PORT}")
+        )
+        SharedMetrics.reset(metrics_dir)
+        if importlib.util.find_spec("gunicorn"):
+            return run_gunicorn(WORKERS)
+    run_uvicorn(WORKERS)
+
+
+if __name__ == "__main__":
+    main()
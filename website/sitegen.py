@@ -0,0 +1,55 @@
+'''Static export of the public pages, for nginx to serve without the app
+
+    python -m website.cli export-site public/
+
+Home, about and the 404 page depend on nothing but the code, so they are
+written out once per deploy together with the hashed static assets. Each
+file gets .gz and .br siblings for nginx's gzip_static/brotli_static.
+'''
+
+import os
+from pathlib import Path
+
+from website.cache import RenderedPage
+
+# Page cache name -> file, laid out for `try_files $uri $uri.html`
+PAGES = {
+    "home": "index.html",
+    "about": "about.html",
+    "404": "404.html",
+}
+
+
+def write_file(path: Path, data: bytes):
+    """Writes `data` to `path` atomically, so nginx never serves a half-written file"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def write_page(path: Path, page: RenderedPage) -> list[Path]:
+    """Writes a rendered page and its precompressed variants. Returns the paths written."""
+    variants = {path: page.body, path.with_name(path.name + ".gz"): page.gzip}
+    if page.br is not None:
+        variants[path.with_name(path.name + ".br")] = page.br
+    for target, data in variants.items():
+        write_file(target, data)
+    return list(variants)
+
+
+def export_site(out_dir: str | Path) -> list[Path]:
+    """
+    Renders every public page and static asset into `out_dir` and returns
+    the files written. Assets from earlier exports are left in place: pages
+    still cached in browsers may reference their old hashed names.
+    """
+    from website.app import assets, page_cache
+
+    out = Path(out_dir)
+    written = []
+    for name, filename in PAGES.items():
+        written += write_page(out / filename, page_cache.get(name))
+    for asset in assets:
+        written += write_page(out / asset.prefix.strip("/") / asset.filename, asset.page)
+    return written
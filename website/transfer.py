@@ -0,0 +1,134 @@
+'''Bulk export and import of newsletter subscribers'''
+
+import csv
+import io
+import json
+import os
+from dataclasses import dataclass
+
+from website import db
+from website.emails import is_valid_email, normalize_email
+from website.timestamps import isoformat_utc
+
+EXPORT_FIELDS = ("id", "email", "created_at", "status")
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "5000"))
+EXPORT_CHUNK_SIZE = 1000
+
+
+def _values(row) -> tuple:
+    # Exports carry readable ISO-8601 UTC times rather than epoch seconds
+    return (row["id"], row["email"], isoformat_utc(row["created_at"]), row["status"])
+
+def format_rows(rows, fmt: str) -> str:
+    """Serializes a chunk of subscriber rows as CSV lines or NDJSON"""
+    if fmt == "ndjson":
+        return "".join(json.dumps(dict(zip(EXPORT_FIELDS, _values(row)))) + "\n" for row in rows)
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerows(_values(row) for row in rows)
+    return buf.getvalue()
+
+def _header(fmt: str) -> str:
+    if fmt != "csv":
+        return ""
+    buf = io.StringIO()
+    csv.writer(buf).writerow(EXPORT_FIELDS)
+    return buf.getvalue()
+
+def export(fmt: str, chunk_size: int = EXPORT_CHUNK_SIZE):
+    """Yields the subscriber list in `fmt`, one chunk of rows at a time"""
+    yield _header(fmt)
+    for chunk in db.iter_subscribers(chunk_size):
+        yield format_rows(chunk, fmt)
+
+async def export_async(fmt: str, chunk_size: int = EXPORT_CHUNK_SIZE):
+    """Async version of `export`, reading through the DB executor"""
+    yield _header(fmt)
+    async for chunk in db.iter_subscribers_async(chunk_size):
+        yield format_rows(chunk, fmt)
+
+
+def detect_format(filename: str) -> str:
+    """Guesses the import format from a file name: csv, ndjson or plain text"""
+    ext = os.path.splitext(filename or "")[1].lower()
+    if ext == ".csv":
+        return "csv"
+    if ext in (".ndjson", ".jsonl"):
+        return "ndjson"
+    return "txt"
+
+def read_emails(lines, fmt: str):
+    """
+    Yields raw addresses from an iterable of text lines.
+    CSV files use their `email` column if they have a header, otherwise the
+    first column; NDJSON lines are objects with an `email` key; anything
+    else is read as one address per line.
+    """
+    if fmt == "csv":
+        rows = csv.reader(lines)
+        first = next(rows, None)
+        if first is None:
+            return
+        header = [c.strip().lower() for c in first]
+        col = header.index("email") if "email" in header else 0
+        if "email" not in header and first:
+            yield first[0]
+        for row in rows:
+            if len(row) > col:
+                yield row[col]
+    elif fmt == "ndjson":
+        for line in lines:
+            if line.strip():
+                try:
+                    yield str(json.loads(line).get("email", ""))
+                except (ValueError, AttributeError):
+                    yield ""
+    else:
+        yield from lines
+
+
+@dataclass
+class ImportResult:
+    inserted: int = 0
+    skipped: int = 0  # already subscribed
+    invalid: int = 0
+
+def import_emails(emails, batch_size: int = IMPORT_BATCH_SIZE) -> ImportResult:
+    """
+    Validates addresses and inserts them in batches of `batch_size`, one
+    transaction per batch, skipping ones that are already subscribed.
+    """
+    result = ImportResult()
+    batch = []
+
+    def flush():
+        inserted = db.import_subscribers(batch)
+        result.inserted += inserted
+        result.skipped += len(batch) - inserted
+        batch.clear()
+
+    for raw in emails:
+        email = normalize_email(raw)
+        if not email:
+            continue
+        if not is_valid_email(email):
+            result.invalid += 1
+            continue
+        batch.append(email)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return result
+
+def import_file(f, fmt: str, batch_size: int = IMPORT_BATCH_SIZE) -> ImportResult:
+    """Imports from a binary or text file object"""
+    if isinstance(f, io.TextIOBase):
+        text = f
+    else:
+        text = io.TextIOWrapper(f, encoding="utf-8-sig", newline="")
+    return import_emails(read_emails(text, fmt), batch_size)
@@ -0,0 +1,75 @@
+'''Group-commit queue that batches writes into shared transactions'''
+
+import threading
+import time
+from concurrent.futures import Future
+
+
+class WriteQueue:
+    """
+    Collects items submitted from any thread and hands them to `commit` in
+    batches: a batch is flushed once it reaches `max_batch` items or
+    `flush_interval` seconds after its first item arrived, whichever is
+    first. `commit` takes a list of items and returns one result per item;
+    each submitter gets its own result (or the batch's exception) through
+    the Future returned by `submit`.
+    """
+
+    def __init__(self, commit, flush_interval: float = 0.005, max_batch: int = 100):
+        self.commit = commit
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._pending: list[tuple[object, Future]] = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = None
+
+    def submit(self, item) -> Future:
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("write queue is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="write-queue", daemon=True)
+                self._thread.start()
+            self._pending.append((item, future))
+            self._cond.notify()
+        return future
+
+    def close(self, timeout: float | None = None):
+        """Stop accepting items and flush everything already queued"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            # Give the batch a short window to fill up before committing it
+            deadline = time.monotonic() + self.flush_interval
+            while self._pending and len(self._pending) < self.max_batch and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return  # closed and drained
+            try:
+                results = self.commit([item for item, _ in batch])
+            except Exception as e:  # noqa: BLE001 - handed to every submitter
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)